@@ -0,0 +1,95 @@
+"""Case journal: append rate, startup load and per-member history latency.
+
+Appends N cases spread over many guilds and members, reopens the journal
+from disk (sidecar indexes + active segment), then times `history()` for
+random members and one compaction pass that expires the oldest half.
+
+    python benchmarks/bench_cases.py [--cases 2000000] [--guilds 1000] [--members 100]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from glxbot.cases import CaseJournal  # noqa: E402
+
+
+def new_journal(args) -> CaseJournal:
+    return CaseJournal(
+        segment_bytes=args.segment_mb * 1024 * 1024,
+        retention_days=1,
+        flush_interval=3600,
+        compact_interval=0,
+    )
+
+
+async def run(args):
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = new_journal(args)
+        journal.open(tmp)
+        start_ts = time.time() - 2 * 86400
+        step = 2 * 86400 / args.cases
+        probes = set(rng.sample(range(args.cases), 2000))
+        members = []
+        t = time.perf_counter()
+        for i in range(args.cases):
+            gid = 10**17 + rng.randrange(args.guilds)
+            uid = 10**17 + rng.randrange(args.members)
+            if i in probes:
+                members.append((gid, uid))
+            # Spread timestamps over two days so compaction has something to expire.
+            journal.record(
+                gid,
+                uid,
+                "warn",
+                "Anti-Spam: message deleted • warn `SPAM` (1/3)",
+                source="auto",
+                ts=int(start_ts + i * step),
+            )
+        append_s = time.perf_counter() - t
+        await journal.close()
+        size_mb = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp)) / 1e6
+
+        journal = new_journal(args)
+        info = journal.open(tmp)
+
+        lat = []
+        found = 0
+        for gid, uid in members:
+            t = time.perf_counter()
+            found += len(journal.history(gid, uid, 25))
+            lat.append((time.perf_counter() - t) * 1000)
+        lat.sort()
+
+        print(f"{args.cases} cases, {info['segments']} segments, {size_mb:.0f} MB on disk")
+        print(f"append: {append_s / args.cases * 1e6:.2f} us/case")
+        print(f"open (sidecars + active segment): {info['seconds']:.2f} s")
+        print(
+            f"history(limit=25) over {len(members)} members with cases: p50 {statistics.median(lat):.3f} ms, "
+            f"p99 {lat[int(len(lat) * 0.99)]:.3f} ms, max {lat[-1]:.3f} ms ({found} cases read)"
+        )
+
+        dropped = await journal.compact()
+        print(f"compaction (1 day retention): {dropped} cases expired in {journal.last_compact_ms / 1000:.2f} s")
+        await journal.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=2_000_000)
+    parser.add_argument("--guilds", type=int, default=1_000)
+    parser.add_argument("--members", type=int, default=100, help="distinct members per guild")
+    parser.add_argument("--segment-mb", type=int, default=16)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""Event replay for the protection hot path (`on_message`, `on_member_join`).
+
+Builds the real bot with `create_bot()` and feeds its registered handlers
+fake guilds, members, channels and messages. Every REST call made by the
+handlers and the work they queue (deletes, timeouts, log sends, role edits,
+welcome messages) goes to a stub that sleeps for a configurable latency on a
+shared requests-per-second budget and counts calls per route.
+
+Scenarios: steady chat, spam bursts, invite floods, mention floods and a
+500-account join raid. For each one it reports events/sec, p50/p99 handler
+latency, time from dispatch to the enforcing REST call, REST calls by route
+and peak Python memory (a second pass under tracemalloc). `--json` writes the
+results with the git revision so runs can be compared across versions.
+
+    python benchmarks/bench_events.py [--scenario all] [--latency-ms 50] [--rps 50] [--json out.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import discord  # noqa: E402
+
+from glxbot.config import LOG_CHANNEL_NAME, RAID_JOIN_THRESHOLD  # noqa: E402
+from glxbot.core import create_bot  # noqa: E402
+from glxbot.enforcement import enforcer  # noqa: E402
+from glxbot.raid import raid_monitor  # noqa: E402
+from glxbot.security import log_sink  # noqa: E402
+from glxbot.state import WELCOME_CHANNELS  # noqa: E402
+
+BOT_USER_ID = 999
+_message_ids = itertools.count(1)
+
+
+class StubREST:
+    """Sleeps `latency` per call, at most `rps` calls started per second."""
+
+    def __init__(self, latency: float, rps: float):
+        self.latency = latency
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self.next_slot = 0.0
+        self.calls = Counter()
+
+    async def call(self, route: str):
+        now = time.perf_counter()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        self.calls[route] += 1
+        await asyncio.sleep((slot - now) + self.latency)
+
+
+class FakeRole:
+    def __init__(self, rest: StubREST, role_id: int, guild=None, administrator: bool = False):
+        self.rest = rest
+        self.id = role_id
+        self.guild = guild
+        self.permissions = discord.Permissions.general()
+        self.permissions.send_messages = True
+        self.permissions.administrator = administrator
+        self.locked_at = None
+
+    async def edit(self, permissions=None, reason=None):
+        await self.rest.call("PATCH /guilds/{guild}/roles/{role}")
+        self.permissions = permissions
+        if self.locked_at is None and not permissions.send_messages:
+            self.locked_at = time.perf_counter()
+
+
+class FakeChannel:
+    def __init__(self, rest: StubREST, channel_id: int, guild, name: str):
+        self.rest = rest
+        self.id = channel_id
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{channel_id}>"
+        self._overwrites = {}
+
+    def overwrites_for(self, role):
+        return self._overwrites.get(role, discord.PermissionOverwrite())
+
+    async def set_permissions(self, role, overwrite=None, reason=None):
+        await self.rest.call("PUT /channels/{channel}/permissions/{target}")
+        self._overwrites[role] = overwrite
+
+    async def send(self, content=None, embeds=None, **kwargs):
+        await self.rest.call("POST /channels/{channel}/messages")
+
+
+class FakeMember:
+    def __init__(self, rest: StubREST, user_id: int, guild, bot: bool = False):
+        self.rest = rest
+        self.id = user_id
+        self.guild = guild
+        self.bot = bot
+        self.name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.roles = [guild.default_role]
+        self.dispatched_at = 0.0
+
+    async def timeout(self, until=None, reason=None):
+        await self.rest.call("PATCH /guilds/{guild}/members/{user}")
+
+
+class FakeMessage:
+    __slots__ = ("id", "rest", "guild", "author", "channel", "content", "mentions", "mention_everyone",
+                 "_state", "dispatched_at", "enforced")
+
+    def __init__(self, rest, author, channel, content, mentions=()):
+        self.id = next(_message_ids)
+        self.rest = rest
+        self.guild = author.guild
+        self.author = author
+        self.channel = channel
+        self.content = content
+        self.mentions = list(mentions)
+        self.mention_everyone = False
+        self._state = None
+        self.dispatched_at = 0.0
+        self.enforced = None
+
+    async def delete(self):
+        await self.rest.call("DELETE /channels/{channel}/messages/{message}")
+        self.enforced = time.perf_counter() - self.dispatched_at
+
+
+class FakeGuild:
+    def __init__(self, rest: StubREST, guild_id: int, members: int):
+        self.id = guild_id
+        self.name = f"bench-{guild_id}"
+        self.owner_id = guild_id + 1
+        self.default_role = FakeRole(rest, guild_id, self)
+        self.roles = [self.default_role, FakeRole(rest, guild_id + 2, self, administrator=True)]
+        self.general = FakeChannel(rest, guild_id + 3, self, "general")
+        self.text_channels = [self.general, FakeChannel(rest, guild_id + 4, self, LOG_CHANNEL_NAME)]
+        self._channels = {c.id: c for c in self.text_channels}
+        self.me = FakeMember(rest, BOT_USER_ID, self, bot=True)
+        self.members = [FakeMember(rest, guild_id * 10_000 + i, self) for i in range(members)]
+        self.member_count = len(self.members)
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+    async def create_text_channel(self, name, **kwargs):
+        raise discord.Forbidden(SimpleNamespace(status=403, reason="bench"), "bench guilds have a log channel")
+
+
+# ---- scenarios -------------------------------------------------------------
+#
+# Each returns (kind, events) with events as ("message" | "join", object).
+# Guild ids come from `next_id` so every run works on fresh per-guild state.
+
+
+def steady_chat(rest, next_id, args):
+    guilds = [FakeGuild(rest, next_id(), args.members) for _ in range(args.guilds)]
+    events = []
+    for i in range(args.messages):
+        g = guilds[i % len(guilds)]
+        author = g.members[(i // len(guilds)) % len(g.members)]
+        events.append(("message", FakeMessage(rest, author, g.general, f"hello there, message number {i}")))
+    return events
+
+
+def spam_burst(rest, next_id, args):
+    g = FakeGuild(rest, next_id(), args.members)
+    events = []
+    for burst in range(args.burst):
+        for spammer in g.members[:args.spammers]:
+            events.append(("message", FakeMessage(rest, spammer, g.general, f"buy now {burst}")))
+    return events
+
+
+def invite_flood(rest, next_id, args):
+    g = FakeGuild(rest, next_id(), args.members)
+    return [
+        ("message", FakeMessage(rest, g.members[i % len(g.members)], g.general, f"join us discord.gg/raid{i}"))
+        for i in range(args.flood)
+    ]
+
+
+def mention_flood(rest, next_id, args):
+    g = FakeGuild(rest, next_id(), args.members)
+    targets = g.members[-20:]
+    return [
+        ("message", FakeMessage(rest, g.members[i % len(g.members)], g.general, "look here", mentions=targets))
+        for i in range(args.flood)
+    ]
+
+
+def join_raid(rest, next_id, args):
+    g = FakeGuild(rest, next_id(), 50)
+    WELCOME_CHANNELS[g.id] = g.general.id
+    return [("join", FakeMember(rest, g.id * 10_000 + 5000 + i, g)) for i in range(args.raiders)]
+
+
+SCENARIOS = {
+    "steady_chat": steady_chat,
+    "spam_burst": spam_burst,
+    "invite_flood": invite_flood,
+    "mention_flood": mention_flood,
+    "join_raid": join_raid,
+}
+
+
+def pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(p * len(values)), len(values) - 1)] * 1000
+
+
+async def replay(bot, events):
+    """Dispatch the events in order; returns (handler latencies, wall seconds)."""
+    on_message = bot.on_message
+    on_member_join = bot.on_member_join
+    latencies = []
+    start = time.perf_counter()
+    for kind, obj in events:
+        t = obj.dispatched_at = time.perf_counter()
+        if kind == "message":
+            await on_message(obj)
+        else:
+            obj.guild.members.append(obj)
+            obj.guild.member_count += 1
+            await on_member_join(obj)
+        latencies.append(time.perf_counter() - t)
+        # The gateway yields between frames; let queued enforcement run.
+        await asyncio.sleep(0)
+    return latencies, time.perf_counter() - start
+
+
+async def settle(guild_ids):
+    await enforcer.drain(timeout=120)
+    await log_sink.flush_all(limit=log_sink.max_pending)
+    for gid in guild_ids:
+        raid_monitor.clear(gid)
+        WELCOME_CHANNELS.pop(gid, None)
+
+
+async def run_scenario(bot, name, args, ids, memory: bool):
+    rest = StubREST(args.latency_ms / 1000.0, args.rps)
+    events = SCENARIOS[name](rest, lambda: next(ids), args)
+    guild_ids = {obj.guild.id for _, obj in events}
+    if memory:
+        tracemalloc.start()
+        await replay(bot, events)
+        await settle(guild_ids)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"peak_kib": round(peak / 1024, 1)}
+
+    latencies, wall = await replay(bot, events)
+    drain_start = time.perf_counter()
+    await settle(guild_ids)
+    drain = time.perf_counter() - drain_start
+
+    enforced = [obj.enforced for kind, obj in events if kind == "message" and obj.enforced is not None]
+    result = {
+        "scenario": name,
+        "events": len(events),
+        "events_per_sec": round(len(events) / wall, 1),
+        "handler_p50_ms": round(pct(latencies, 0.50), 4),
+        "handler_p99_ms": round(pct(latencies, 0.99), 4),
+        "handler_max_ms": round(max(latencies) * 1000, 4),
+        "drain_seconds": round(drain, 3),
+        "enforced": len(enforced),
+        "time_to_enforce_p50_ms": round(pct(enforced, 0.50), 2),
+        "time_to_enforce_p99_ms": round(pct(enforced, 0.99), 2),
+        "rest_calls": sum(rest.calls.values()),
+        "rest_calls_by_route": dict(rest.calls),
+    }
+    if name == "join_raid":
+        joins = [obj for _, obj in events]
+        guild = joins[0].guild
+        if guild.default_role.locked_at is not None:
+            # The join that crossed the threshold was dispatched right before the lock began.
+            crossed = joins[RAID_JOIN_THRESHOLD - 1]
+            result["time_to_lockdown_ms"] = round((guild.default_role.locked_at - crossed.dispatched_at) * 1000, 2)
+    return result
+
+
+def git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+async def run(args):
+    bot = create_bot()
+    # Commands are looked up against the bot user; no gateway login happens here.
+    bot._connection.user = SimpleNamespace(id=BOT_USER_ID)
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    ids = iter(range(10**12, 10**13, 10**6))
+
+    results = []
+    for name in names:
+        result = await run_scenario(bot, name, args, ids, memory=False)
+        if not args.no_memory:
+            result.update(await run_scenario(bot, name, args, ids, memory=True))
+        results.append(result)
+    await log_sink.close()
+
+    print(f"{args.latency_ms:.0f}ms REST latency, {args.rps:.0f} req/s budget")
+    header = f"{'scenario':<14} | {'events':>6} | {'events/s':>9} | {'p50 ms':>7} | {'p99 ms':>7} | " \
+             f"{'enforce p99':>11} | {'REST':>5} | {'peak KiB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<14} | {r['events']:>6} | {r['events_per_sec']:>9.0f} | {r['handler_p50_ms']:>7.3f} | "
+            f"{r['handler_p99_ms']:>7.3f} | {r['time_to_enforce_p99_ms']:>8.1f} ms | {r['rest_calls']:>5} | "
+            f"{r.get('peak_kib', 0):>9.0f}"
+        )
+        if "time_to_lockdown_ms" in r:
+            print(f"{'':<14}   time to lockdown: {r['time_to_lockdown_ms']:.1f} ms")
+
+    if args.json:
+        report = {
+            "benchmark": "events",
+            "revision": git_revision(),
+            "created": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "discord_py": discord.__version__,
+            "args": vars(args),
+            "results": results,
+        }
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--rps", type=float, default=50.0)
+    parser.add_argument("--guilds", type=int, default=20, help="steady_chat guilds")
+    parser.add_argument("--members", type=int, default=2000, help="members per guild")
+    parser.add_argument("--messages", type=int, default=20000, help="steady_chat messages")
+    parser.add_argument("--spammers", type=int, default=50)
+    parser.add_argument("--burst", type=int, default=20, help="messages per spammer")
+    parser.add_argument("--flood", type=int, default=2000, help="invite/mention flood messages")
+    parser.add_argument("--raiders", type=int, default=500)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--json", help="write results to this file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""End-to-end load test against the local fake Discord.
+
+Starts `benchmarks/fake_discord.py` in this process and `python bot.py` as a
+child process pointed at it via GLX_DISCORD_API_BASE / GLX_DISCORD_GATEWAY.
+Once the bot is ready, it pushes gateway events at `--rate` per second. Each
+scenario gets its own guild. It then waits for the bot's REST traffic to go
+quiet.
+
+For each scenario it reports gateway-to-action latency per action (message
+delete, timeout, lockdown) as p50/p99, REST calls by route and the 429s the
+fake served. Rate limits, 429 injection and REST latency are set with the
+fake's options. `--json` writes the results with the git revision.
+
+    python benchmarks/bench_gateway.py [--scenario all] [--rate 200] [--inject-429 0.05] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from fake_discord import FakeDiscord, add_server_args, server_from_args
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def steady_chat(fake: FakeDiscord, guild, args):
+    humans = guild.humans()
+    for i in range(args.messages):
+        yield fake.message_create(guild, humans[i % len(humans)], f"hello there, message number {i}")
+
+
+def spam_burst(fake, guild, args):
+    spammers = guild.humans()[:args.spammers]
+    for burst in range(args.burst):
+        for uid in spammers:
+            yield fake.message_create(guild, uid, f"buy now {burst}")
+
+
+def invite_flood(fake, guild, args):
+    humans = guild.humans()
+    for i in range(args.flood):
+        yield fake.message_create(guild, humans[i % len(humans)], f"join us discord.gg/raid{i}")
+
+
+def mention_flood(fake, guild, args):
+    humans = guild.humans()
+    targets = humans[-10:]
+    for i in range(args.flood):
+        yield fake.message_create(guild, humans[i % (len(humans) - 10)], "look here", mentions=targets)
+
+
+def join_raid(fake, guild, args):
+    for _ in range(args.raiders):
+        yield fake.member_add(guild)
+
+
+SCENARIOS = {
+    "steady_chat": steady_chat,
+    "spam_burst": spam_burst,
+    "invite_flood": invite_flood,
+    "mention_flood": mention_flood,
+    "join_raid": join_raid,
+}
+
+
+def pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(p * len(values)), len(values) - 1)] * 1000
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_quiet(fake: FakeDiscord, quiet: float, limit: float):
+    deadline = time.perf_counter() + limit
+    while time.perf_counter() < deadline:
+        if time.perf_counter() - fake.last_rest_at >= quiet:
+            return
+        await asyncio.sleep(0.1)
+
+
+async def run_scenario(fake: FakeDiscord, guild, name: str, args):
+    calls_before = fake.rest_calls.copy()
+    limited_before = fake.rate_limits.served_429.copy()
+    actions_before = {kind: len(v) for kind, v in fake.actions.items()}
+
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    sent = 0
+    start = time.perf_counter()
+    for event in SCENARIOS[name](fake, guild, args):
+        await event
+        sent += 1
+        ahead = start + sent * interval - time.perf_counter()
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+    wall = time.perf_counter() - start
+    await wait_quiet(fake, args.quiet, args.settle)
+
+    actions = {}
+    for kind, values in fake.actions.items():
+        new = values[actions_before.get(kind, 0):]
+        if new:
+            actions[kind] = {
+                "count": len(new),
+                "p50_ms": round(pct(new, 0.50), 2),
+                "p99_ms": round(pct(new, 0.99), 2),
+                "max_ms": round(max(new) * 1000, 2),
+            }
+    calls = fake.rest_calls - calls_before
+    return {
+        "scenario": name,
+        "events": sent,
+        "events_per_sec": round(sent / wall, 1) if wall else 0.0,
+        "actions": actions,
+        "rest_calls": sum(calls.values()),
+        "rest_calls_by_route": dict(calls),
+        "served_429": dict(fake.rate_limits.served_429 - limited_before),
+    }
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                             timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+async def run(args):
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    if args.quiet is None:
+        # discord.py waits out an exhausted bucket locally, so a shorter pause is not "done".
+        args.quiet = args.bucket_window + 1.0
+    args.guilds = max(args.guilds, len(names))
+    fake = server_from_args(args)
+    await fake.start()
+
+    workdir = tempfile.mkdtemp(prefix="glx-e2e-")
+    bot_log = Path(args.bot_log or os.path.join(workdir, "bot.log"))
+    env = {
+        **os.environ,
+        **fake.bot_env(),
+        "GLX_STATE_DB": "",
+        "GLX_CASES_DIR": os.path.join(workdir, "cases"),
+        "GLX_WEB_HOST": "127.0.0.1",
+        "GLX_WEB_PORT": str(free_port()),
+        "GLX_SHARD_COUNT": str(args.shards) if args.shards > 1 else "0",
+    }
+    with open(bot_log, "w") as log_file:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "bot.py", cwd=ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+        )
+    results = []
+    try:
+        try:
+            await asyncio.wait_for(fake.ready.wait(), timeout=args.ready_timeout)
+        except asyncio.TimeoutError:
+            raise SystemExit(f"Bot did not become ready within {args.ready_timeout:.0f}s; see {bot_log}")
+        # Startup AutoMod sync and the "online" logs should not count against the first scenario.
+        await wait_quiet(fake, args.quiet, args.settle)
+
+        guilds = list(fake.guilds.values())
+        for name, guild in zip(names, guilds):
+            results.append(await run_scenario(fake, guild, name, args))
+    finally:
+        if proc.returncode is None:
+            proc.terminate()
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=30)
+        except asyncio.TimeoutError:
+            proc.kill()
+        await fake.close()
+
+    print(f"{args.rate:.0f} events/s, {args.latency_ms:.0f}ms REST latency, "
+          f"{args.bucket_limit}/{args.bucket_window:.0f}s buckets, {args.global_limit}/s global, "
+          f"{args.inject_429:.0%} injected 429s")
+    header = f"{'scenario':<14} | {'events':>6} | {'action':<16} | {'count':>5} | {'p50 ms':>8} | {'p99 ms':>8} | " \
+             f"{'REST':>5} | {'429s':>4}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        rows = list(r["actions"].items()) or [("-", {"count": 0, "p50_ms": 0.0, "p99_ms": 0.0})]
+        for i, (kind, a) in enumerate(rows):
+            lead = f"{r['scenario']:<14} | {r['events']:>6}" if i == 0 else f"{'':<14} | {'':>6}"
+            tail = f"{r['rest_calls']:>5} | {sum(r['served_429'].values()):>4}" if i == 0 else f"{'':>5} | {'':>4}"
+            print(f"{lead} | {kind:<16} | {a['count']:>5} | {a['p50_ms']:>8.1f} | {a['p99_ms']:>8.1f} | {tail}")
+    print(f"Bot output: {bot_log}")
+
+    if args.json:
+        report = {
+            "benchmark": "gateway",
+            "revision": git_revision(),
+            "created": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "args": vars(args),
+            "results": results,
+        }
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"Wrote {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_server_args(parser)
+    parser.add_argument("--scenario", choices=["all", *SCENARIOS], default="all")
+    parser.add_argument("--rate", type=float, default=200.0, help="gateway events per second")
+    parser.add_argument("--messages", type=int, default=2000, help="steady_chat messages")
+    parser.add_argument("--spammers", type=int, default=20)
+    parser.add_argument("--burst", type=int, default=10, help="messages per spammer")
+    parser.add_argument("--flood", type=int, default=200, help="invite/mention flood messages")
+    parser.add_argument("--raiders", type=int, default=500)
+    parser.add_argument("--quiet", type=float, help="seconds without REST calls that end a scenario "
+                                                    "(default: one bucket window plus a second)")
+    parser.add_argument("--settle", type=float, default=60.0, help="longest wait for the bot to go quiet")
+    parser.add_argument("--ready-timeout", type=float, default=60.0)
+    parser.add_argument("--bot-log", help="write the bot's output here (default: a temp file)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.set_defaults(port=free_port())
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Time-to-lockdown for the raid lock modes.
+
+Drives `set_raid_lock` against an in-memory guild whose REST calls sleep for
+a configurable latency and share a simple requests-per-second budget, and
+compares it with the old one-channel-at-a-time loop.
+
+    python benchmarks/bench_lockdown.py [--channels 400] [--latency-ms 80] [--rps 50]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import discord  # noqa: E402
+
+from glxbot.security import set_raid_lock  # noqa: E402
+
+
+class FakeREST:
+    def __init__(self, latency: float, rps: float):
+        self.latency = latency
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self.next_slot = 0.0
+        self.calls = 0
+
+    async def call(self):
+        now = time.perf_counter()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + self.interval
+        self.calls += 1
+        await asyncio.sleep((slot - now) + self.latency)
+
+
+class FakeRole:
+    def __init__(self, rest: FakeREST):
+        self.rest = rest
+        self.permissions = discord.Permissions.general()
+        self.permissions.send_messages = True
+
+    async def edit(self, permissions=None, reason=None):
+        await self.rest.call()
+        self.permissions = permissions
+
+
+class FakeChannel:
+    def __init__(self, rest: FakeREST, idx: int):
+        self.rest = rest
+        self.name = f"channel-{idx}"
+        self._overwrites = {}
+
+    def overwrites_for(self, role):
+        return self._overwrites.get(role, discord.PermissionOverwrite())
+
+    async def set_permissions(self, role, overwrite=None, reason=None):
+        await self.rest.call()
+        self._overwrites[role] = overwrite
+
+
+class FakeGuild:
+    def __init__(self, channels: int, rest: FakeREST):
+        self.id = 1
+        self.name = "bench-guild"
+        self.default_role = FakeRole(rest)
+        self.text_channels = [FakeChannel(rest, i) for i in range(channels)]
+
+
+async def legacy_lock(guild):
+    for channel in guild.text_channels:
+        overwrites = channel.overwrites_for(guild.default_role)
+        overwrites.send_messages = False
+        await channel.set_permissions(guild.default_role, overwrite=overwrites)
+
+
+async def run(args):
+    results = []
+    for label, mode in (("legacy sequential", None), ("channels (concurrent)", "channels"), ("role", "role")):
+        rest = FakeREST(args.latency_ms / 1000.0, args.rps)
+        guild = FakeGuild(args.channels, rest)
+        start = time.perf_counter()
+        if mode is None:
+            await legacy_lock(guild)
+        else:
+            await set_raid_lock(guild, True, "bench", mode=mode)
+        results.append((label, time.perf_counter() - start, rest.calls))
+
+    print(f"{args.channels} channels, {args.latency_ms:.0f}ms REST latency, {args.rps:.0f} req/s budget")
+    print(f"{'mode':<22} | {'time-to-lockdown':>16} | {'REST calls':>10}")
+    print("-" * 56)
+    for label, seconds, calls in results:
+        print(f"{label:<22} | {seconds:>14.2f} s | {calls:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--rps", type=float, default=50.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Micro-benchmark: compiled content scanner vs. the old substring loop.
+
+Run from the repository root:
+
+    python benchmarks/bench_scanner.py
+"""
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from glxbot.config import INVITE_PATTERNS  # noqa: E402
+from glxbot.scanner import ContentScanner  # noqa: E402
+
+PATTERN_COUNTS = (10, 1_000, 100_000)
+MESSAGES = 2_000
+WORDS = (
+    "hey", "gg", "anyone", "online", "lol", "raid", "tonight", "check", "this",
+    "out", "join", "server", "new", "update", "patch", "notes", "what", "time",
+    "is", "it", "the", "event", "starting", "soon", "ok", "thanks", "bro",
+)
+
+
+def random_pattern(rng: random.Random) -> str:
+    length = rng.randint(6, 14)
+    return "".join(rng.choice(string.ascii_lowercase + ".-/") for _ in range(length))
+
+
+def build_messages(rng: random.Random, patterns) -> list:
+    messages = []
+    for i in range(MESSAGES):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 30))]
+        if i % 20 == 0:
+            words.insert(rng.randrange(len(words)), rng.choice(patterns))
+        if i % 50 == 0:
+            words.append("discord.gg/" + "".join(rng.choice(string.ascii_letters) for _ in range(8)))
+        messages.append(" ".join(words).capitalize())
+    return messages
+
+
+def bench(fn, messages) -> float:
+    start = time.perf_counter()
+    for m in messages:
+        fn(m)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+
+def main():
+    rng = random.Random(1337)
+    print(f"{'patterns':>9} | {'any() loop':>12} | {'all-hits loop':>13} | {'scanner':>10} | {'compile':>9}")
+    print("-" * 66)
+    for count in PATTERN_COUNTS:
+        keywords = [random_pattern(rng) for _ in range(count - len(INVITE_PATTERNS))]
+        patterns = tuple(INVITE_PATTERNS) + tuple(keywords)
+        messages = build_messages(rng, keywords)
+
+        def any_loop(content, patterns=patterns):
+            content_lower = content.lower()
+            return any(p in content_lower for p in patterns)
+
+        def all_hits_loop(content, patterns=patterns):
+            content_lower = content.lower()
+            return [p for p in patterns if p in content_lower]
+
+        t0 = time.perf_counter()
+        scanner = ContentScanner({"invite": INVITE_PATTERNS, "keyword": keywords})
+        compile_ms = (time.perf_counter() - t0) * 1e3
+
+        for m in messages[:200]:
+            expected = set(all_hits_loop(m))
+            got = {p for hits in scanner.scan(m).values() for p in hits}
+            assert expected == got, (m, expected, got)
+
+        sample = messages if count <= 1_000 else messages[:200]
+        t_any = bench(any_loop, sample)
+        t_all = bench(all_hits_loop, sample)
+        t_scan = bench(scanner.scan, messages)
+        print(
+            f"{count:>9} | {t_any:>9.2f} us | {t_all:>10.2f} us | "
+            f"{t_scan:>7.2f} us | {compile_ms:>6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Startup load and write-behind flush timings for the SQLite state store.
+
+Seeds a fresh database with per-guild counters and settings plus warn rows,
+then times `StateStore.open()` (which loads everything into the in-memory
+maps) and a flush of a burst of hot-path writes.
+
+    python benchmarks/bench_store.py [--guilds 10000] [--warns 1000000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from glxbot.state import BASE_STAT_KEYS, GUILD_STATS  # noqa: E402
+from glxbot.store import SCHEMA, StateStore  # noqa: E402
+from glxbot.discipline import WARNS, record_warn  # noqa: E402
+
+
+def seed(path: str, guilds: int, warns: int):
+    rng = random.Random(7)
+    gids = [10**17 + i for i in range(guilds)]
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(SCHEMA)
+    db.executemany(
+        "INSERT INTO stats VALUES (?, ?, ?)",
+        ((gid, name, rng.randrange(10_000)) for gid in gids for name in BASE_STAT_KEYS),
+    )
+    db.executemany(
+        "INSERT INTO guild_settings VALUES (?, ?, ?)",
+        ((gid, name, value) for gid in gids for name, value in (
+            ("suggestion_channel", gid + 1),
+            ("welcome_channel", gid + 2),
+            ("welcome_message", "Welcome {member} to {server}!"),
+        )),
+    )
+    per_guild = max(warns // guilds, 1)
+    db.executemany(
+        "INSERT INTO warns VALUES (?, ?, ?)",
+        ((gids[i // per_guild % guilds], 10**17 + i, rng.randrange(1, 5)) for i in range(warns)),
+    )
+    db.commit()
+    db.close()
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        t = time.perf_counter()
+        seed(path, args.guilds, args.warns)
+        seed_s = time.perf_counter() - t
+        size_mb = os.path.getsize(path) / 1e6
+
+        store = StateStore(interval=3600)
+        timings = store.open(path)
+
+        print(f"seeded {args.guilds} guilds / {args.warns} warns in {seed_s:.1f}s ({size_mb:.0f} MB)")
+        print(f"{'table':<10} | {'rows':>9} | {'load':>9}")
+        print("-" * 34)
+        print(f"{'stats':<10} | {timings['stats_rows']:>9} | {timings['stats']:>7.2f} s")
+        print(f"{'warns':<10} | {timings['warns_rows']:>9} | {timings['warns']:>7.2f} s")
+        print(f"{'config':<10} | {timings['settings_rows']:>9} | {timings['config']:>7.2f} s")
+        print(f"{'total':<10} | {'':>9} | {timings['total']:>7.2f} s")
+        assert sum(len(g) for g in WARNS.values()) == args.warns
+
+        # Hot path: counter bumps and warns only touch memory...
+        gids = list(GUILD_STATS)
+        n = 100_000
+        t = time.perf_counter()
+        for i in range(n):
+            gid = gids[i % len(gids)]
+            GUILD_STATS[gid]["messages_seen"] += 1
+            if i % 10 == 0:
+                record_warn(gid, i)
+        hot_us = (time.perf_counter() - t) / n * 1e6
+        # ...and the next flush writes the coalesced result in one transaction.
+        pending = store.pending()
+        rows = await store.flush()
+        print(f"\n{n} counter bumps + {n // 10} warns: {hot_us:.2f} us/event in memory")
+        print(f"flush: {pending} pending keys -> {rows} rows in {store.last_flush_ms:.0f} ms")
+        await store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--guilds", type=int, default=10_000)
+    parser.add_argument("--warns", type=int, default=1_000_000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,712 @@
+"""Local stand-in for the Discord gateway and REST API.
+
+Speaks enough of both for `create_bot()` to log in and run against it:
+
+- gateway: HELLO, IDENTIFY (READY + one GUILD_CREATE per guild on the shard),
+  heartbeats, RESUME and member chunk requests, plus the MESSAGE_CREATE,
+  GUILD_MEMBER_ADD and CHANNEL_CREATE events pushed by a load driver
+- REST: the routes GLX uses (login, gateway info, messages, reactions, member
+  timeouts, kicks and bans, channel permissions, role edits, channel creation,
+  AutoMod rules, leaving a guild). Anything else answers 404.
+
+Every REST response carries Discord-style X-RateLimit-* headers. Each route
+bucket allows `bucket_limit` calls per `bucket_window` seconds, and all routes
+share a `global_limit` per second. Going over either answers 429 with a
+`retry_after`. `inject_429` answers that fraction of the remaining calls with
+a 429 as well, and `latency` delays every response.
+
+The fake records when it dispatched each event and when the bot acted on it
+(message delete, member timeout, kick or ban, raid lockdown). This gives
+gateway-to-action latency. `benchmarks/bench_gateway.py` drives it against a
+real bot process.
+
+Point the bot at it with:
+
+    GLX_DISCORD_API_BASE=http://127.0.0.1:8790/api/v10
+    GLX_DISCORD_GATEWAY=ws://127.0.0.1:8790/gateway
+    DISCORD_TOKEN=anything
+
+    python benchmarks/fake_discord.py [--port 8790] [--guilds 4] [--members 200] [--inject-429 0.05]
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from aiohttp import web, WSMsgType
+
+API_PREFIX = "/api/v10"
+DISCORD_EPOCH_MS = 1420070400000
+
+SEND_MESSAGES = 1 << 11
+ADMINISTRATOR = 1 << 3
+DEFAULT_PERMISSIONS = 0x6C0C3FEFF & ~ADMINISTRATOR  # everything a fresh @everyone role has, roughly
+
+OP_DISPATCH, OP_HEARTBEAT, OP_IDENTIFY, OP_PRESENCE, OP_RESUME = 0, 1, 2, 3, 6
+OP_REQUEST_MEMBERS, OP_HELLO, OP_HEARTBEAT_ACK = 8, 10, 11
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def json_response(data, status: int = 200, headers=None) -> web.Response:
+    # discord.py only decodes bodies whose content-type is exactly application/json (no charset).
+    return web.Response(body=json.dumps(data).encode(), status=status, headers=headers,
+                        content_type="application/json")
+
+
+class Snowflakes:
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def next(self) -> int:
+        ms = int(time.time() * 1000) - DISCORD_EPOCH_MS
+        return (ms << 22) | (next(self._counter) & 0x3FFFFF)
+
+
+def user_payload(user_id: int, bot: bool = False) -> dict:
+    return {
+        "id": str(user_id),
+        "username": f"{'bot' if bot else 'user'}{user_id % 100000}",
+        "discriminator": "0",
+        "global_name": None,
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member_payload(user_id: int, roles=(), bot: bool = False) -> dict:
+    return {
+        "user": user_payload(user_id, bot),
+        "roles": [str(r) for r in roles],
+        "joined_at": _now_iso(),
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+        "nick": None,
+        "pending": False,
+        "communication_disabled_until": None,
+    }
+
+
+def role_payload(role_id: int, name: str, permissions: int, position: int = 0) -> dict:
+    return {
+        "id": str(role_id),
+        "name": name,
+        "color": 0,
+        "hoist": False,
+        "position": position,
+        "permissions": str(permissions),
+        "managed": False,
+        "mentionable": False,
+        "flags": 0,
+    }
+
+
+def channel_payload(channel_id: int, guild_id: int, name: str, position: int) -> dict:
+    return {
+        "id": str(channel_id),
+        "type": 0,
+        "guild_id": str(guild_id),
+        "name": name,
+        "position": position,
+        "permission_overwrites": [],
+        "nsfw": False,
+        "parent_id": None,
+        "topic": None,
+        "rate_limit_per_user": 0,
+        "last_message_id": None,
+    }
+
+
+class FakeGuild:
+    def __init__(self, ids: Snowflakes, bot_id: int, members: int, channels: int):
+        self.id = ids.next()
+        self.name = f"fake-{self.id % 100000}"
+        self.owner_id = ids.next()
+        self.bot_role_id = ids.next()
+        self.roles = {
+            self.id: role_payload(self.id, "@everyone", DEFAULT_PERMISSIONS),
+            self.bot_role_id: role_payload(self.bot_role_id, "GLX", ADMINISTRATOR | DEFAULT_PERMISSIONS, 1),
+        }
+        self.channels = {}
+        for i in range(channels):
+            self.add_channel(ids.next(), "general" if i == 0 else f"chat-{i}")
+        self.members = {bot_id: member_payload(bot_id, (self.bot_role_id,), bot=True)}
+        self.members[self.owner_id] = member_payload(self.owner_id)
+        for _ in range(members):
+            uid = ids.next()
+            self.members[uid] = member_payload(uid)
+        self.automod_rules = {}
+
+    def add_channel(self, channel_id: int, name: str) -> dict:
+        data = channel_payload(channel_id, self.id, name, len(self.channels))
+        self.channels[channel_id] = data
+        return data
+
+    @property
+    def general_id(self) -> int:
+        return next(iter(self.channels))
+
+    def humans(self):
+        return [uid for uid, m in self.members.items() if not m["user"]["bot"] and uid != self.owner_id]
+
+    def create_payload(self) -> dict:
+        return {
+            "id": str(self.id),
+            "name": self.name,
+            "icon": None,
+            "owner_id": str(self.owner_id),
+            "roles": list(self.roles.values()),
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "member_count": len(self.members),
+            "members": list(self.members.values()),
+            "channels": list(self.channels.values()),
+            "threads": [],
+            "presences": [],
+            "voice_states": [],
+            "stage_instances": [],
+            "guild_scheduled_events": [],
+            "soundboard_sounds": [],
+            "large": len(self.members) > 250,
+            "unavailable": False,
+            "joined_at": _now_iso(),
+            "verification_level": 0,
+            "default_message_notifications": 0,
+            "explicit_content_filter": 0,
+            "mfa_level": 0,
+            "nsfw_level": 0,
+            "premium_tier": 0,
+            "system_channel_id": None,
+            "preferred_locale": "en-US",
+        }
+
+
+class RateLimits:
+    """Fixed-window route buckets plus a global per-second budget."""
+
+    def __init__(self, bucket_limit: int, bucket_window: float, global_limit: int, inject_429: float,
+                 inject_retry_after: float):
+        self.bucket_limit = bucket_limit
+        self.bucket_window = bucket_window
+        self.global_limit = global_limit
+        self.inject_429 = inject_429
+        self.inject_retry_after = inject_retry_after
+        self._buckets = {}
+        self._global_window = 0
+        self._global_used = 0
+        self.served_429 = Counter()
+
+    def check(self, route: str, major: str):
+        """Return (headers, retry_after, scope); retry_after is None when the call may proceed."""
+        now = time.time()
+        bucket_hash = hashlib.sha1(route.encode()).hexdigest()[:16]
+        key = (bucket_hash, major)
+        reset_at, used = self._buckets.get(key, (0.0, 0))
+        if now >= reset_at:
+            reset_at, used = now + self.bucket_window, 0
+
+        window = int(now)
+        if window != self._global_window:
+            self._global_window, self._global_used = window, 0
+
+        if self.global_limit and self._global_used >= self.global_limit:
+            self.served_429["global"] += 1
+            return {"X-RateLimit-Global": "true", "X-RateLimit-Scope": "global"}, window + 1 - now, "global"
+        self._global_used += 1
+
+        if used >= self.bucket_limit:
+            retry_after, scope = reset_at - now, "user"
+        elif self.inject_429 and random.random() < self.inject_429:
+            retry_after, scope = self.inject_retry_after, "shared"
+        else:
+            used += 1
+            retry_after, scope = None, None
+        self._buckets[key] = (reset_at, used)
+
+        headers = {
+            "X-RateLimit-Bucket": bucket_hash,
+            "X-RateLimit-Limit": str(self.bucket_limit),
+            "X-RateLimit-Remaining": str(max(self.bucket_limit - used, 0)),
+            "X-RateLimit-Reset": f"{reset_at:.3f}",
+            "X-RateLimit-Reset-After": f"{max(reset_at - now, 0):.3f}",
+        }
+        if scope:
+            self.served_429[scope] += 1
+            headers["X-RateLimit-Scope"] = scope
+        return headers, retry_after, scope
+
+
+class GatewaySession:
+    def __init__(self, ws: web.WebSocketResponse, session_id: str):
+        self.ws = ws
+        self.session_id = session_id
+        self.shard = (0, 1)
+        self.seq = 0
+
+    def owns(self, guild_id: int) -> bool:
+        shard_id, shard_count = self.shard
+        return (guild_id >> 22) % shard_count == shard_id
+
+    async def dispatch(self, event: str, data: dict):
+        self.seq += 1
+        await self.ws.send_str(json.dumps({"op": OP_DISPATCH, "t": event, "s": self.seq, "d": data}))
+
+
+class FakeDiscord:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8790,
+        guilds: int = 4,
+        members: int = 200,
+        channels: int = 5,
+        shards: int = 1,
+        latency: float = 0.0,
+        bucket_limit: int = 5,
+        bucket_window: float = 5.0,
+        global_limit: int = 50,
+        inject_429: float = 0.0,
+        inject_retry_after: float = 1.0,
+        heartbeat_interval: float = 41.25,
+    ):
+        self.host = host
+        self.port = port
+        self.shards = shards
+        self.latency = latency
+        self.heartbeat_interval = heartbeat_interval
+        self.rate_limits = RateLimits(bucket_limit, bucket_window, global_limit, inject_429, inject_retry_after)
+        self.ids = Snowflakes()
+        self.bot_id = self.ids.next()
+        self.owner_id = self.ids.next()
+        self.guilds = {}
+        for _ in range(guilds):
+            g = FakeGuild(self.ids, self.bot_id, members, channels)
+            self.guilds[g.id] = g
+        self.channel_guild = {cid: g for g in self.guilds.values() for cid in g.channels}
+
+        self.sessions = []
+        self.ready = asyncio.Event()  # set on the bot's first presence update (sent from on_ready)
+        self.rest_calls = Counter()
+        self.rest_seconds = defaultdict(float)
+        # Gateway-to-action bookkeeping, all on time.perf_counter().
+        self.message_sent_at = {}
+        self.user_event_at = {}
+        self.raid_started_at = {}
+        self.actions = defaultdict(list)
+        self.last_rest_at = time.perf_counter()
+        self._runner = None
+
+    # ---- lifecycle ---------------------------------------------------------
+
+    @property
+    def api_base(self) -> str:
+        return f"http://{self.host}:{self.port}{API_PREFIX}"
+
+    @property
+    def gateway_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/gateway"
+
+    def bot_env(self) -> dict:
+        return {
+            "GLX_DISCORD_API_BASE": self.api_base,
+            "GLX_DISCORD_GATEWAY": self.gateway_url,
+            "DISCORD_TOKEN": "fake-token",
+        }
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._rest_middleware])
+        app.router.add_get("/gateway", self.gateway)
+        r = app.router
+        p = API_PREFIX
+        r.add_get(p + "/gateway", self.get_gateway)
+        r.add_get(p + "/gateway/bot", self.get_gateway)
+        r.add_get(p + "/users/@me", self.get_me)
+        r.add_get(p + "/oauth2/applications/@me", self.get_application)
+        r.add_delete(p + "/users/@me/guilds/{guild_id}", self.leave_guild)
+        r.add_post(p + "/channels/{channel_id}/messages", self.send_message)
+        r.add_delete(p + "/channels/{channel_id}/messages/{message_id}", self.delete_message)
+        r.add_put(p + "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me", self.no_content)
+        r.add_put(p + "/channels/{channel_id}/permissions/{target_id}", self.set_permissions)
+        r.add_delete(p + "/channels/{channel_id}/permissions/{target_id}", self.no_content)
+        r.add_post(p + "/guilds/{guild_id}/channels", self.create_channel)
+        r.add_patch(p + "/guilds/{guild_id}/members/{user_id}", self.edit_member)
+        r.add_delete(p + "/guilds/{guild_id}/members/{user_id}", self.kick_member)
+        r.add_put(p + "/guilds/{guild_id}/bans/{user_id}", self.ban_member)
+        r.add_patch(p + "/guilds/{guild_id}/roles/{role_id}", self.edit_role)
+        r.add_get(p + "/guilds/{guild_id}/auto-moderation/rules", self.list_rules)
+        r.add_post(p + "/guilds/{guild_id}/auto-moderation/rules", self.create_rule)
+        r.add_patch(p + "/guilds/{guild_id}/auto-moderation/rules/{rule_id}", self.edit_rule)
+        r.add_delete(p + "/guilds/{guild_id}/auto-moderation/rules/{rule_id}", self.delete_rule)
+        r.add_route("*", p + "/{tail:.*}", self.not_found)
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def close(self):
+        for session in list(self.sessions):
+            await session.ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # ---- gateway -----------------------------------------------------------
+
+    async def gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        session = GatewaySession(ws, hashlib.sha1(str(self.ids.next()).encode()).hexdigest())
+        await ws.send_str(json.dumps({"op": OP_HELLO, "d": {"heartbeat_interval": int(self.heartbeat_interval * 1000)}}))
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                payload = json.loads(msg.data)
+                op, data = payload.get("op"), payload.get("d")
+                if op == OP_HEARTBEAT:
+                    await ws.send_str(json.dumps({"op": OP_HEARTBEAT_ACK}))
+                elif op == OP_IDENTIFY:
+                    session.shard = tuple(data.get("shard") or (0, 1))
+                    self.sessions.append(session)
+                    await self._identify(session)
+                elif op == OP_RESUME:
+                    session.session_id = data.get("session_id", session.session_id)
+                    session.seq = data.get("seq") or 0
+                    self.sessions.append(session)
+                    await session.dispatch("RESUMED", {})
+                elif op == OP_REQUEST_MEMBERS:
+                    guild = self.guilds.get(int(data["guild_id"]))
+                    if guild is not None:
+                        await session.dispatch("GUILD_MEMBERS_CHUNK", {
+                            "guild_id": str(guild.id),
+                            "members": list(guild.members.values()),
+                            "chunk_index": 0,
+                            "chunk_count": 1,
+                            "nonce": data.get("nonce"),
+                        })
+                elif op == OP_PRESENCE:
+                    self.ready.set()
+        finally:
+            if session in self.sessions:
+                self.sessions.remove(session)
+        return ws
+
+    async def _identify(self, session: GatewaySession):
+        guilds = [g for g in self.guilds.values() if session.owns(g.id)]
+        await session.dispatch("READY", {
+            "v": 10,
+            "user": user_payload(self.bot_id, bot=True),
+            "guilds": [{"id": str(g.id), "unavailable": True} for g in guilds],
+            "session_id": session.session_id,
+            "resume_gateway_url": self.gateway_url,
+            "shard": list(session.shard),
+            "application": {"id": str(self.bot_id), "flags": 0},
+        })
+        for g in guilds:
+            await session.dispatch("GUILD_CREATE", g.create_payload())
+
+    async def _dispatch(self, guild_id: int, event: str, data: dict):
+        for session in self.sessions:
+            if session.owns(guild_id):
+                await session.dispatch(event, data)
+
+    # ---- load driver API ---------------------------------------------------
+
+    async def message_create(self, guild: FakeGuild, author_id: int, content: str, mentions=()) -> int:
+        message_id = self.ids.next()
+        member = dict(guild.members[author_id])
+        author = member.pop("user")
+        data = {
+            "id": str(message_id),
+            "channel_id": str(guild.general_id),
+            "guild_id": str(guild.id),
+            "author": author,
+            "member": member,
+            "content": content,
+            "timestamp": _now_iso(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [
+                {**guild.members[uid]["user"], "member": {k: v for k, v in guild.members[uid].items() if k != "user"}}
+                for uid in mentions
+            ],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        }
+        now = time.perf_counter()
+        self.message_sent_at[message_id] = now
+        self.user_event_at[author_id] = now
+        await self._dispatch(guild.id, "MESSAGE_CREATE", data)
+        return message_id
+
+    async def member_add(self, guild: FakeGuild) -> int:
+        user_id = self.ids.next()
+        guild.members[user_id] = member_payload(user_id)
+        now = time.perf_counter()
+        self.user_event_at[user_id] = now
+        self.raid_started_at.setdefault(guild.id, now)
+        await self._dispatch(guild.id, "GUILD_MEMBER_ADD", {**guild.members[user_id], "guild_id": str(guild.id)})
+        return user_id
+
+    def _action(self, kind: str, started):
+        if started is not None:
+            self.actions[kind].append(time.perf_counter() - started)
+
+    # ---- REST --------------------------------------------------------------
+
+    @web.middleware
+    async def _rest_middleware(self, request: web.Request, handler):
+        if not request.path.startswith(API_PREFIX):
+            return await handler(request)
+        resource = request.match_info.route.resource
+        template = resource.canonical[len(API_PREFIX):] if resource is not None else request.path
+        route = f"{request.method} {template}"
+        major = request.match_info.get("channel_id") or request.match_info.get("guild_id") or ""
+        start = time.perf_counter()
+        self.rest_calls[route] += 1
+        self.last_rest_at = start
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        headers, retry_after, scope = self.rate_limits.check(route, major)
+        if retry_after is not None:
+            headers.update({"Retry-After": f"{retry_after:.3f}", "Via": "1.1 google"})
+            body = {"message": "You are being rate limited.", "retry_after": round(retry_after, 3),
+                    "global": scope == "global"}
+            response = json_response(body, status=429, headers=headers)
+        else:
+            response = await handler(request)
+            response.headers.update(headers)
+        self.rest_seconds[route] += time.perf_counter() - start
+        return response
+
+    @staticmethod
+    def no_content(request: web.Request) -> web.Response:
+        return web.Response(status=204)
+
+    @staticmethod
+    async def not_found(request: web.Request) -> web.Response:
+        return json_response({"message": "404: Not Found", "code": 0}, status=404)
+
+    def _guild(self, request: web.Request) -> FakeGuild:
+        guild = self.guilds.get(int(request.match_info["guild_id"]))
+        if guild is None:
+            raise web.HTTPNotFound(body=json.dumps({"message": "Unknown Guild", "code": 10004}).encode(),
+                                   content_type="application/json")
+        return guild
+
+    async def get_gateway(self, request: web.Request) -> web.Response:
+        return json_response({
+            "url": self.gateway_url,
+            "shards": self.shards,
+            "session_start_limit": {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1},
+        })
+
+    async def get_me(self, request: web.Request) -> web.Response:
+        return json_response(user_payload(self.bot_id, bot=True))
+
+    async def get_application(self, request: web.Request) -> web.Response:
+        return json_response({
+            "id": str(self.bot_id),
+            "name": "GLX Fake",
+            "description": "",
+            "icon": None,
+            "rpc_origins": [],
+            "bot_public": True,
+            "bot_require_code_grant": False,
+            "owner": user_payload(self.owner_id),
+            "team": None,
+            "verify_key": "0" * 64,
+            "flags": 0,
+            "summary": "",
+        })
+
+    async def leave_guild(self, request: web.Request) -> web.Response:
+        guild = self.guilds.pop(int(request.match_info["guild_id"]), None)
+        if guild is not None:
+            await self._dispatch(guild.id, "GUILD_DELETE", {"id": str(guild.id)})
+        return web.Response(status=204)
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        channel_id = int(request.match_info["channel_id"])
+        body = await request.json() if request.content_type == "application/json" else {}
+        return json_response({
+            "id": str(self.ids.next()),
+            "channel_id": str(channel_id),
+            "author": user_payload(self.bot_id, bot=True),
+            "content": body.get("content") or "",
+            "timestamp": _now_iso(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": body.get("embeds") or [],
+            "pinned": False,
+            "type": 0,
+        })
+
+    async def delete_message(self, request: web.Request) -> web.Response:
+        self._action("delete", self.message_sent_at.pop(int(request.match_info["message_id"]), None))
+        return web.Response(status=204)
+
+    async def set_permissions(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        guild = self.channel_guild.get(int(request.match_info["channel_id"]))
+        if guild is not None and int(request.match_info["target_id"]) == guild.id \
+                and int(body.get("deny") or 0) & SEND_MESSAGES:
+            self._action("lockdown_channel", self.raid_started_at.get(guild.id))
+        return web.Response(status=204)
+
+    async def create_channel(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        body = await request.json()
+        data = guild.add_channel(self.ids.next(), body.get("name", "channel"))
+        self.channel_guild[int(data["id"])] = guild
+        await self._dispatch(guild.id, "CHANNEL_CREATE", data)
+        return json_response(data)
+
+    async def edit_member(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        user_id = int(request.match_info["user_id"])
+        member = guild.members.get(user_id)
+        if member is None:
+            return json_response({"message": "Unknown Member", "code": 10007}, status=404)
+        body = await request.json()
+        if "communication_disabled_until" in body:
+            member["communication_disabled_until"] = body["communication_disabled_until"]
+            if body["communication_disabled_until"]:
+                self._action("timeout", self.user_event_at.get(user_id))
+        return json_response({**member, "guild_id": str(guild.id)})
+
+    async def kick_member(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        user_id = int(request.match_info["user_id"])
+        guild.members.pop(user_id, None)
+        self._action("kick", self.user_event_at.get(user_id))
+        return web.Response(status=204)
+
+    async def ban_member(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        user_id = int(request.match_info["user_id"])
+        guild.members.pop(user_id, None)
+        self._action("ban", self.user_event_at.get(user_id))
+        return web.Response(status=204)
+
+    async def edit_role(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        role = guild.roles.get(int(request.match_info["role_id"]))
+        if role is None:
+            return json_response({"message": "Unknown Role", "code": 10011}, status=404)
+        body = await request.json()
+        if "permissions" in body:
+            was_open = int(role["permissions"]) & SEND_MESSAGES
+            role["permissions"] = str(body["permissions"])
+            if role["id"] == str(guild.id) and was_open and not int(body["permissions"]) & SEND_MESSAGES:
+                self._action("lockdown_role", self.raid_started_at.get(guild.id))
+        return json_response(role)
+
+    async def list_rules(self, request: web.Request) -> web.Response:
+        return json_response(list(self._guild(request).automod_rules.values()))
+
+    async def create_rule(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        body = await request.json()
+        rule_id = self.ids.next()
+        rule = {
+            "id": str(rule_id),
+            "guild_id": str(guild.id),
+            "creator_id": str(self.bot_id),
+            "exempt_roles": [],
+            "exempt_channels": [],
+            "trigger_metadata": {},
+            "actions": [],
+            "enabled": True,
+            **body,
+        }
+        guild.automod_rules[rule_id] = rule
+        return json_response(rule)
+
+    async def edit_rule(self, request: web.Request) -> web.Response:
+        guild = self._guild(request)
+        rule = guild.automod_rules.get(int(request.match_info["rule_id"]))
+        if rule is None:
+            return json_response({"message": "Unknown auto moderation rule", "code": 10066}, status=404)
+        rule.update(await request.json())
+        return json_response(rule)
+
+    async def delete_rule(self, request: web.Request) -> web.Response:
+        self._guild(request).automod_rules.pop(int(request.match_info["rule_id"]), None)
+        return web.Response(status=204)
+
+
+def add_server_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--guilds", type=int, default=4)
+    parser.add_argument("--members", type=int, default=200, help="members per guild")
+    parser.add_argument("--channels", type=int, default=5, help="text channels per guild")
+    parser.add_argument("--shards", type=int, default=1, help="shard count reported by /gateway/bot")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every REST response")
+    parser.add_argument("--bucket-limit", type=int, default=5)
+    parser.add_argument("--bucket-window", type=float, default=5.0)
+    parser.add_argument("--global-limit", type=int, default=50, help="REST calls per second, 0 for none")
+    parser.add_argument("--inject-429", type=float, default=0.0, help="fraction of calls answered 429")
+    parser.add_argument("--inject-retry-after", type=float, default=1.0)
+
+
+def server_from_args(args) -> FakeDiscord:
+    return FakeDiscord(
+        host=args.host,
+        port=args.port,
+        guilds=args.guilds,
+        members=args.members,
+        channels=args.channels,
+        shards=args.shards,
+        latency=args.latency_ms / 1000.0,
+        bucket_limit=args.bucket_limit,
+        bucket_window=args.bucket_window,
+        global_limit=args.global_limit,
+        inject_429=args.inject_429,
+        inject_retry_after=args.inject_retry_after,
+    )
+
+
+async def serve(args):
+    fake = server_from_args(args)
+    await fake.start()
+    print(f"Fake Discord on {fake.api_base} / {fake.gateway_url} with {len(fake.guilds)} guild(s).")
+    for key, value in fake.bot_env().items():
+        print(f"  {key}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_server_args(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
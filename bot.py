@@ -1,5 +1,9 @@
 import asyncio
+import multiprocessing
+import secrets
+import signal
 
+import discord
 from aiohttp import web
 
 try:
@@ -10,28 +14,161 @@ except ImportError:
 
 load_dotenv()
 
-from glxbot.config import DISCORD_TOKEN, GLX_WEB_HOST, GLX_WEB_PORT
+from glxbot.config import (
+    DISCORD_TOKEN,
+    GLX_WEB_HOST,
+    GLX_WEB_PORT,
+    SHARD_COUNT,
+    SHARD_WORKERS,
+    WEB_PROCESS,
+    COORDINATOR_HOST,
+    COORDINATOR_PORT,
+)
 from glxbot.state import log
-from glxbot.core import create_bot
+from glxbot.store import open_state_store, state_store
+from glxbot.cases import open_case_journal, case_journal
+from glxbot.core import create_bot, apply_endpoint_overrides
+from glxbot.shards import plan_shards, shard_link, ShardCoordinator
+from glxbot.metrics import loop_lag
 from glxweb.app import create_web_app
+from glxweb.sources import LocalSource, ClusterSource
 
+# Discord allows one IDENTIFY per 5 seconds per bucket; worker starts are spaced by this per shard.
+IDENTIFY_SECONDS = 5
+WORKER_RESTART_SECONDS = 10
 
-async def main():
+
+def _check_token():
     if not DISCORD_TOKEN or DISCORD_TOKEN == "PUT_YOUR_BOT_TOKEN_HERE":
         raise SystemExit("Please set DISCORD_TOKEN in environment or .env")
 
-    bot = create_bot()
-    app = create_web_app(bot)
 
+async def start_web(source) -> web.AppRunner:
+    app = create_web_app(source)
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, GLX_WEB_HOST, GLX_WEB_PORT)
     await site.start()
     log.info("[GLX] Web dashboard running at http://%s:%s", GLX_WEB_HOST, GLX_WEB_PORT)
+    return runner
+
+
+async def recommended_shard_count() -> int:
+    apply_endpoint_overrides()
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(DISCORD_TOKEN)
+        shards, _, _ = await http.get_bot_gateway()
+    finally:
+        await http.close()
+    return shards
+
+
+async def main():
+    """Single process: one bot (auto-sharded if GLX_SHARD_COUNT is set) plus the dashboard."""
+    _check_token()
+    open_state_store()
+    open_case_journal()
+    if SHARD_COUNT == "auto":
+        bot = create_bot(sharded=True)
+    elif SHARD_COUNT not in ("", "0"):
+        bot = create_bot(shard_count=int(SHARD_COUNT))
+    else:
+        bot = create_bot()
+    await start_web(LocalSource(bot))
+
+    async with bot:
+        await bot.start(DISCORD_TOKEN)
+
 
+# ---- multi-process --------------------------------------------------------
+
+
+async def _worker_main(worker_id: int, shard_ids, shard_count: int, sharded: bool, secret: str):
+    shard_link.configure(worker_id, shard_ids, shard_count, secret)
+    open_state_store(owns=shard_link.owns)
+    if sharded:
+        bot = create_bot(shard_count=shard_count, shard_ids=shard_ids)
+    else:
+        bot = create_bot()
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, lambda: loop.create_task(bot.close()))
+    except NotImplementedError:
+        pass
     async with bot:
         await bot.start(DISCORD_TOKEN)
 
 
+def run_worker(worker_id: int, shard_ids, shard_count: int, sharded: bool = True, secret: str = ""):
+    """Entry point of a bot worker process."""
+    asyncio.run(_worker_main(worker_id, shard_ids, shard_count, sharded, secret))
+
+
+async def cluster_main():
+    """Coordinator + dashboard in this process; the bot runs in worker process(es).
+
+    Used for GLX_SHARD_WORKERS > 1, and with GLX_WEB_PROCESS=true for a
+    single bot process that never serves dashboard requests itself.
+    """
+    _check_token()
+    sharded = SHARD_WORKERS > 1 or SHARD_COUNT not in ("", "0")
+    if not sharded:
+        shard_count = 1
+    elif SHARD_COUNT in ("", "0", "auto"):
+        shard_count = await recommended_shard_count()
+    else:
+        shard_count = int(SHARD_COUNT)
+    plan = plan_shards(shard_count, SHARD_WORKERS)
+    log.info("[GLX] Running %d shard(s) over %d worker process(es).", shard_count, len(plan))
+
+    # This process keeps the global counters, web keys and feature defaults,
+    # and is the only writer of the case journal.
+    open_state_store(owns=lambda gid: gid == 0)
+    open_case_journal()
+    case_journal.start()
+    loop_lag.start()
+    # Workers prove they were spawned by this process; the secret never leaves it except via Process args.
+    secret = secrets.token_hex(32)
+    coordinator = ShardCoordinator(COORDINATOR_HOST, COORDINATOR_PORT, secret)
+    await coordinator.start(state_store.loaded_global)
+    runner = await start_web(ClusterSource(coordinator))
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = {}
+
+    def spawn(worker_id: int):
+        proc = ctx.Process(
+            target=run_worker,
+            args=(worker_id, plan[worker_id], shard_count, sharded, secret),
+            name=f"glx-worker-{worker_id}",
+        )
+        proc.start()
+        procs[worker_id] = proc
+        log.info("[GLX] Started shard worker %d (pid %s) for shards %s.", worker_id, proc.pid, plan[worker_id])
+
+    try:
+        for worker_id in range(len(plan)):
+            spawn(worker_id)
+            await asyncio.sleep(IDENTIFY_SECONDS * len(plan[worker_id]))
+        while True:
+            await asyncio.sleep(WORKER_RESTART_SECONDS)
+            for worker_id, proc in list(procs.items()):
+                if not proc.is_alive():
+                    log.warning("[GLX] Shard worker %d exited with code %s; restarting.", worker_id, proc.exitcode)
+                    spawn(worker_id)
+    finally:
+        for proc in procs.values():
+            if proc.is_alive():
+                proc.terminate()
+        for proc in procs.values():
+            await asyncio.to_thread(proc.join, 30)
+        await coordinator.close()
+        await loop_lag.close()
+        await runner.cleanup()
+        await case_journal.close()
+        await state_store.close()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(cluster_main() if SHARD_WORKERS > 1 or WEB_PROCESS else main())
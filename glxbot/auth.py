@@ -5,6 +5,7 @@ from typing import Dict, Any, Optional
 from .state import log
 from .config import OWNER_ID
 from .security import human_delta
+from .store import state_store
 
 
 def normalize_code(s: str) -> str:
@@ -59,6 +60,7 @@ def create_user_key(guild, author, pattern: Optional[str] = None) -> Dict[str, A
         "created_at": datetime.utcnow(),
     }
     ACCESS_KEYS[norm] = rec
+    state_store.save_access_key(norm, rec)
     log.info("[GLX] Generated USER web key for %s in guild %s", author, guild.name)
     return rec
 
@@ -101,6 +103,7 @@ def create_admin_key(author, pattern: Optional[str] = None) -> Dict[str, Any]:
         "created_at": datetime.utcnow(),
     }
     ACCESS_KEYS[norm] = rec
+    state_store.save_access_key(norm, rec)
     log.info("[GLX] Generated ADMIN web key for %s", author)
     return rec
 
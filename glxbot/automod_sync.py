@@ -1,179 +1,405 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
 import discord
 
 from .config import (
     AUTOMOD_MAX_RULES,
     AUTOMOD_KEYWORD_RULES,
     AUTOMOD_MENTION_LIMIT,
+    AUTOMOD_SYNC_CONCURRENCY,
+    BLOCKED_KEYWORDS,
+    BLOCKED_LINK_PATTERNS,
 )
 from .state import STATS, log, AUTOMOD_CAPACITY_WARNED_GUILDS
 from .security import log_event, get_log_channel
+from .settings import guild_settings
+from .jobs import Job, job_scheduler
+from .rest import rest_scheduler, PRIORITY_LOG
 
+RULE_PREFIX = "GLX-"
 
-async def sync_automod(bot: discord.Client, guild: discord.Guild, features: dict):
-    """Synchronize GLX's AutoMod rules with Discord's native AutoMod.
+# Discord's own caps: one spam/preset/mention rule per guild, six keyword
+# rules, 1000 keywords of at most 60 characters per rule.
+KEYWORD_TRIGGER = 1
+SPAM_TRIGGER = 3
+PRESET_TRIGGER = 4
+MENTION_TRIGGER = 5
+SINGLETON_TRIGGERS = (SPAM_TRIGGER, PRESET_TRIGGER, MENTION_TRIGGER)
+MAX_KEYWORD_RULES = 6
+MAX_KEYWORDS_PER_RULE = 1000
+MAX_KEYWORD_LENGTH = 60
 
-    Very defensive to avoid spam: if limits are reached we log ONCE per guild
-    then stay silent afterwards (no console spam).
+_CAPACITY_ERRORS = ("AUTO_MODERATION_MAX_RULES_OF_TYPE_EXCEEDED", "MAX_AUTO_MODERATION_RULES")
+
+
+def automod_keywords() -> List[str]:
+    """The configured content patterns as AutoMod wildcard keywords.
+
+    `*pattern*` gives AutoMod the same substring match the in-bot content
+    scanner uses. Patterns over Discord's length limit are skipped.
     """
-    if not features.get("automod", True):
-        log.info("[GLX] AutoMod disabled by config; skipping for %s", guild.name)
-        return
+    out: Dict[str, None] = {}
+    for pattern in BLOCKED_KEYWORDS + BLOCKED_LINK_PATTERNS:
+        keyword = f"*{pattern}*"
+        if len(keyword) <= MAX_KEYWORD_LENGTH:
+            out[keyword] = None
+    return list(out)
 
-    http = getattr(bot, "http", None)
-    if http is None:
-        log.warning("[GLX] HTTP client not available; cannot sync AutoMod for %s", guild.name)
-        return
 
-    get_rules = getattr(http, "get_auto_moderation_rules", None)
-    create_rule = getattr(http, "create_auto_moderation_rule", None)
+def desired_rules(features, log_channel_id: Optional[int]) -> Dict[str, Dict[str, Any]]:
+    """Rule name -> create payload for everything GLX should own in a guild."""
+    actions: List[Dict[str, Any]] = [
+        {"type": 1, "metadata": {"custom_message": "GLX Protection blocked this message."}},
+    ]
+    if log_channel_id is not None:
+        actions.append({"type": 2, "metadata": {"channel_id": str(log_channel_id)}})
+
+    def rule(trigger_type: int, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "event_type": 1,
+            "trigger_type": trigger_type,
+            "trigger_metadata": metadata,
+            "actions": actions,
+            "enabled": True,
+        }
+
+    rules = {
+        "GLX-SPAM": rule(SPAM_TRIGGER, {}),
+        "GLX-MENTION-SPAM": rule(MENTION_TRIGGER, {"mention_total_limit": AUTOMOD_MENTION_LIMIT}),
+        "GLX-PRESETS": rule(PRESET_TRIGGER, {"presets": [1, 2, 3], "allow_list": []}),
+    }
+    if features.get("content_filter", True):
+        keywords = automod_keywords()
+        max_rules = min(AUTOMOD_KEYWORD_RULES, MAX_KEYWORD_RULES)
+        for i in range(min(max_rules, -(-len(keywords) // MAX_KEYWORDS_PER_RULE))):
+            chunk = keywords[i * MAX_KEYWORDS_PER_RULE:(i + 1) * MAX_KEYWORDS_PER_RULE]
+            rules[f"GLX-KW-{i + 1}"] = rule(KEYWORD_TRIGGER, {"keyword_filter": chunk})
+    return rules
 
-    if create_rule is None:
-        log.warning("[GLX] AutoMod HTTP methods not available; cannot sync AutoMod for %s", guild.name)
-        return
 
-    existing_data = []
-    if get_rules is not None:
+def _signature(data: Dict[str, Any]) -> Tuple:
+    """Comparable form of the rule fields GLX manages.
+
+    Works on both REST payloads and `AutoModRule.to_dict()`. Exempt roles and
+    channels are left out so moderators can add exemptions by hand.
+    """
+    trigger_type = int(data.get("trigger_type") or 0)
+    meta = data.get("trigger_metadata") or {}
+    if trigger_type == KEYWORD_TRIGGER:
+        meta_sig = (
+            tuple(sorted(meta.get("keyword_filter") or ())),
+            tuple(sorted(meta.get("regex_patterns") or ())),
+            tuple(sorted(meta.get("allow_list") or ())),
+        )
+    elif trigger_type == PRESET_TRIGGER:
+        meta_sig = (tuple(sorted(meta.get("presets") or ())), tuple(sorted(meta.get("allow_list") or ())))
+    elif trigger_type == MENTION_TRIGGER:
+        meta_sig = (int(meta.get("mention_total_limit") or 0), bool(meta.get("mention_raid_protection_enabled")))
+    else:
+        meta_sig = ()
+    actions = tuple(sorted(
+        (
+            int(a.get("type") or 0),
+            str((a.get("metadata") or {}).get("channel_id") or ""),
+            (a.get("metadata") or {}).get("custom_message") or "",
+            int((a.get("metadata") or {}).get("duration_seconds") or 0),
+        )
+        for a in data.get("actions") or ()
+    ))
+    return (int(data.get("event_type") or 0), trigger_type, meta_sig, actions, bool(data.get("enabled")))
+
+
+class AutoModRuleCache:
+    """Last known AutoMod rules per guild, as raw rule payloads.
+
+    Filled by one REST fetch per guild, then kept current from the
+    AUTO_MODERATION_RULE_* gateway events and from our own REST responses,
+    so a resync does not need to list the rules again.
+    """
+
+    def __init__(self):
+        self._rules: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self.fetches = 0
+
+    def get(self, guild_id: int) -> Optional[Dict[int, Dict[str, Any]]]:
+        return self._rules.get(guild_id)
+
+    def fill(self, guild_id: int, rules: List[Dict[str, Any]]):
+        self._rules[guild_id] = {int(r["id"]): r for r in rules if isinstance(r, dict) and "id" in r}
+        self.fetches += 1
+
+    def put(self, guild_id: int, data: Dict[str, Any]):
+        """Store a created/updated rule; ignored until the guild has been fetched."""
+        rules = self._rules.get(guild_id)
+        if rules is not None and isinstance(data, dict) and "id" in data:
+            rules[int(data["id"])] = data
+
+    def remove(self, guild_id: int, rule_id: int):
+        rules = self._rules.get(guild_id)
+        if rules is not None:
+            rules.pop(int(rule_id), None)
+
+    def forget(self, guild_id: int):
+        self._rules.pop(guild_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "guilds_cached": len(self._rules),
+            "rules_cached": sum(len(r) for r in self._rules.values()),
+            "fetches": self.fetches,
+        }
+
+
+class AutoModReconciler:
+    """Brings each guild's GLX AutoMod rules to the desired state.
+
+    The desired rule set is diffed against the cached rules by name, and only
+    the needed create, edit and delete calls are made. Calls for all guilds
+    share one semaphore, so a full resync never has more than `concurrency`
+    AutoMod requests in flight. Rules not named `GLX-*` are never touched.
+    """
+
+    def __init__(self, concurrency: int):
+        self.cache = AutoModRuleCache()
+        self.concurrency = max(1, int(concurrency))
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._guild_locks: Dict[int, asyncio.Lock] = {}
+        self.syncs = 0
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        return self._sem
+
+    async def _call(self, coro_fn, guild_id: int, *args, **kwargs):
+        async with self._semaphore():
+            return await rest_scheduler.call(PRIORITY_LOG, guild_id, lambda: coro_fn(guild_id, *args, **kwargs))
+
+    async def _rules_for(self, http, guild: discord.Guild) -> Optional[Dict[int, Dict[str, Any]]]:
+        rules = self.cache.get(guild.id)
+        if rules is not None:
+            return rules
         try:
-            existing_data = await get_rules(guild.id)
+            data = await self._call(http.get_auto_moderation_rules, guild.id)
         except Exception as e:
             log.warning("[GLX] Failed to fetch AutoMod rules in %s: %s", guild.name, e)
+            return None
+        self.cache.fill(guild.id, data if isinstance(data, list) else [])
+        return self.cache.get(guild.id)
 
-    existing_names = set()
-    current_count = 0
-    if isinstance(existing_data, list):
-        current_count = len(existing_data)
-        for r in existing_data:
-            name = None
-            if isinstance(r, dict):
-                name = r.get("name")
-            else:
-                name = getattr(r, "name", None)
-            if isinstance(name, str):
-                existing_names.add(name)
-
-    limit = AUTOMOD_MAX_RULES
-    if current_count >= limit:
+    def _capacity_reached(self, guild: discord.Guild, detail: str):
         if guild.id not in AUTOMOD_CAPACITY_WARNED_GUILDS:
             AUTOMOD_CAPACITY_WARNED_GUILDS.add(guild.id)
-            log.info(
-                "[GLX] AutoMod rule count already at limit (%s) for %s; no additional GLX rules will be created.",
-                limit,
-                guild.name,
-            )
-        return
+            log.info("[GLX] AutoMod %s in %s; further GLX rules will be skipped.", detail, guild.name)
 
-    log_channel = await get_log_channel(guild)
-    log_channel_id = log_channel.id if log_channel else None
+    def forget(self, guild_id: int):
+        self.cache.forget(guild_id)
+        self._guild_locks.pop(guild_id, None)
 
-    base_actions = [
-        {
-            "type": 1,
-            "metadata": {
-                "custom_message": "GLX Protection blocked this message."
-            },
-        }
-    ]
-    if log_channel_id is not None:
-        base_actions.append(
-            {
-                "type": 2,
-                "metadata": {"channel_id": log_channel_id},
-            }
-        )
+    async def sync(self, bot: discord.Client, guild: discord.Guild, features) -> Dict[str, int]:
+        """Reconcile one guild. Returns counts of created/updated/deleted/unchanged rules."""
+        lock = self._guild_locks.get(guild.id)
+        if lock is None:
+            lock = self._guild_locks[guild.id] = asyncio.Lock()
+        # Two overlapping syncs of one guild would both see a rule as missing.
+        async with lock:
+            return await self._sync(bot, guild, features)
 
-    created = 0
+    async def _sync(self, bot: discord.Client, guild: discord.Guild, features) -> Dict[str, int]:
+        result = {"created": 0, "updated": 0, "deleted": 0, "unchanged": 0, "failed": 0}
+        if not features.get("automod", True):
+            log.info("[GLX] AutoMod disabled by config; skipping for %s", guild.name)
+            return result
 
-    async def create_if_missing(name, trigger_type, trigger_metadata):
-        nonlocal current_count, created
-        if current_count >= limit:
-            return
-        if name in existing_names:
-            return
+        http = getattr(bot, "http", None)
+        if http is None or getattr(http, "create_auto_moderation_rule", None) is None:
+            log.warning("[GLX] AutoMod HTTP methods not available; cannot sync AutoMod for %s", guild.name)
+            return result
 
-        payload = {
-            "name": name,
-            "event_type": 1,
-            "trigger_type": trigger_type,
-            "trigger_metadata": trigger_metadata,
-            "actions": base_actions,
-            "enabled": True,
-            "exempt_roles": [],
-            "exempt_channels": [],
-        }
+        existing = await self._rules_for(http, guild)
+        if existing is None:
+            return result
+        self.syncs += 1
 
-        try:
-            await create_rule(guild.id, payload)
-        except discord.HTTPException as e:
-            message = str(e)
-            if "AUTO_MODERATION_MAX_RULES_OF_TYPE_EXCEEDED" in message or "MAX_AUTO_MODERATION_RULES" in message:
-                if guild.id not in AUTOMOD_CAPACITY_WARNED_GUILDS:
-                    AUTOMOD_CAPACITY_WARNED_GUILDS.add(guild.id)
-                    log.info(
-                        "[GLX] AutoMod per-type/total limit reached in %s; further GLX rules will be skipped.",
-                        guild.name,
-                    )
-                return
+        log_channel = await get_log_channel(guild)
+        desired = desired_rules(features, log_channel.id if log_channel else None)
+
+        owned: Dict[str, Dict[str, Any]] = {}
+        to_delete: List[Dict[str, Any]] = []
+        foreign_types: Dict[int, int] = {}
+        for data in list(existing.values()):
+            name = data.get("name") or ""
+            if not name.startswith(RULE_PREFIX):
+                t = int(data.get("trigger_type") or 0)
+                foreign_types[t] = foreign_types.get(t, 0) + 1
+            elif name in desired and name not in owned:
+                owned[name] = data
+            else:
+                # Stale (e.g. old placeholder keyword rules) or a duplicate.
+                to_delete.append(data)
+
+        to_create: List[Tuple[str, Dict[str, Any]]] = []
+        to_update: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        keyword_room = MAX_KEYWORD_RULES - foreign_types.get(KEYWORD_TRIGGER, 0)
+        room = AUTOMOD_MAX_RULES - (len(existing) - len(to_delete))
+        for name, spec in desired.items():
+            current = owned.get(name)
+            if current is None:
+                t = spec["trigger_type"]
+                if t in SINGLETON_TRIGGERS and foreign_types.get(t):
+                    continue   # the guild already has its own rule of this kind
+                if t == KEYWORD_TRIGGER:
+                    if keyword_room <= 0:
+                        continue
+                    keyword_room -= 1
+                if room <= 0:
+                    self._capacity_reached(guild, f"rule count at the configured cap ({AUTOMOD_MAX_RULES})")
+                    continue
+                room -= 1
+                to_create.append((name, spec))
+            elif int(current.get("trigger_type") or 0) != spec["trigger_type"]:
+                # The trigger type cannot be edited; replace the rule.
+                to_delete.append(current)
+                to_create.append((name, spec))
+            elif _signature(current) != _signature(spec):
+                to_update.append((current, spec))
             else:
-                log.debug(
-                    "[GLX] HTTP error while creating AutoMod rule %s in %s: %s",
-                    name,
-                    guild.name,
-                    e,
+                result["unchanged"] += 1
+
+        async def create(name: str, spec: Dict[str, Any]):
+            try:
+                data = await self._call(
+                    http.create_auto_moderation_rule,
+                    guild.id,
+                    reason="GLX AutoMod sync",
+                    name=name,
+                    exempt_roles=[],
+                    exempt_channels=[],
+                    **spec,
                 )
-        except Exception as e:
-            log.debug(
-                "[GLX] Failed to create AutoMod rule %s in %s: %s",
-                name,
-                guild.name,
-                e,
-            )
-        else:
-            existing_names.add(name)
-            current_count += 1
-            created += 1
+            except discord.HTTPException as e:
+                if any(code in str(e) for code in _CAPACITY_ERRORS):
+                    self._capacity_reached(guild, "per-type/total limit reached")
+                else:
+                    log.debug("[GLX] HTTP error while creating AutoMod rule %s in %s: %s", name, guild.name, e)
+                result["failed"] += 1
+                return
+            except Exception as e:
+                log.debug("[GLX] Failed to create AutoMod rule %s in %s: %s", name, guild.name, e)
+                result["failed"] += 1
+                return
+            self.cache.put(guild.id, data)
+            result["created"] += 1
             STATS["automod_rules_created"] += 1
 
-    await create_if_missing("GLX-SPAM", 3, {})
-    await create_if_missing(
-        "GLX-MENTION-SPAM",
-        5,
-        {"mention_total_limit": AUTOMOD_MENTION_LIMIT},
-    )
-    await create_if_missing(
-        "GLX-PRESETS",
-        4,
-        {"presets": [1, 2, 3], "allow_list": []},
-    )
-
-    remaining_slots = max(limit - current_count, 0)
-    kw_to_create = min(AUTOMOD_KEYWORD_RULES, remaining_slots)
-
-    for i in range(1, kw_to_create + 1):
-        name = f"GLX-KW-{i}"
-        if name in existing_names:
-            continue
-        keywords = [
-            f"glxkw-{i}-alpha",
-            f"glxkw-{i}-bravo",
-            f"glxkw-{i}-charlie",
-        ]
-        await create_if_missing(
-            name,
-            1,
-            {"keyword_filter": keywords},
-        )
+        async def update(current: Dict[str, Any], spec: Dict[str, Any]):
+            payload = {k: v for k, v in spec.items() if k != "trigger_type"}
+            try:
+                data = await self._call(
+                    http.edit_auto_moderation_rule,
+                    guild.id,
+                    current["id"],
+                    reason="GLX AutoMod sync",
+                    **payload,
+                )
+            except Exception as e:
+                log.debug("[GLX] Failed to update AutoMod rule %s in %s: %s", current.get("name"), guild.name, e)
+                result["failed"] += 1
+                return
+            self.cache.put(guild.id, data)
+            result["updated"] += 1
+
+        async def delete(current: Dict[str, Any]):
+            try:
+                await self._call(http.delete_auto_moderation_rule, guild.id, current["id"], reason="GLX AutoMod sync")
+            except discord.NotFound:
+                pass
+            except Exception as e:
+                log.debug("[GLX] Failed to delete AutoMod rule %s in %s: %s", current.get("name"), guild.name, e)
+                result["failed"] += 1
+                return
+            self.cache.remove(guild.id, current["id"])
+            result["deleted"] += 1
 
-    if created:
-        log.info(
-            "[GLX] Synced %s AutoMod rule(s) in %s (names tracked: %s).",
-            created,
-            guild.name,
-            len(existing_names),
+        # Deletes first so replacements and new rules have room under the caps.
+        await asyncio.gather(*(delete(d) for d in to_delete))
+        await asyncio.gather(
+            *(create(name, spec) for name, spec in to_create),
+            *(update(current, spec) for current, spec in to_update),
         )
-        await log_event(
-            guild,
-            "AutoMod Sync",
-            f"Created {created} GLX AutoMod rule(s).\n"
-            f"Configured cap: {limit} • Tracked names: {len(existing_names)}.",
-            colour=discord.Color.dark_gold(),
+
+        self.created += result["created"]
+        self.updated += result["updated"]
+        self.deleted += result["deleted"]
+        self.unchanged += result["unchanged"]
+        self.failed += result["failed"]
+
+        changed = result["created"] + result["updated"] + result["deleted"]
+        if changed:
+            log.info(
+                "[GLX] AutoMod sync in %s: %s created, %s updated, %s deleted, %s unchanged.",
+                guild.name,
+                result["created"],
+                result["updated"],
+                result["deleted"],
+                result["unchanged"],
+            )
+            await log_event(
+                guild,
+                "AutoMod Sync",
+                f"Created {result['created']}, updated {result['updated']} and removed "
+                f"{result['deleted']} GLX AutoMod rule(s).\n"
+                f"Configured cap: {AUTOMOD_MAX_RULES} • Unchanged: {result['unchanged']}.",
+                colour=discord.Color.dark_gold(),
+            )
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        out = self.cache.stats()
+        out.update(
+            syncs=self.syncs,
+            created=self.created,
+            updated=self.updated,
+            deleted=self.deleted,
+            unchanged=self.unchanged,
+            failed=self.failed,
+            concurrency=self.concurrency,
         )
+        return out
+
+
+automod_reconciler = AutoModReconciler(concurrency=AUTOMOD_SYNC_CONCURRENCY)
+
+
+async def sync_automod(bot: discord.Client, guild: discord.Guild, features) -> Dict[str, int]:
+    """Synchronize GLX's AutoMod rules with Discord's native AutoMod.
+
+    Very defensive to avoid spam: if limits are reached we log ONCE per guild
+    then stay silent afterwards (no console spam).
+    """
+    return await automod_reconciler.sync(bot, guild, features)
+
+
+def schedule_automod_sync(bot: discord.Client, guilds) -> Job:
+    """Queue an AutoMod sync for each guild on the job scheduler and return the job.
+
+    A guild that already has a sync queued is not queued twice. Settings are
+    read when the guild's turn comes, not when the job is submitted.
+    """
+
+    async def run(guild_id: int) -> Dict[str, int]:
+        guild = bot.get_guild(guild_id)
+        if guild is None:
+            raise LookupError("guild is no longer available")
+        result = await automod_reconciler.sync(bot, guild, guild_settings.get(guild_id).features)
+        if result["failed"]:
+            raise RuntimeError(f"{result['failed']} AutoMod request(s) failed")
+        return result
+
+    return job_scheduler.submit("automod_sync", [g.id for g in guilds], run)
@@ -0,0 +1,454 @@
+import asyncio
+import json
+import os
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .config import (
+    CASES_DIR,
+    CASE_SEGMENT_BYTES,
+    CASE_RETENTION_DAYS,
+    CASE_COMPACT_HOURS,
+    STATE_FLUSH_SECONDS,
+)
+from .state import log
+
+# An index entry packs (segment number, byte offset) into one 64-bit integer.
+_OFFSET_BITS = 40
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+_MAX_READERS = 16
+
+Index = Dict[Tuple[int, int], array]
+
+
+def _log_name(n: int) -> str:
+    return f"cases-{n:06d}.log"
+
+
+def _idx_name(n: int) -> str:
+    return f"cases-{n:06d}.idx"
+
+
+def _add(index: Index, guild_id: int, user_id: int, loc: int):
+    locs = index.get((guild_id, user_id))
+    if locs is None:
+        locs = index[(guild_id, user_id)] = array("Q")
+    locs.append(loc)
+
+
+class CaseJournal:
+    """Append-only moderation case log in fixed-size segment files.
+
+    Each case is one JSON line. The active segment takes appends through a
+    buffered file handle. Once it passes `segment_bytes` it is sealed and a
+    binary `.idx` sidecar of (guild, user, offset) triples is written next to
+    it. An in-memory index maps (guild, user) to packed segment/offset
+    positions. A member's history is then a few seeks, never a log scan.
+    Startup reads the sidecars and only parses the active segment.
+
+    Compaction rewrites the sealed segments without cases older than
+    `retention_days`. It runs on a worker thread; the swap of files and index
+    happens on the event loop.
+    """
+
+    def __init__(
+        self,
+        segment_bytes: int,
+        retention_days: int,
+        flush_interval: float,
+        compact_interval: float,
+    ):
+        self.segment_bytes = int(segment_bytes)
+        self.retention_days = int(retention_days)
+        self.flush_interval = float(flush_interval)
+        self.compact_interval = float(compact_interval)
+        self.directory: Optional[str] = None
+        self._segments: List[int] = []       # sealed segment numbers, oldest first
+        self._active_no = 0
+        self._fh = None
+        self._active_size = 0
+        self._dirty = False
+        self._sealed: Index = {}
+        self._active: Index = {}
+        self._readers: Dict[int, object] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+        self._compacting = False
+        self._last_compact = time.monotonic()
+        self.next_id = 1
+        self.entries = 0
+        self.appended = 0
+        self.compactions = 0
+        self.compacted_away = 0
+        self.last_compact_ms = 0.0
+        # Shard workers forward cases to the coordinator's journal instead of
+        # writing their own (an object with send_case() and request()).
+        self.remote = None
+
+    # ---- files -----------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _scan(self, n: int, repair: bool = False) -> Iterator[Tuple[int, dict]]:
+        """(offset, case) for every complete line of a segment."""
+        path = self._path(_log_name(n))
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                yield offset, json.loads(line)
+                offset += len(line)
+        if repair and os.path.getsize(path) != offset:
+            # Torn write from a crash: drop the partial last line.
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+    def _write_idx(self, n: int, index: Index, install: bool = True):
+        """Write the sidecar to a .tmp file, then move it into place if `install`."""
+        triples = array("Q")
+        for (gid, uid), locs in index.items():
+            for loc in locs:
+                triples.extend((gid, uid, loc & _OFFSET_MASK))
+        tmp = self._path(_idx_name(n) + ".tmp")
+        with open(tmp, "wb") as f:
+            triples.tofile(f)
+        if install:
+            os.replace(tmp, self._path(_idx_name(n)))
+
+    def _load_idx(self, n: int, index: Index):
+        path = self._path(_idx_name(n))
+        if not os.path.exists(path):
+            # Sidecar missing (crash during rotation): rebuild it from the segment.
+            rebuilt: Index = {}
+            for offset, case in self._scan(n):
+                _add(rebuilt, case["guild_id"], case["user_id"], (n << _OFFSET_BITS) | offset)
+            self._write_idx(n, rebuilt)
+        triples = array("Q")
+        with open(path, "rb") as f:
+            triples.frombytes(f.read())
+        base = n << _OFFSET_BITS
+        get = index.get
+        it = iter(triples)
+        for gid, uid, offset in zip(it, it, it):
+            locs = get((gid, uid))
+            if locs is None:
+                locs = index[(gid, uid)] = array("Q")
+            locs.append(base | offset)
+        return len(triples) // 3
+
+    def _last_case(self, n: int) -> Optional[dict]:
+        path = self._path(_log_name(n))
+        size = os.path.getsize(path)
+        if not size:
+            return None
+        with open(path, "rb") as f:
+            f.seek(max(size - 65536, 0))
+            lines = f.read().splitlines()
+        return json.loads(lines[-1]) if lines else None
+
+    def _reader(self, n: int):
+        fh = self._readers.pop(n, None)
+        if fh is None:
+            if len(self._readers) >= _MAX_READERS:
+                self._readers.pop(next(iter(self._readers))).close()
+            fh = open(self._path(_log_name(n)), "rb")
+        self._readers[n] = fh
+        return fh
+
+    def _close_readers(self, numbers=None):
+        for n in list(self._readers) if numbers is None else numbers:
+            fh = self._readers.pop(n, None)
+            if fh is not None:
+                fh.close()
+
+    # ---- lifecycle -------------------------------------------------------
+
+    def open(self, directory: str) -> Dict[str, float]:
+        """Load the sidecar indexes and the active segment."""
+        start = time.perf_counter()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith(".tmp"):
+                os.remove(self._path(name))
+        numbers = sorted(
+            int(name[6:12]) for name in os.listdir(directory)
+            if name.startswith("cases-") and name.endswith(".log")
+        )
+        self._active_no = numbers.pop() if numbers else 1
+        self._segments = numbers
+
+        for n in self._segments:
+            self.entries += self._load_idx(n, self._sealed)
+
+        active = self._path(_log_name(self._active_no))
+        last = None
+        if os.path.exists(active):
+            for offset, case in self._scan(self._active_no, repair=True):
+                _add(self._active, case["guild_id"], case["user_id"], (self._active_no << _OFFSET_BITS) | offset)
+                self.entries += 1
+                last = case
+        if last is None and self._segments:
+            last = self._last_case(self._segments[-1])
+        if last is not None:
+            self.next_id = last["id"] + 1
+
+        self._fh = open(active, "ab", buffering=65536)
+        self._active_size = self._fh.tell()
+        return {"entries": self.entries, "segments": len(self._segments) + 1, "seconds": time.perf_counter() - start}
+
+    def start(self):
+        if self._fh is None or self._closing or (self._task is not None and not self._task.done()):
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closing:
+                return
+            self.flush()
+            if self.compact_interval > 0 and time.monotonic() - self._last_compact >= self.compact_interval:
+                self._last_compact = time.monotonic()
+                try:
+                    await self.compact()
+                except Exception as e:
+                    log.warning("[GLX] Case journal compaction failed: %s", e)
+
+    async def close(self):
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self._close_readers()
+
+    def flush(self):
+        if self._dirty and self._fh is not None:
+            self._fh.flush()
+            self._dirty = False
+
+    # ---- writing -----------------------------------------------------------
+
+    def record(
+        self,
+        guild_id: int,
+        user_id: int,
+        action: str,
+        reason: str = "",
+        moderator_id: int = 0,
+        source: str = "manual",
+        ts: Optional[int] = None,
+    ) -> Optional[dict]:
+        """Append a case. moderator_id 0 means the bot acted on its own."""
+        if self.remote is not None:
+            case = {
+                "ts": int(time.time()) if ts is None else ts,
+                "guild_id": guild_id,
+                "user_id": user_id,
+                "action": action,
+                "moderator_id": moderator_id,
+                "source": source,
+                "reason": reason,
+            }
+            self.remote.send_case(case)
+            self.appended += 1
+            return case
+        if self._fh is None:
+            return None
+        case = {
+            "id": self.next_id,
+            "ts": int(time.time()) if ts is None else ts,
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "action": action,
+            "moderator_id": moderator_id,
+            "source": source,
+            "reason": reason,
+        }
+        line = (json.dumps(case, separators=(",", ":"), ensure_ascii=False) + "\n").encode()
+        offset = self._active_size
+        self._fh.write(line)
+        self._active_size += len(line)
+        self._dirty = True
+        _add(self._active, guild_id, user_id, (self._active_no << _OFFSET_BITS) | offset)
+        self.next_id += 1
+        self.entries += 1
+        self.appended += 1
+        if self._active_size >= self.segment_bytes:
+            self._rotate()
+        return case
+
+    def _rotate(self):
+        self._fh.close()
+        self._close_readers([self._active_no])
+        self._write_idx(self._active_no, self._active)
+        for key, locs in self._active.items():
+            sealed = self._sealed.get(key)
+            if sealed is None:
+                self._sealed[key] = locs
+            else:
+                sealed.extend(locs)
+        self._segments.append(self._active_no)
+        self._active_no += 1
+        self._active = {}
+        self._fh = open(self._path(_log_name(self._active_no)), "ab", buffering=65536)
+        self._active_size = 0
+        self._dirty = False
+
+    # ---- reading -------------------------------------------------------------
+
+    async def lookup(self, guild_id: int, user_id: int, limit: int = 10) -> Tuple[List[dict], int]:
+        """(most recent cases, total case count), from the coordinator on a shard worker."""
+        if self.remote is not None:
+            data = await self.remote.request("case_history", guild_id=guild_id, user_id=user_id, limit=limit)
+            return data["cases"], data["total"]
+        return self.history(guild_id, user_id, limit), self.count(guild_id, user_id)
+
+    def count(self, guild_id: int, user_id: int) -> int:
+        key = (guild_id, user_id)
+        return len(self._sealed.get(key, ())) + len(self._active.get(key, ()))
+
+    def history(self, guild_id: int, user_id: int, limit: int = 10) -> List[dict]:
+        """A member's most recent cases, newest first."""
+        key = (guild_id, user_id)
+        locs: List[int] = []
+        for part in (self._active.get(key), self._sealed.get(key)):
+            if part:
+                locs.extend(reversed(part[-(limit - len(locs)):]))
+            if len(locs) >= limit:
+                break
+        if not locs:
+            return []
+        self.flush()
+        out = []
+        for loc in locs:
+            fh = self._reader(loc >> _OFFSET_BITS)
+            fh.seek(loc & _OFFSET_MASK)
+            out.append(json.loads(fh.readline()))
+        return out
+
+    # ---- compaction ------------------------------------------------------------
+
+    def _compact_files(self, segments: List[int], cutoff: float):
+        """Rewrite `segments` into .tmp files without cases older than cutoff."""
+        index: Index = {}
+        outputs: List[int] = []
+        dropped = 0
+        slots = iter(segments)
+        out_no = out_fh = None
+        out_size = 0
+        out_index: Index = {}
+
+        def seal():
+            out_fh.close()
+            self._write_idx(out_no, out_index, install=False)
+            outputs.append(out_no)
+
+        for n in segments:
+            for _, case in self._scan(n):
+                if case["ts"] < cutoff:
+                    dropped += 1
+                    continue
+                if out_fh is None or out_size >= self.segment_bytes:
+                    if out_fh is not None:
+                        seal()
+                    out_no = next(slots)
+                    out_fh = open(self._path(_log_name(out_no) + ".tmp"), "wb")
+                    out_size = 0
+                    out_index = {}
+                line = (json.dumps(case, separators=(",", ":"), ensure_ascii=False) + "\n").encode()
+                loc = (out_no << _OFFSET_BITS) | out_size
+                out_fh.write(line)
+                out_size += len(line)
+                _add(out_index, case["guild_id"], case["user_id"], loc)
+                _add(index, case["guild_id"], case["user_id"], loc)
+        if out_fh is not None:
+            seal()
+        return outputs, index, dropped
+
+    async def compact(self) -> int:
+        """Drop expired cases from the sealed segments; returns cases removed."""
+        if self._compacting or self._fh is None or self.retention_days <= 0 or not self._segments:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        first = next(self._scan(self._segments[0]), None)
+        if first is None or first[1]["ts"] >= cutoff:
+            return 0
+
+        self._compacting = True
+        start = time.perf_counter()
+        try:
+            segments = list(self._segments)
+            outputs, index, dropped = await asyncio.to_thread(self._compact_files, segments, cutoff)
+
+            # Swap files and index in one step on the loop, so reads never see a mix.
+            self._close_readers(segments)
+            for n in segments:
+                if n in outputs:
+                    os.replace(self._path(_log_name(n) + ".tmp"), self._path(_log_name(n)))
+                    os.replace(self._path(_idx_name(n) + ".tmp"), self._path(_idx_name(n)))
+                else:
+                    os.remove(self._path(_log_name(n)))
+                    os.remove(self._path(_idx_name(n)))
+            sealed_since = self._segments[len(segments):]
+            for n in sealed_since:
+                self._load_idx(n, index)
+            self._sealed = index
+            self._segments = outputs + sealed_since
+        finally:
+            self._compacting = False
+
+        self.entries -= dropped
+        self.compactions += 1
+        self.compacted_away += dropped
+        self.last_compact_ms = (time.perf_counter() - start) * 1000
+        log.info("[GLX] Case journal compacted: %d expired cases removed", dropped)
+        return dropped
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "entries": self.entries,
+            "segments": len(self._segments) + (1 if self._fh is not None else 0),
+            "appended": self.appended,
+            "compactions": self.compactions,
+            "compacted_away": self.compacted_away,
+            "last_compact_ms": round(self.last_compact_ms, 2),
+        }
+
+
+case_journal = CaseJournal(
+    segment_bytes=CASE_SEGMENT_BYTES,
+    retention_days=CASE_RETENTION_DAYS,
+    flush_interval=STATE_FLUSH_SECONDS,
+    compact_interval=CASE_COMPACT_HOURS * 3600,
+)
+
+
+def open_case_journal(directory: str = CASES_DIR) -> Optional[Dict[str, float]]:
+    """Load the journal at startup; an empty directory setting disables it."""
+    if not directory:
+        log.info("[GLX] GLX_CASES_DIR is empty; moderation cases will not be recorded.")
+        return None
+    info = case_journal.open(directory)
+    log.info(
+        "[GLX] Loaded %d moderation cases from %s (%d segments) in %.2fs",
+        info["entries"],
+        directory,
+        info["segments"],
+        info["seconds"],
+    )
+    return info
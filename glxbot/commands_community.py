@@ -5,14 +5,33 @@ import asyncio
 import discord
 from discord.ext import commands
 
-from .config import PREFIX, WARN_THRESHOLD
+from .config import PREFIX
 from .state import STATS, GUILD_STATS, SUGGESTION_CHANNELS, WELCOME_CHANNELS, WELCOME_MESSAGES, DEFAULT_WELCOME_TEMPLATE
 from .discipline import get_warn_count
+from .members import member_index
+from .store import state_store
+from .settings import guild_settings
+from .shedding import shedder
+from .rest import rest_scheduler, PRIORITY_COSMETIC
+
+
+async def _add_reactions(message: discord.Message, emojis):
+    for emoji in emojis:
+        try:
+            await rest_scheduler.call(
+                PRIORITY_COSMETIC,
+                message.guild.id,
+                lambda: message.add_reaction(emoji),
+                target=("message", message.id),
+            )
+        except Exception:
+            pass
 
 
 def register_community_commands(bot: commands.Bot):
     @bot.command(name="help")
     async def help_command(ctx: commands.Context):
+        settings = guild_settings.get(ctx.guild.id) if ctx.guild else guild_settings.defaults
         embed = discord.Embed(
             title="GLX Protection Commands",
             colour=discord.Color.blurple(),
@@ -39,9 +58,10 @@ def register_community_commands(bot: commands.Bot):
             value=(
                 f"`{PREFIX}mute @user [minutes] [reason]`\n"
                 f"`{PREFIX}unmute @user`\n"
-                f"`{PREFIX}warn @user [reason]` auto timeout after {WARN_THRESHOLD} warns\n"
+                f"`{PREFIX}warn @user [reason]` auto timeout after {settings.warn_threshold} warns\n"
                 f"`{PREFIX}warnings [@user]` check warn count\n"
                 f"`{PREFIX}clearwarns @user` reset warns\n"
+                f"`{PREFIX}history @user [limit]` moderation case history\n"
                 f"`{PREFIX}ban @user [reason]`\n"
                 f"`{PREFIX}kick @user [reason]`\n"
                 f"`{PREFIX}clear [amount]`\n"
@@ -54,14 +74,15 @@ def register_community_commands(bot: commands.Bot):
         embed.add_field(
             name="Protection",
             value=(
-                f"`{PREFIX}raidlock on|off` global raid lock\n"
+                f"`{PREFIX}raidlock on|off [role|channels]` global raid lock\n"
                 f"`{PREFIX}lock [#channel]` lock a channel\n"
                 f"`{PREFIX}unlock [#channel]` unlock a channel\n"
                 f"`{PREFIX}glxstats` security statistics\n"
                 f"`{PREFIX}togglespam` toggle anti spam\n"
                 f"`{PREFIX}toggleinvites` toggle anti invites\n"
                 f"`{PREFIX}togglementions` toggle anti mentions\n"
-                f"`{PREFIX}togglenuke` toggle nuke command"
+                f"`{PREFIX}togglenuke` toggle nuke command\n"
+                f"`{PREFIX}glxset [name value | reset [name]]` server settings"
             ),
             inline=False,
         )
@@ -80,8 +101,8 @@ def register_community_commands(bot: commands.Bot):
         embed.add_field(
             name="Whitelist and Web",
             value=(
-                f"`{PREFIX}glxwhitelist @member` add to whitelist\n"
-                f"`{PREFIX}glxunwhitelist @member` remove from whitelist\n"
+                f"`{PREFIX}glxwhitelist [@member|@role]` add to / list whitelist\n"
+                f"`{PREFIX}glxunwhitelist @member|@role` remove from whitelist\n"
                 f"`{PREFIX}generate [pattern]` generate user web key\n"
                 f"`{PREFIX}genadmin [pattern]` generate admin web key (bot owner only)"
             ),
@@ -99,6 +120,7 @@ def register_community_commands(bot: commands.Bot):
     @commands.has_permissions(manage_guild=True)
     async def setsuggest(ctx: commands.Context, channel: discord.TextChannel):
         SUGGESTION_CHANNELS[ctx.guild.id] = channel.id
+        state_store.save_guild_setting(ctx.guild.id, "suggestion_channel", channel.id)
         await ctx.reply(
             f"Suggestion channel set to {channel.mention}. Members can use `{PREFIX}suggest`.",
             mention_author=False,
@@ -137,11 +159,7 @@ def register_community_commands(bot: commands.Bot):
             embed.set_author(name=str(ctx.author))
         embed.set_footer(text=f"GLX Suggestion • {ctx.guild.name}")
         msg = await channel.send(embed=embed)
-        try:
-            await msg.add_reaction("✅")
-            await msg.add_reaction("❌")
-        except Exception:
-            pass
+        await shedder.run("reaction", ctx.guild, lambda: _add_reactions(msg, ("✅", "❌")))
         await ctx.reply("Your suggestion has been submitted.", mention_author=False)
 
     @bot.command(name="poll")
@@ -171,11 +189,7 @@ def register_community_commands(bot: commands.Bot):
         )
         embed.set_footer(text=f"Poll created by {ctx.author}")
         msg = await ctx.send(embed=embed)
-        for index in range(len(options)):
-            try:
-                await msg.add_reaction(emojis[index])
-            except Exception:
-                pass
+        await shedder.run("reaction", ctx.guild, lambda: _add_reactions(msg, emojis[:len(options)]))
         STATS["polls"] += 1
         GUILD_STATS[ctx.guild.id]["polls"] += 1
         try:
@@ -187,6 +201,7 @@ def register_community_commands(bot: commands.Bot):
     @commands.has_permissions(manage_guild=True)
     async def setwelcome(ctx: commands.Context, channel: discord.TextChannel):
         WELCOME_CHANNELS[ctx.guild.id] = channel.id
+        state_store.save_guild_setting(ctx.guild.id, "welcome_channel", channel.id)
         await ctx.reply(
             f"Welcome channel set to {channel.mention}. New members will be greeted there.",
             mention_author=False,
@@ -196,6 +211,7 @@ def register_community_commands(bot: commands.Bot):
     @commands.has_permissions(manage_guild=True)
     async def setwelcomemsg(ctx: commands.Context, *, template: str):
         WELCOME_MESSAGES[ctx.guild.id] = template
+        state_store.save_guild_setting(ctx.guild.id, "welcome_message", template)
         preview = template.replace("{member}", ctx.author.mention).replace("{server}", ctx.guild.name)
         await ctx.reply(
             "Welcome message template updated.\n"
@@ -210,11 +226,7 @@ def register_community_commands(bot: commands.Bot):
             await ctx.reply("This command can only be used inside a server.", mention_author=False)
             return
         total_members = guild.member_count or len(guild.members)
-        bot_members = 0
-        if guild.members:
-            for member in guild.members:
-                if member.bot:
-                    bot_members += 1
+        bot_members = member_index.bots(guild)
         human_members = total_members - bot_members
         created = guild.created_at.strftime("%Y-%m-%d %H:%M:%S UTC")
         embed = discord.Embed(
@@ -271,7 +283,7 @@ def register_community_commands(bot: commands.Bot):
         embed.add_field(name="Roles", value=roles_str, inline=False)
         embed.add_field(
             name="Warns",
-            value=f"{warn_count}/{WARN_THRESHOLD}",
+            value=f"{warn_count}/{guild_settings.get(guild.id).warn_threshold}",
             inline=True,
         )
         avatar_url = getattr(member.display_avatar, "url", None)
@@ -1,12 +1,18 @@
+import asyncio
 from datetime import datetime
 
 import discord
 from discord.ext import commands
 
-from .config import PREFIX, WARN_THRESHOLD
+from .config import PREFIX
 from .state import STATS, GUILD_STATS
 from .security import timeout_member, format_seconds
 from .discipline import add_warn, get_warn_count, clear_warns
+from .cases import case_journal
+from .rest import rest_scheduler, PRIORITY_ENFORCE
+from .settings import guild_settings
+
+EMBED_DESCRIPTION_LIMIT = 4096
 
 
 def register_moderation_commands(bot: commands.Bot):
@@ -19,6 +25,7 @@ def register_moderation_commands(bot: commands.Bot):
         if ok:
             STATS["mutes"] += 1
             GUILD_STATS[ctx.guild.id]["mutes"] += 1
+            case_journal.record(ctx.guild.id, member.id, "mute", f"{reason} ({minutes}m)", ctx.author.id)
             await ctx.reply(
                 f"[GLX] {member.mention} muted for {minutes}m. Reason: {reason}",
                 mention_author=False,
@@ -30,7 +37,13 @@ def register_moderation_commands(bot: commands.Bot):
     @commands.has_permissions(moderate_members=True)
     async def unmute(ctx: commands.Context, member: discord.Member):
         try:
-            await member.timeout(until=None, reason=f"Unmuted by {ctx.author}")
+            await rest_scheduler.call(
+                PRIORITY_ENFORCE,
+                ctx.guild.id,
+                lambda: member.timeout(None, reason=f"Unmuted by {ctx.author}"),
+                target=("member", ctx.guild.id, member.id),
+            )
+            case_journal.record(ctx.guild.id, member.id, "unmute", "", ctx.author.id)
             await ctx.reply(f"[GLX] {member.mention} unmuted.", mention_author=False)
         except Exception:
             await ctx.reply("Failed to unmute member.", mention_author=False)
@@ -41,9 +54,15 @@ def register_moderation_commands(bot: commands.Bot):
         if member == ctx.author:
             return await ctx.reply("You can't ban yourself.", mention_author=False)
         try:
-            await member.ban(reason=f"{reason} • by {ctx.author}")
+            await rest_scheduler.call(
+                PRIORITY_ENFORCE,
+                ctx.guild.id,
+                lambda: member.ban(reason=f"{reason} • by {ctx.author}"),
+                target=("member", ctx.guild.id, member.id),
+            )
             STATS["bans"] += 1
             GUILD_STATS[ctx.guild.id]["bans"] += 1
+            case_journal.record(ctx.guild.id, member.id, "ban", reason, ctx.author.id)
             await ctx.reply(f"[GLX] {member} banned. Reason: {reason}", mention_author=False)
         except Exception as e:
             await ctx.reply(f"Failed to ban: `{e}`", mention_author=False)
@@ -63,7 +82,13 @@ def register_moderation_commands(bot: commands.Bot):
         if target_entry is None:
             return await ctx.reply("User not found in ban list.", mention_author=False)
         try:
-            await ctx.guild.unban(target_entry.user, reason=f"Unbanned by {ctx.author}")
+            await rest_scheduler.call(
+                PRIORITY_ENFORCE,
+                ctx.guild.id,
+                lambda: ctx.guild.unban(target_entry.user, reason=f"Unbanned by {ctx.author}"),
+                target=("guild", ctx.guild.id),
+            )
+            case_journal.record(ctx.guild.id, target_entry.user.id, "unban", "", ctx.author.id)
             await ctx.reply(f"[GLX] Unbanned {target_entry.user} ({target_entry.user.id})", mention_author=False)
         except Exception as e:
             await ctx.reply(f"Failed to unban: `{e}`", mention_author=False)
@@ -74,9 +99,15 @@ def register_moderation_commands(bot: commands.Bot):
         if member == ctx.author:
             return await ctx.reply("You can't kick yourself.", mention_author=False)
         try:
-            await member.kick(reason=f"{reason} • by {ctx.author}")
+            await rest_scheduler.call(
+                PRIORITY_ENFORCE,
+                ctx.guild.id,
+                lambda: member.kick(reason=f"{reason} • by {ctx.author}"),
+                target=("member", ctx.guild.id, member.id),
+            )
             STATS["kicks"] += 1
             GUILD_STATS[ctx.guild.id]["kicks"] += 1
+            case_journal.record(ctx.guild.id, member.id, "kick", reason, ctx.author.id)
             await ctx.reply(f"[GLX] {member} kicked. Reason: {reason}", mention_author=False)
         except Exception as e:
             await ctx.reply(f"Failed to kick: `{e}`", mention_author=False)
@@ -85,7 +116,12 @@ def register_moderation_commands(bot: commands.Bot):
     @commands.has_permissions(manage_messages=True)
     async def clear(ctx: commands.Context, amount: int = 10):
         try:
-            deleted = await ctx.channel.purge(limit=amount + 1)
+            deleted = await rest_scheduler.call(
+                PRIORITY_ENFORCE,
+                ctx.guild.id,
+                lambda: ctx.channel.purge(limit=amount + 1),
+                target=("channel", ctx.channel.id),
+            )
             await ctx.send(
                 f"[GLX] Cleared {len(deleted) - 1} messages.",
                 delete_after=5,
@@ -107,6 +143,7 @@ def register_moderation_commands(bot: commands.Bot):
             f"Manual warn: {reason} (by {ctx.author})",
             source="MANUAL",
         )
+        case_journal.record(ctx.guild.id, member.id, "warn", reason, ctx.author.id)
 
         await ctx.reply(
             f"[GLX] {member.mention} has been warned. Reason: {reason}",
@@ -119,7 +156,7 @@ def register_moderation_commands(bot: commands.Bot):
         member = member or ctx.author
         count = get_warn_count(ctx.guild.id, member.id)
         await ctx.reply(
-            f"{member.mention} currently has {count}/{WARN_THRESHOLD} warnings.",
+            f"{member.mention} currently has {count}/{guild_settings.get(ctx.guild.id).warn_threshold} warnings.",
             mention_author=False,
         )
 
@@ -127,7 +164,39 @@ def register_moderation_commands(bot: commands.Bot):
     @commands.has_permissions(administrator=True)
     async def clearwarns(ctx: commands.Context, member: discord.Member):
         old = clear_warns(ctx.guild.id, member.id)
+        case_journal.record(ctx.guild.id, member.id, "clearwarns", f"{old} warnings cleared", ctx.author.id)
         await ctx.reply(
             f"[GLX] Cleared {old} warnings for {member.mention}.",
             mention_author=False,
         )
+
+    @bot.command(name="history", aliases=["cases"])
+    @commands.has_permissions(moderate_members=True)
+    async def history(ctx: commands.Context, member: discord.User, limit: int = 10):
+        limit = max(1, min(limit, 25))
+        try:
+            cases, total = await case_journal.lookup(ctx.guild.id, member.id, limit)
+        except (ConnectionError, RuntimeError, asyncio.TimeoutError):
+            return await ctx.reply("Case history is unavailable right now, try again shortly.", mention_author=False)
+        if not cases:
+            return await ctx.reply(f"No moderation cases recorded for {member.mention}.", mention_author=False)
+        lines = []
+        size = 0
+        for case in cases:
+            by = f"<@{case['moderator_id']}>" if case["moderator_id"] else "GLX"
+            line = f"`#{case['id']}` <t:{case['ts']}:R> **{case['action']}** by {by}"
+            if case["reason"]:
+                line += f" — {case['reason'][:120]}"
+            # Newest first; stop before the embed description limit instead of failing the reply.
+            size += len(line) + (1 if lines else 0)
+            if size > EMBED_DESCRIPTION_LIMIT:
+                break
+            lines.append(line)
+        embed = discord.Embed(
+            title=f"Case history • {member}",
+            description="\n".join(lines),
+            colour=discord.Color.blurple(),
+            timestamp=datetime.utcnow(),
+        )
+        embed.set_footer(text=f"Showing {len(lines)} of {total} cases")
+        await ctx.reply(embed=embed, mention_author=False)
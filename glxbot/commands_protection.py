@@ -1,12 +1,16 @@
 from datetime import datetime
+from typing import Union
 
 import discord
 from discord.ext import commands
 
 from .config import PREFIX
-from .state import STATS, GUILD_STATS, FEATURES, WHITELIST
-from .security import set_raid_lock, log_event, uptime_str
+from .state import STATS, GUILD_STATS
+from .security import set_raid_lock, describe_raid_lock, log_event, uptime_str
 from .auth import get_license_info
+from .raid import raid_monitor
+from .exemptions import exemptions
+from .settings import guild_settings, coerce_setting, FEATURE_FIELDS, THRESHOLD_FIELDS
 
 
 def register_protection_commands(bot: commands.Bot):
@@ -44,67 +48,68 @@ def register_protection_commands(bot: commands.Bot):
 
     @bot.command(name="raidlock")
     @commands.has_permissions(manage_guild=True)
-    async def raidlock(ctx: commands.Context, mode: str = "on"):
+    async def raidlock(ctx: commands.Context, mode: str = "on", method: str = None):
         mode = mode.lower()
+        if method is not None and method.lower() not in ("role", "channels"):
+            return await ctx.reply(f"Usage: `{PREFIX}raidlock on|off [role|channels]`", mention_author=False)
         if mode in ("on", "enable", "enabled"):
-            changed = await set_raid_lock(ctx.guild, True, f"Manual raid lock by {ctx.author}")
+            await set_raid_lock(ctx.guild, True, f"Manual raid lock by {ctx.author}", mode=method)
+            summary = describe_raid_lock(ctx.guild.id)
             await ctx.reply(
-                f"[GLX] Raid lock ENABLED on {changed} channels.",
+                f"[GLX] Raid lock ENABLED on {summary}.",
                 mention_author=False,
             )
             await log_event(
                 ctx.guild,
                 "Manual Raid Lock",
-                f"Triggered by {ctx.author.mention} on {changed} channels.",
+                f"Triggered by {ctx.author.mention} on {summary}.",
                 colour=discord.Color.orange(),
             )
         elif mode in ("off", "disable", "disabled"):
-            changed = await set_raid_lock(ctx.guild, False, f"Manual raid unlock by {ctx.author}")
+            raid_monitor.clear(ctx.guild.id)
+            await set_raid_lock(ctx.guild, False, f"Manual raid unlock by {ctx.author}", mode=method, force=True)
+            summary = describe_raid_lock(ctx.guild.id)
             await ctx.reply(
-                f"[GLX] Raid lock DISABLED on {changed} channels.",
+                f"[GLX] Raid lock DISABLED on {summary}.",
                 mention_author=False,
             )
             await log_event(
                 ctx.guild,
                 "Manual Raid Unlock",
-                f"Triggered by {ctx.author.mention} on {changed} channels.",
+                f"Triggered by {ctx.author.mention} on {summary}.",
                 colour=discord.Color.green(),
             )
         else:
-            await ctx.reply(f"Usage: `{PREFIX}raidlock on` or `{PREFIX}raidlock off`", mention_author=False)
+            await ctx.reply(f"Usage: `{PREFIX}raidlock on|off [role|channels]`", mention_author=False)
 
     @bot.command(name="togglespam")
     @commands.has_permissions(manage_guild=True)
     async def togglespam(ctx: commands.Context):
-        FEATURES["anti_spam"] = not FEATURES.get("anti_spam", True)
-        state = "ON" if FEATURES["anti_spam"] else "OFF"
-        await ctx.reply(f"[GLX] Anti-Spam is now {state}.", mention_author=False)
+        state = "ON" if guild_settings.toggle(ctx.guild.id, "anti_spam") else "OFF"
+        await ctx.reply(f"[GLX] Anti-Spam is now {state} for this server.", mention_author=False)
 
     @bot.command(name="toggleinvites")
     @commands.has_permissions(manage_guild=True)
     async def toggleinvites(ctx: commands.Context):
-        FEATURES["anti_invites"] = not FEATURES.get("anti_invites", True)
-        state = "ON" if FEATURES["anti_invites"] else "OFF"
-        await ctx.reply(f"[GLX] Anti-Invites is now {state}.", mention_author=False)
+        state = "ON" if guild_settings.toggle(ctx.guild.id, "anti_invites") else "OFF"
+        await ctx.reply(f"[GLX] Anti-Invites is now {state} for this server.", mention_author=False)
 
     @bot.command(name="togglementions")
     @commands.has_permissions(manage_guild=True)
     async def togglementions(ctx: commands.Context):
-        FEATURES["anti_mentions"] = not FEATURES.get("anti_mentions", True)
-        state = "ON" if FEATURES["anti_mentions"] else "OFF"
-        await ctx.reply(f"[GLX] Anti-Mentions is now {state}.", mention_author=False)
+        state = "ON" if guild_settings.toggle(ctx.guild.id, "anti_mentions") else "OFF"
+        await ctx.reply(f"[GLX] Anti-Mentions is now {state} for this server.", mention_author=False)
 
     @bot.command(name="togglenuke")
     @commands.has_permissions(administrator=True)
     async def togglenuke(ctx: commands.Context):
-        FEATURES["nuke"] = not FEATURES.get("nuke", False)
-        state = "ON" if FEATURES["nuke"] else "OFF"
-        await ctx.reply(f"[GLX] Nuke command is now {state}.", mention_author=False)
+        state = "ON" if guild_settings.toggle(ctx.guild.id, "nuke") else "OFF"
+        await ctx.reply(f"[GLX] Nuke command is now {state} for this server.", mention_author=False)
 
     @bot.command(name="nuke")
     @commands.has_permissions(administrator=True)
     async def nuke(ctx: commands.Context, channel: discord.TextChannel = None):
-        if not FEATURES.get("nuke", False):
+        if not guild_settings.get(ctx.guild.id).nuke:
             return await ctx.reply("Nuke is currently disabled. Use `!togglenuke` to enable it.", mention_author=False)
         ch = channel or ctx.channel
         try:
@@ -118,20 +123,76 @@ def register_protection_commands(bot: commands.Bot):
         except Exception as e:
             await ctx.reply(f"Failed to nuke channel: `{e}`", mention_author=False)
 
+    @bot.command(name="glxset")
+    @commands.has_permissions(manage_guild=True)
+    async def glxset(ctx: commands.Context, name: str = None, value: str = None):
+        if name is None:
+            settings = guild_settings.get(ctx.guild.id)
+            overrides = guild_settings.overrides(ctx.guild.id)
+            lines = []
+            for field in FEATURE_FIELDS + tuple(THRESHOLD_FIELDS):
+                current = getattr(settings, field)
+                if isinstance(current, bool):
+                    current = "ON" if current else "OFF"
+                mark = " *" if field in overrides else ""
+                lines.append(f"`{field}` = {current}{mark}")
+            embed = discord.Embed(
+                title="GLX Protection • Server Settings",
+                description="\n".join(lines),
+                colour=discord.Color.teal(),
+            )
+            embed.set_footer(text=f"* overridden for this server • {PREFIX}glxset <name> <value> • {PREFIX}glxset reset [name]")
+            return await ctx.reply(embed=embed, mention_author=False)
+        name = name.lower()
+        if name == "reset":
+            if value is not None and value.lower() not in FEATURE_FIELDS + tuple(THRESHOLD_FIELDS):
+                return await ctx.reply(f"Unknown setting `{value}`.", mention_author=False)
+            guild_settings.reset(ctx.guild.id, value.lower() if value else None)
+            target = f"`{value.lower()}`" if value else "All settings"
+            return await ctx.reply(f"[GLX] {target} reset to the default for this server.", mention_author=False)
+        if value is None:
+            return await ctx.reply(f"Usage: `{PREFIX}glxset <name> <value>` or `{PREFIX}glxset reset [name]`", mention_author=False)
+        try:
+            coerce_setting(name, value)
+        except KeyError:
+            return await ctx.reply(f"Unknown setting `{name}`. Run `{PREFIX}glxset` to list them.", mention_author=False)
+        except ValueError as e:
+            return await ctx.reply(f"Invalid value: {e}.", mention_author=False)
+        settings = guild_settings.set(ctx.guild.id, name, value)
+        current = getattr(settings, name)
+        if isinstance(current, bool):
+            current = "ON" if current else "OFF"
+        await ctx.reply(f"[GLX] `{name}` is now {current} for this server.", mention_author=False)
+
     @bot.command(name="glxwhitelist")
     @commands.has_permissions(manage_guild=True)
-    async def glxwhitelist(ctx: commands.Context, member: discord.Member):
-        WHITELIST.add(member.id)
-        await ctx.reply(f"[GLX] {member.mention} added to GLX whitelist.", mention_author=False)
+    async def glxwhitelist(ctx: commands.Context, target: Union[discord.Member, discord.Role] = None):
+        if target is None:
+            users, roles = exemptions.entries(ctx.guild.id)
+            lines = [f"<@&{rid}>" for rid in sorted(roles)] + [f"<@{uid}>" for uid in sorted(users)]
+            embed = discord.Embed(
+                title="GLX Protection • Whitelist",
+                description="\n".join(lines[:50]) or "Nobody is whitelisted. Admins are always exempt.",
+                colour=discord.Color.teal(),
+            )
+            return await ctx.reply(embed=embed, mention_author=False)
+        if isinstance(target, discord.Role):
+            exemptions.whitelist_role(ctx.guild.id, target.id)
+        else:
+            exemptions.whitelist_user(ctx.guild.id, target.id)
+        await ctx.reply(f"[GLX] {target.mention} added to GLX whitelist.", mention_author=False)
 
     @bot.command(name="glxunwhitelist")
     @commands.has_permissions(manage_guild=True)
-    async def glxunwhitelist(ctx: commands.Context, member: discord.Member):
-        if member.id in WHITELIST:
-            WHITELIST.remove(member.id)
-            await ctx.reply(f"[GLX] {member.mention} removed from GLX whitelist.", mention_author=False)
+    async def glxunwhitelist(ctx: commands.Context, target: Union[discord.Member, discord.Role]):
+        if isinstance(target, discord.Role):
+            removed = exemptions.unwhitelist_role(ctx.guild.id, target.id)
+        else:
+            removed = exemptions.unwhitelist_user(ctx.guild.id, target.id)
+        if removed:
+            await ctx.reply(f"[GLX] {target.mention} removed from GLX whitelist.", mention_author=False)
         else:
-            await ctx.reply(f"{member.mention} is not in GLX whitelist.", mention_author=False)
+            await ctx.reply(f"{target.mention} is not in GLX whitelist.", mention_author=False)
 
     @bot.command(name="glxstats")
     @commands.has_permissions(manage_guild=True)
@@ -144,10 +205,12 @@ def register_protection_commands(bot: commands.Bot):
         stats = GUILD_STATS[ctx.guild.id]
         for k, v in stats.items():
             embed.add_field(name=k.replace("_", " ").title(), value=str(v))
+        embed.add_field(name="Raid State", value=raid_monitor.describe(ctx.guild.id), inline=False)
         await ctx.reply(embed=embed, mention_author=False)
 
     @bot.command(name="glx")
     async def glx(ctx: commands.Context):
+        features = (guild_settings.get(ctx.guild.id) if ctx.guild else guild_settings.defaults).features
         guild_count = len(bot.guilds)
         member_count = sum(g.member_count or 0 for g in bot.guilds)
         embed = discord.Embed(
@@ -176,12 +239,13 @@ def register_protection_commands(bot: commands.Bot):
         embed.add_field(
             name="Protection Layer",
             value=(
-                f"Anti-Spam: { 'ON' if FEATURES.get('anti_spam', True) else 'OFF' }\n"
-                f"Anti-Raid: { 'ON' if FEATURES.get('anti_raid', True) else 'OFF' }\n"
-                f"AutoMod: { 'ON' if FEATURES.get('automod', True) else 'OFF' }\n"
-                f"Anti-Invites: { 'ON' if FEATURES.get('anti_invites', True) else 'OFF' }\n"
-                f"Anti-Mentions: { 'ON' if FEATURES.get('anti_mentions', True) else 'OFF' }\n"
-                f"Nuke Cmd: { 'ON' if FEATURES.get('nuke', False) else 'OFF' }"
+                f"Anti-Spam: { 'ON' if features.get('anti_spam', True) else 'OFF' }\n"
+                f"Anti-Raid: { 'ON' if features.get('anti_raid', True) else 'OFF' }\n"
+                f"AutoMod: { 'ON' if features.get('automod', True) else 'OFF' }\n"
+                f"Anti-Invites: { 'ON' if features.get('anti_invites', True) else 'OFF' }\n"
+                f"Anti-Mentions: { 'ON' if features.get('anti_mentions', True) else 'OFF' }\n"
+                f"Content Filter: { 'ON' if features.get('content_filter', True) else 'OFF' }\n"
+                f"Nuke Cmd: { 'ON' if features.get('nuke', False) else 'OFF' }"
             ),
             inline=False,
         )
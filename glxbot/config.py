@@ -4,8 +4,46 @@ import discord
 PREFIX = os.getenv("GLX_PREFIX", "!")
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN") or "PUT_YOUR_BOT_TOKEN_HERE"
 
+# Endpoint overrides for local load tests (benchmarks/fake_discord.py); empty means discord.com.
+DISCORD_API_BASE = os.getenv("GLX_DISCORD_API_BASE", "").rstrip("/")
+DISCORD_GATEWAY_URL = os.getenv("GLX_DISCORD_GATEWAY", "")
+
 GLX_WEB_HOST = os.getenv("GLX_WEB_HOST", "0.0.0.0")
 GLX_WEB_PORT = int(os.getenv("GLX_WEB_PORT", "8000"))
+STATS_CACHE_SECONDS = float(os.getenv("GLX_STATS_CACHE_SECONDS", "2"))
+
+# Prometheus scrape token for /metrics (Bearer header or ?token=); empty disables the endpoint.
+METRICS_TOKEN = os.getenv("GLX_METRICS_TOKEN", "")
+# Guilds with their own label in per-guild counter series; the rest are summed as guild="other".
+METRICS_MAX_GUILDS = int(os.getenv("GLX_METRICS_MAX_GUILDS", "50"))
+# Label sets kept per metric (e.g. REST routes) before new ones fold into "other".
+METRICS_MAX_SERIES = int(os.getenv("GLX_METRICS_MAX_SERIES", "200"))
+LOOP_LAG_INTERVAL = float(os.getenv("GLX_LOOP_LAG_INTERVAL", "0.5"))
+# Load shedding: loop lag (ms) that, held for SHED_SUSTAIN_SECONDS, pauses cosmetic work (level 1)
+# and also log embeds (level 2). Detection and enforcement are never shed. 0 disables shedding.
+SHED_LAG_MS = float(os.getenv("GLX_SHED_LAG_MS", "100"))
+SHED_LAG_HIGH_MS = float(os.getenv("GLX_SHED_LAG_HIGH_MS", "500"))
+SHED_SUSTAIN_SECONDS = float(os.getenv("GLX_SHED_SUSTAIN_SECONDS", "2"))
+SHED_RECOVER_SECONDS = float(os.getenv("GLX_SHED_RECOVER_SECONDS", "10"))
+SHED_MAX_DEFERRED = int(os.getenv("GLX_SHED_MAX_DEFERRED", "500"))
+
+STATE_DB_PATH = os.getenv("GLX_STATE_DB", "glx_state.db")
+STATE_FLUSH_SECONDS = float(os.getenv("GLX_STATE_FLUSH_SECONDS", "5"))
+
+# Sharding: "0" runs one unsharded bot, "auto" asks Discord for the count, N fixes it.
+SHARD_COUNT = os.getenv("GLX_SHARD_COUNT", "0").strip().lower()
+# Worker processes the shards are split over; above 1, bot.py becomes the coordinator + dashboard.
+SHARD_WORKERS = int(os.getenv("GLX_SHARD_WORKERS", "1"))
+# Run the dashboard in its own process; the bot reaches it over the coordinator socket.
+WEB_PROCESS = os.getenv("GLX_WEB_PROCESS", "false").lower() == "true"
+COORDINATOR_HOST = os.getenv("GLX_COORDINATOR_HOST", "127.0.0.1")
+COORDINATOR_PORT = int(os.getenv("GLX_COORDINATOR_PORT", "8765"))
+SHARD_PUBLISH_SECONDS = float(os.getenv("GLX_SHARD_PUBLISH_SECONDS", "1"))
+
+CASES_DIR = os.getenv("GLX_CASES_DIR", "glx_cases")
+CASE_SEGMENT_BYTES = int(os.getenv("GLX_CASE_SEGMENT_MB", "16")) * 1024 * 1024
+CASE_RETENTION_DAYS = int(os.getenv("GLX_CASE_RETENTION_DAYS", "365"))
+CASE_COMPACT_HOURS = float(os.getenv("GLX_CASE_COMPACT_HOURS", "24"))
 
 GAME_STATUS = os.getenv(
     "GLX_GAME_STATUS",
@@ -13,6 +51,10 @@ GAME_STATUS = os.getenv(
 )
 
 LOG_CHANNEL_NAME = os.getenv("GLX_LOG_CHANNEL_NAME", "glx-logs")
+LOG_FLUSH_SECONDS = float(os.getenv("GLX_LOG_FLUSH_SECONDS", "2"))
+LOG_MAX_PENDING = int(os.getenv("GLX_LOG_MAX_PENDING", "200"))
+LOG_CHANNEL_RETRY_SECONDS = int(os.getenv("GLX_LOG_CHANNEL_RETRY_SECONDS", "60"))
+LOG_CHANNEL_RETRY_MAX_SECONDS = int(os.getenv("GLX_LOG_CHANNEL_RETRY_MAX_SECONDS", "3600"))
 
 ANTISPAM_ENABLED_DEFAULT = os.getenv("GLX_ANTISPAM_ENABLED", "true").lower() == "true"
 ANTIRAID_ENABLED_DEFAULT = os.getenv("GLX_ANTIRAID_ENABLED", "true").lower() == "true"
@@ -20,21 +62,46 @@ AUTOMOD_ENABLED_DEFAULT = os.getenv("GLX_AUTOMOD_ENABLED", "true").lower() == "t
 ANTIINVITES_ENABLED_DEFAULT = os.getenv("GLX_ANTIINVITES_ENABLED", "true").lower() == "true"
 ANTIMENTIONS_ENABLED_DEFAULT = os.getenv("GLX_ANTIMENTIONS_ENABLED", "true").lower() == "true"
 GLX_NUKE_ENABLED_DEFAULT = os.getenv("GLX_NUKE_ENABLED", "false").lower() == "true"
+CONTENT_FILTER_ENABLED_DEFAULT = os.getenv("GLX_CONTENT_FILTER_ENABLED", "true").lower() == "true"
 
 SPAM_WINDOW_SECONDS = int(os.getenv("GLX_SPAM_WINDOW_SECONDS", "7"))
 SPAM_MAX_MESSAGES = int(os.getenv("GLX_SPAM_MAX_MESSAGES", "7"))
+# Ring size per tracked user; also the highest per-guild spam limit that can be configured.
+SPAM_TRACKER_CAPACITY = max(SPAM_MAX_MESSAGES, int(os.getenv("GLX_SPAM_TRACKER_CAPACITY", "15")))
+SPAM_TRACKER_IDLE_SECONDS = int(os.getenv("GLX_SPAM_TRACKER_IDLE_SECONDS", "300"))
+SPAM_TRACKER_MAX_KEYS = int(os.getenv("GLX_SPAM_TRACKER_MAX_KEYS", "200000"))
 
 AUTO_MUTE_SECONDS = int(os.getenv("GLX_AUTOMUTE_SECONDS", str(10 * 60)))
 
+ENFORCE_CONCURRENCY = int(os.getenv("GLX_ENFORCE_CONCURRENCY", "8"))
+ENFORCE_QUEUE_SIZE = int(os.getenv("GLX_ENFORCE_QUEUE_SIZE", "1000"))
+ENFORCE_WORKER_IDLE_SECONDS = int(os.getenv("GLX_ENFORCE_WORKER_IDLE_SECONDS", "60"))
+
+# Outbound REST scheduler: calls in flight overall and per guild, the global
+# Discord budget (requests/second) and the share of it log/cosmetic calls may use.
+REST_CONCURRENCY = int(os.getenv("GLX_REST_CONCURRENCY", "16"))
+REST_GUILD_CONCURRENCY = int(os.getenv("GLX_REST_GUILD_CONCURRENCY", "4"))
+REST_GLOBAL_PER_SECOND = int(os.getenv("GLX_REST_GLOBAL_PER_SECOND", "50"))
+REST_LOW_PRIORITY_SHARE = float(os.getenv("GLX_REST_LOW_PRIORITY_SHARE", "0.6"))
+# Departed members, deleted messages/channels remembered so queued calls against them are dropped.
+REST_GONE_MAX = int(os.getenv("GLX_REST_GONE_MAX", "20000"))
+
 RAID_WINDOW_SECONDS = int(os.getenv("GLX_RAID_WINDOW_SECONDS", "10"))
 RAID_JOIN_THRESHOLD = int(os.getenv("GLX_RAID_JOIN_THRESHOLD", "6"))
 RAID_LOCK_MINUTES = int(os.getenv("GLX_RAID_LOCK_MINUTES", "10"))
+RAID_COOLDOWN_SECONDS = int(os.getenv("GLX_RAID_COOLDOWN_SECONDS", "300"))
+RAID_LOCK_MODE = os.getenv("GLX_RAID_LOCK_MODE", "role").lower()   # "role" or "channels"
+RAID_LOCK_CONCURRENCY = int(os.getenv("GLX_RAID_LOCK_CONCURRENCY", "5"))
 
 MENTION_THRESHOLD = int(os.getenv("GLX_MENTION_THRESHOLD", "8"))
 
 AUTOMOD_MAX_RULES = int(os.getenv("GLX_AUTOMOD_MAX_RULES", "80"))
-AUTOMOD_KEYWORD_RULES = int(os.getenv("GLX_AUTOMOD_KEYWORD_RULES", "60"))
+AUTOMOD_KEYWORD_RULES = int(os.getenv("GLX_AUTOMOD_KEYWORD_RULES", "6"))
 AUTOMOD_MENTION_LIMIT = int(os.getenv("GLX_AUTOMOD_MENTION_LIMIT", "6"))
+AUTOMOD_SYNC_CONCURRENCY = int(os.getenv("GLX_AUTOMOD_SYNC_CONCURRENCY", "4"))
+
+JOB_CONCURRENCY = int(os.getenv("GLX_JOB_CONCURRENCY", "4"))
+JOB_HISTORY = int(os.getenv("GLX_JOB_HISTORY", "50"))
 
 WARN_THRESHOLD = int(os.getenv("GLX_WARN_THRESHOLD", "5"))
 WARN_MUTE_MINUTES = int(os.getenv("GLX_WARN_MUTE_MINUTES", "90"))
@@ -47,6 +114,15 @@ INVITE_PATTERNS = (
     "discordapp.com/invite/",
 )
 
+
+def _csv_env(name: str) -> tuple:
+    raw = os.getenv(name, "")
+    return tuple(p.strip().lower() for p in raw.split(",") if p.strip())
+
+
+BLOCKED_KEYWORDS = _csv_env("GLX_BLOCKED_KEYWORDS")
+BLOCKED_LINK_PATTERNS = _csv_env("GLX_BLOCKED_LINKS")
+
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
@@ -1,15 +1,92 @@
+from typing import List, Optional
+
+import discord
+import yarl
 from discord.ext import commands
 
-from .config import PREFIX, intents
+from .config import PREFIX, intents, DISCORD_API_BASE, DISCORD_GATEWAY_URL
 from .events import register_events
 from .commands_moderation import register_moderation_commands
 from .commands_protection import register_protection_commands
 from .commands_community import register_community_commands
 from .commands_access import register_access_commands
+from .enforcement import enforcer
+from .security import log_sink
+from .store import state_store
+from .cases import case_journal
+from .jobs import job_scheduler
+from .shards import shard_link
+from .metrics import http_trace, watch_bot, loop_lag
+from .shedding import shedder
+from .rest import rest_scheduler
+
+
+def apply_endpoint_overrides():
+    """Send REST and gateway traffic to GLX_DISCORD_API_BASE / GLX_DISCORD_GATEWAY when set.
+
+    The API base includes the version, e.g. `http://127.0.0.1:8790/api/v10`.
+    """
+    if DISCORD_API_BASE:
+        discord.http.Route.BASE = DISCORD_API_BASE
+    if DISCORD_GATEWAY_URL:
+        discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(DISCORD_GATEWAY_URL)
+
+
+class _GLXLifecycle:
+    """Startup/shutdown shared by the plain and the auto-sharded bot."""
+
+    async def setup_hook(self):
+        state_store.start()
+        case_journal.start()
+        shard_link.start(self)
+        loop_lag.start()
+
+    async def close(self):
+        # Let queued enforcement and logs finish while the HTTP session is still open.
+        await enforcer.drain()
+        await job_scheduler.close()
+        await shedder.close()
+        await log_sink.close()
+        await state_store.close()
+        await case_journal.close()
+        await shard_link.close()
+        await loop_lag.close()
+        await super().close()
+
+
+class GLXBot(_GLXLifecycle, commands.Bot):
+    pass
+
+
+class GLXShardedBot(_GLXLifecycle, commands.AutoShardedBot):
+    pass
+
 
+def create_bot(
+    shard_count: Optional[int] = None,
+    shard_ids: Optional[List[int]] = None,
+    sharded: bool = False,
+) -> commands.Bot:
+    """Build the bot; `sharded` (or any shard option) selects AutoShardedBot.
 
-def create_bot() -> commands.Bot:
-    bot = commands.Bot(command_prefix=PREFIX, intents=intents, help_command=None)
+    `shard_count=None` with `sharded=True` lets Discord pick the count.
+    `shard_ids` restricts this process to a subset of the shards.
+    """
+    apply_endpoint_overrides()
+    trace = http_trace()
+    rest_scheduler.attach(trace)
+    if sharded or shard_count is not None or shard_ids is not None:
+        bot = GLXShardedBot(
+            command_prefix=PREFIX,
+            intents=intents,
+            help_command=None,
+            shard_count=shard_count,
+            shard_ids=shard_ids,
+            http_trace=trace,
+        )
+    else:
+        bot = GLXBot(command_prefix=PREFIX, intents=intents, help_command=None, http_trace=trace)
+    watch_bot(bot)
     register_events(bot)
     register_moderation_commands(bot)
     register_protection_commands(bot)
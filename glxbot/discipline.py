@@ -3,18 +3,26 @@ from typing import Dict
 
 import discord
 
-from .config import WARN_THRESHOLD, WARN_MUTE_MINUTES
 from .state import STATS, GUILD_STATS, log
 from .security import log_event, timeout_member, format_seconds
+from .store import state_store
+from .cases import case_journal
+from .settings import guild_settings
 
 
 WARNS: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
 
 
+def record_warn(guild_id: int, user_id: int) -> int:
+    gdict = WARNS[guild_id]
+    gdict[user_id] += 1
+    state_store.save_warn(guild_id, user_id, gdict[user_id])
+    return gdict[user_id]
+
+
 async def add_warn(guild: discord.Guild, member: discord.Member, reason: str, source: str = "AUTO"):
-    gdict = WARNS[guild.id]
-    gdict[member.id] += 1
-    count = gdict[member.id]
+    count = record_warn(guild.id, member.id)
+    settings = guild_settings.get(guild.id)
 
     try:
         await log_event(
@@ -22,13 +30,13 @@ async def add_warn(guild: discord.Guild, member: discord.Member, reason: str, so
             "Warn Issued",
             f"{member.mention} received a warn (`{source}`).\n"
             f"Reason: {reason}\n"
-            f"Total warns: `{count}/{WARN_THRESHOLD}`.",
+            f"Total warns: `{count}/{settings.warn_threshold}`.",
         )
     except Exception:
         pass
 
-    if count >= WARN_THRESHOLD:
-        minutes = WARN_MUTE_MINUTES
+    if count >= settings.warn_threshold:
+        minutes = settings.warn_mute_minutes
         ok = await timeout_member(
             member,
             minutes,
@@ -37,6 +45,13 @@ async def add_warn(guild: discord.Guild, member: discord.Member, reason: str, so
         if ok:
             STATS["timeouts"] += 1
             GUILD_STATS[guild.id]["timeouts"] += 1
+            case_journal.record(
+                guild.id,
+                member.id,
+                "timeout",
+                f"Warn threshold reached ({count}) • muted for {format_seconds(minutes * 60)}",
+                source="auto",
+            )
             try:
                 await log_event(
                     guild,
@@ -56,4 +71,6 @@ def get_warn_count(guild_id: int, user_id: int) -> int:
 def clear_warns(guild_id: int, user_id: int) -> int:
     gdict = WARNS[guild_id]
     old = gdict.pop(user_id, 0)
+    if old:
+        state_store.save_warn(guild_id, user_id, 0)
     return old
@@ -0,0 +1,262 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+from .config import (
+    ENFORCE_CONCURRENCY,
+    ENFORCE_QUEUE_SIZE,
+    ENFORCE_WORKER_IDLE_SECONDS,
+)
+from .state import log, STATS, GUILD_STATS, mark_changed
+from .security import timeout_member, log_event, format_seconds
+from .discipline import record_warn
+from .cases import case_journal
+from .settings import guild_settings
+from .metrics import enforcement_actions
+from .rest import rest_scheduler, TargetGone, PRIORITY_ENFORCE
+
+# Log colours from most to least severe; a verdict is logged in the most
+# severe colour among its flags (no explicit colour means red).
+_COLOUR_SEVERITY = (discord.Color.red(), discord.Color.orange(), discord.Color.blue())
+
+
+def _severity(colour) -> int:
+    try:
+        return _COLOUR_SEVERITY.index(colour)
+    except ValueError:
+        return len(_COLOUR_SEVERITY)
+
+
+class Verdict:
+    """Everything the detectors decided about one message.
+
+    Each detector that trips calls `flag()`; the merged verdict then results
+    in at most one delete, one warn, one timeout (the longest requested) and
+    one log entry, however many rules matched.
+    """
+
+    __slots__ = (
+        "message",
+        "delete",
+        "sources",
+        "findings",
+        "timeout_seconds",
+        "timeout_reasons",
+        "log_colour",
+        "queued_at",
+    )
+
+    def __init__(self, message: discord.Message):
+        self.message = message
+        self.delete = False
+        self.sources: List[str] = []
+        self.findings: List[Tuple[str, str]] = []
+        self.timeout_seconds = 0
+        self.timeout_reasons: List[str] = []
+        self.log_colour = None
+        self.queued_at = 0.0
+
+    def __bool__(self) -> bool:
+        return bool(self.findings)
+
+    def flag(
+        self,
+        source: str,
+        title: str,
+        detail: str,
+        timeout_seconds: int = 0,
+        timeout_reason: Optional[str] = None,
+        colour=None,
+        delete: bool = True,
+    ):
+        self.sources.append(source)
+        self.findings.append((title, detail))
+        self.delete = self.delete or delete
+        if timeout_seconds:
+            self.timeout_seconds = max(self.timeout_seconds, timeout_seconds)
+            if timeout_reason:
+                self.timeout_reasons.append(timeout_reason)
+        colour = colour or discord.Color.red()
+        if self.log_colour is None or _severity(colour) < _severity(self.log_colour):
+            self.log_colour = colour
+
+
+async def execute_verdict(verdict: Verdict):
+    message = verdict.message
+    guild = message.guild
+    member = message.author
+    actions = []
+    timed_out = False
+
+    if verdict.delete:
+        try:
+            await rest_scheduler.call(
+                PRIORITY_ENFORCE, guild.id, message.delete, target=("message", message.id),
+            )
+            actions.append("message deleted")
+            enforcement_actions.inc("delete", "ok")
+        except TargetGone:
+            enforcement_actions.inc("delete", "gone")
+        except Exception:
+            enforcement_actions.inc("delete", "failed")
+
+    source = "+".join(verdict.sources)
+    count = record_warn(guild.id, member.id)
+    settings = guild_settings.get(guild.id)
+    actions.append(f"warn `{source}` ({count}/{settings.warn_threshold})")
+    enforcement_actions.inc("warn", "ok")
+
+    timeout_seconds = verdict.timeout_seconds
+    reasons = list(verdict.timeout_reasons)
+    if count >= settings.warn_threshold and settings.warn_mute_minutes * 60 > timeout_seconds:
+        timeout_seconds = settings.warn_mute_minutes * 60
+        reasons.append(f"warn threshold reached ({count})")
+
+    if timeout_seconds:
+        ok = await timeout_member(
+            member,
+            timeout_seconds / 60.0,
+            "GLX Protection • " + ", ".join(reasons or ["automatic timeout"]),
+        )
+        if ok:
+            STATS["timeouts"] += 1
+            GUILD_STATS[guild.id]["timeouts"] += 1
+            mark_changed()
+            timed_out = True
+            actions.append(f"timed out for {format_seconds(timeout_seconds)}")
+            enforcement_actions.inc("timeout", "ok")
+        else:
+            actions.append("timeout failed")
+            enforcement_actions.inc("timeout", "failed")
+
+    title = " + ".join(dict.fromkeys(t for t, _ in verdict.findings))
+    case_journal.record(
+        guild.id,
+        member.id,
+        "timeout" if timed_out else "warn",
+        f"{title}: " + " • ".join(actions),
+        source="auto",
+    )
+    lines = [detail for _, detail in verdict.findings]
+    lines.append(f"{member.mention} in {message.channel.mention}: " + " • ".join(actions) + ".")
+    await log_event(guild, title, "\n".join(lines), colour=verdict.log_colour)
+
+
+class EnforcementQueue:
+    """Per-guild FIFO of verdicts drained by one worker task per guild.
+
+    Detectors call `submit()` and return immediately; the REST calls of a
+    verdict run in the guild's worker. A global semaphore bounds how many
+    verdicts execute at once across all guilds, and workers exit after
+    `idle_timeout` seconds without work.
+    """
+
+    def __init__(self, concurrency: int, max_queue: int, idle_timeout: float):
+        self.max_queue = max(int(max_queue), 1)
+        self.idle_timeout = float(idle_timeout)
+        self._concurrency = max(int(concurrency), 1)
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._latencies = deque(maxlen=1024)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.in_flight = 0
+
+    def submit(self, verdict: Verdict) -> bool:
+        gid = verdict.message.guild.id
+        queue = self._queues.get(gid)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.max_queue)
+            self._queues[gid] = queue
+        if queue.full():
+            self.dropped += 1
+            enforcement_actions.inc("verdict", "dropped")
+            log.warning("[GLX] Enforcement queue full for guild %s; verdict dropped.", gid)
+            return False
+        verdict.queued_at = time.perf_counter()
+        queue.put_nowait(verdict)
+        self.submitted += 1
+        worker = self._workers.get(gid)
+        if worker is None or worker.done():
+            self._workers[gid] = asyncio.get_running_loop().create_task(self._worker(gid, queue))
+        return True
+
+    async def _worker(self, gid: int, queue: asyncio.Queue):
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._concurrency)
+        while True:
+            try:
+                verdict = await asyncio.wait_for(queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                if queue.empty():
+                    self._workers.pop(gid, None)
+                    self._queues.pop(gid, None)
+                    return
+                continue
+            async with self._sem:
+                self.in_flight += 1
+                try:
+                    await execute_verdict(verdict)
+                    self.completed += 1
+                except Exception as e:
+                    self.failed += 1
+                    enforcement_actions.inc("verdict", "failed")
+                    log.warning("[GLX] Enforcement action failed in guild %s: %s", gid, e)
+                finally:
+                    self.in_flight -= 1
+                    self._latencies.append(time.perf_counter() - verdict.queued_at)
+                    queue.task_done()
+
+    def depth(self, guild_id: Optional[int] = None) -> int:
+        if guild_id is not None:
+            queue = self._queues.get(guild_id)
+            return queue.qsize() if queue else 0
+        return sum(q.qsize() for q in self._queues.values())
+
+    def depths(self) -> Dict[int, int]:
+        """Queue depth per guild with work waiting."""
+        return {gid: q.qsize() for gid, q in self._queues.items() if q.qsize()}
+
+    async def drain(self, timeout: float = 10.0):
+        """Wait for queued verdicts to finish (used on shutdown)."""
+        pending = [q.join() for q in list(self._queues.values())]
+        if not pending:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*pending), timeout)
+        except asyncio.TimeoutError:
+            log.warning("[GLX] Enforcement drain timed out with %s verdict(s) left.", self.depth())
+
+    def stats(self, guild_id: Optional[int] = None) -> Dict[str, float]:
+        lat = sorted(self._latencies)
+
+        def pct(p):
+            if not lat:
+                return 0.0
+            return round(lat[min(int(p * len(lat)), len(lat) - 1)] * 1000, 2)
+
+        return {
+            "queue_depth": self.depth(guild_id),
+            "active_workers": len(self._workers),
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "latency_p50_ms": pct(0.50),
+            "latency_p99_ms": pct(0.99),
+            "latency_max_ms": round(lat[-1] * 1000, 2) if lat else 0.0,
+        }
+
+
+enforcer = EnforcementQueue(
+    concurrency=ENFORCE_CONCURRENCY,
+    max_queue=ENFORCE_QUEUE_SIZE,
+    idle_timeout=ENFORCE_WORKER_IDLE_SECONDS,
+)
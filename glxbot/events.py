@@ -1,52 +1,48 @@
-import time
 from datetime import datetime
-import asyncio
 
 import discord
 from discord.ext import commands
 
-from .config import (
-    PREFIX,
-    GAME_STATUS,
-    SPAM_WINDOW_SECONDS,
-    SPAM_MAX_MESSAGES,
-    AUTO_MUTE_SECONDS,
-    RAID_WINDOW_SECONDS,
-    RAID_JOIN_THRESHOLD,
-    RAID_LOCK_MINUTES,
-    MENTION_THRESHOLD,
-    INVITE_PATTERNS,
-)
+from .config import PREFIX, GAME_STATUS
 from .state import (
     log,
     BANNER,
     STATS,
     GUILD_STATS,
-    FEATURES,
-    user_messages,
-    guild_joins,
-    traffic_points,
     SUGGESTION_CHANNELS,
     WELCOME_CHANNELS,
     WELCOME_MESSAGES,
     DEFAULT_WELCOME_TEMPLATE,
-    WHITELIST,
+    mark_changed,
 )
 from .security import (
-    timeout_member,
-    set_raid_lock,
     log_event,
-    format_seconds,
     uptime_str,
-    is_whitelisted,
+    remember_log_channel,
+    forget_log_channel,
+    clear_log_channel_failure,
+    forget_guild_log_channel,
 )
-from .discipline import add_warn
-from .automod_sync import sync_automod
+from .enforcement import enforcer, Verdict
+from .tracker import spam_tracker
+from .raid import raid_monitor
+from .traffic import traffic
+from .members import member_index
+from .exemptions import exemptions
+from .settings import guild_settings
+from .automod_sync import automod_reconciler, schedule_automod_sync
 from .auth import get_license_info
+from .metrics import timed_handler
+from .shedding import shedder
+from .rest import rest_scheduler, PRIORITY_COSMETIC
 
 
 def register_events(bot: commands.Bot):
-    @bot.event
+    def event(coro):
+        # Every handler lands in glx_handler_seconds, labelled without the `on_` prefix.
+        return bot.event(timed_handler(coro.__name__[3:], coro))
+
+    @event
     async def on_ready():
         log.info(BANNER)
         log.info("Logged in as %s (%s)", bot.user, bot.user.id)
@@ -60,14 +56,24 @@ def register_events(bot: commands.Bot):
         except Exception as e:
             log.warning("Failed to set presence: %s", e)
 
+        spam_tracker.start_sweeper()
+
         for g in bot.guilds:
             log.info("Connected to guild: %s (%s)", g.name, g.id)
-            if FEATURES.get("automod", True):
-                bot.loop.create_task(sync_automod(bot, g, FEATURES))
+            member_index.build(g)
+        # on_ready also fires after reconnects; the scheduler skips guilds that
+        # are still queued and warm guilds cost no requests.
+        automod_guilds = [g for g in bot.guilds if guild_settings.get(g.id).automod]
+        if automod_guilds:
+            job = schedule_automod_sync(bot, automod_guilds)
+            log.info("[GLX] AutoMod sync job %s queued for %s guild(s).", job.id, job.total)
 
-    @bot.event
+    @event
     async def on_guild_join(guild: discord.Guild):
         log.info("Joined new guild: %s (%s)", guild.name, guild.id)
+        rest_scheduler.revive("guild", guild.id)
+        member_index.build(guild)
+        mark_changed()
         await log_event(
             guild,
             "GLX Protection Online",
@@ -75,183 +81,209 @@ def register_events(bot: commands.Bot):
             f"Prefix: `{PREFIX}` • Try `{PREFIX}help`.",
             colour=discord.Color.green(),
         )
-        if FEATURES.get("automod", True):
-            bot.loop.create_task(sync_automod(bot, guild, FEATURES))
+        if guild_settings.get(guild.id).automod:
+            schedule_automod_sync(bot, [guild])
+
+    @event
+    async def on_guild_remove(guild: discord.Guild):
+        log.info("Removed from guild: %s (%s)", guild.name, guild.id)
+        spam_tracker.forget_guild(guild.id)
+        raid_monitor.clear(guild.id)
+        traffic.forget_guild(guild.id)
+        member_index.forget(guild.id)
+        exemptions.forget(guild.id)
+        automod_reconciler.forget(guild.id)
+        forget_guild_log_channel(guild.id)
+        rest_scheduler.mark_gone("guild", guild.id)
+        rest_scheduler.forget_guild(guild.id)
+        mark_changed()
+
+    @event
+    async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+        remember_log_channel(channel)
+
+    @event
+    async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+        forget_log_channel(channel)
+        rest_scheduler.mark_gone("channel", channel.id)
+
+    @event
+    async def on_guild_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        if before.name != after.name:
+            forget_log_channel(before)
+        remember_log_channel(after)
 
-    @bot.event
+    @event
+    async def on_automod_rule_create(rule: discord.AutoModRule):
+        automod_reconciler.cache.put(rule.guild.id, rule.to_dict())
+
+    @event
+    async def on_automod_rule_update(rule: discord.AutoModRule):
+        automod_reconciler.cache.put(rule.guild.id, rule.to_dict())
+
+    @event
+    async def on_automod_rule_delete(rule: discord.AutoModRule):
+        automod_reconciler.cache.remove(rule.guild.id, rule.id)
+
+    @event
+    async def on_guild_role_create(role: discord.Role):
+        exemptions.on_role_change(role.guild.id, (role.id,), administrator=role.permissions.administrator)
+
+    @event
+    async def on_guild_role_delete(role: discord.Role):
+        exemptions.on_role_change(role.guild.id, (role.id,))
+
+    @event
+    async def on_guild_role_update(before: discord.Role, after: discord.Role):
+        # Our permissions may have changed; allow a fresh log channel attempt.
+        clear_log_channel_failure(after.guild.id)
+        exemptions.on_role_change(
+            after.guild.id,
+            (),
+            administrator=before.permissions.administrator != after.permissions.administrator,
+        )
+
+    @event
+    async def on_member_update(before: discord.Member, after: discord.Member):
+        if bot.user is not None and after.id == bot.user.id:
+            clear_log_channel_failure(after.guild.id)
+        if before.roles != after.roles:
+            exemptions.refresh_member(after)
+
+    @event
+    async def on_guild_update(before: discord.Guild, after: discord.Guild):
+        if before.owner_id != after.owner_id:
+            exemptions.invalidate(after.id)
+
+    @event
+    async def on_guild_available(guild: discord.Guild):
+        # Cache was refilled after an outage; recount once.
+        member_index.build(guild)
+        exemptions.invalidate(guild.id)
+
+    @event
+    async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+        member_index.remove(payload.guild_id, payload.user.bot)
+        exemptions.discard_member(payload.guild_id, payload.user.id)
+        rest_scheduler.mark_gone("member", payload.guild_id, payload.user.id)
+        mark_changed()
+
+    @event
+    async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+        rest_scheduler.mark_gone("message", payload.message_id)
+
+    @event
+    async def on_raw_bulk_message_delete(payload: discord.RawBulkMessageDeleteEvent):
+        for message_id in payload.message_ids:
+            rest_scheduler.mark_gone("message", message_id)
+
+    @event
+    async def on_command_completion(ctx: commands.Context):
+        # Commands bump counters and flip features after on_message has run.
+        mark_changed()
+
+    @event
     async def on_message(message: discord.Message):
         if message.author.bot or not message.guild:
             return
 
         STATS["messages_seen"] += 1
         GUILD_STATS[message.guild.id]["messages_seen"] += 1
-        traffic_points.append(time.time())
+        traffic.record(message.guild.id)
+        mark_changed()
 
-        if is_whitelisted(message.author, WHITELIST):
+        if exemptions.is_exempt(message.author):
             await bot.process_commands(message)
             return
 
-        if FEATURES.get("anti_spam", True):
-            now = time.time()
-            dq = user_messages[message.author.id]
-            dq.append(now)
-            cutoff = now - SPAM_WINDOW_SECONDS
-            while dq and dq[0] < cutoff:
-                dq.popleft()
+        settings = guild_settings.get(message.guild.id)
+        verdict = Verdict(message)
+
+        if settings.anti_spam:
+            recent = spam_tracker.hit(message.guild.id, message.author.id, window=settings.spam_window_seconds)
 
-            if len(dq) >= SPAM_MAX_MESSAGES:
+            if recent >= settings.spam_max_messages:
                 STATS["spam_flags"] += 1
                 GUILD_STATS[message.guild.id]["spam_flags"] += 1
-
-                await add_warn(
-                    message.guild,
-                    message.author,
-                    "Auto warn: spam detected by GLX.",
-                    source="SPAM",
+                verdict.flag(
+                    "SPAM",
+                    "Anti-Spam",
+                    f"Sent {recent} messages in {settings.spam_window_seconds}s.",
+                    timeout_seconds=settings.auto_mute_seconds,
+                    timeout_reason="spam detected",
                 )
+                spam_tracker.reset(message.guild.id, message.author.id)
 
-                try:
-                    await message.delete()
-                except Exception:
-                    pass
-
-                duration_sec = AUTO_MUTE_SECONDS
-                ok = await timeout_member(
-                    message.author,
-                    duration_sec / 60.0,
-                    "GLX Protection • spam detected",
-                )
-                if ok:
-                    STATS["timeouts"] += 1
-                    GUILD_STATS[message.guild.id]["timeouts"] += 1
-                    await log_event(
-                        message.guild,
-                        "Anti-Spam",
-                        f"{message.author.mention} was auto-timed out for "
-                        f"{format_seconds(duration_sec)} after sending "
-                        f"{len(dq)} messages in {SPAM_WINDOW_SECONDS}s "
-                        f"in {message.channel.mention}.",
-                    )
-                dq.clear()
+        content_hits = settings.content_scanner.scan(message.content)
 
-        if FEATURES.get("anti_invites", True):
-            content_lower = message.content.lower()
-            if any(p in content_lower for p in INVITE_PATTERNS):
-                try:
-                    await message.delete()
-                except Exception:
-                    pass
+        if settings.anti_invites:
+            if content_hits.get("invite"):
                 STATS["invites_blocked"] += 1
                 GUILD_STATS[message.guild.id]["invites_blocked"] += 1
-
-                await add_warn(
-                    message.guild,
-                    message.author,
-                    "Auto warn: invite link blocked by GLX.",
-                    source="INVITE",
+                verdict.flag(
+                    "INVITE",
+                    "Anti-Invites",
+                    "Posted a Discord invite link.",
+                    colour=discord.Color.blue(),
                 )
 
-                await log_event(
-                    message.guild,
-                    "Anti-Invites",
-                    f"Deleted invite link from {message.author.mention} in {message.channel.mention}.",
+        if settings.content_filter:
+            blocked = content_hits.get("keyword", []) + content_hits.get("link", [])
+            if blocked:
+                STATS["content_blocked"] += 1
+                GUILD_STATS[message.guild.id]["content_blocked"] += 1
+                verdict.flag(
+                    "CONTENT",
+                    "Content Filter",
+                    f"Matched: {', '.join(f'`{p}`' for p in blocked[:5])}",
                     colour=discord.Color.blue(),
                 )
 
-        if FEATURES.get("anti_mentions", True):
+        if settings.anti_mentions:
             mention_count = len(message.mentions) + (1 if message.mention_everyone else 0)
-            if mention_count >= MENTION_THRESHOLD:
-                try:
-                    await message.delete()
-                except Exception:
-                    pass
+            if mention_count >= settings.mention_threshold:
                 STATS["mentions_flagged"] += 1
                 GUILD_STATS[message.guild.id]["mentions_flagged"] += 1
-
-                await add_warn(
-                    message.guild,
-                    message.author,
-                    f"Auto warn: mention flood ({mention_count} mentions) detected by GLX.",
-                    source="MENTION",
+                verdict.flag(
+                    "MENTION",
+                    "Anti-Mentions",
+                    f"Mentioned {mention_count} users in one message.",
+                    timeout_seconds=settings.auto_mute_seconds,
+                    timeout_reason="mention flood detected",
+                    colour=discord.Color.orange(),
                 )
 
-                duration_sec = AUTO_MUTE_SECONDS
-                ok = await timeout_member(
-                    message.author,
-                    duration_sec / 60.0,
-                    "GLX Protection • mention flood detected",
-                )
-                if ok:
-                    STATS["timeouts"] += 1
-                    GUILD_STATS[message.guild.id]["timeouts"] += 1
-                    await log_event(
-                        message.guild,
-                        "Anti-Mentions",
-                        f"{message.author.mention} was auto-timed out for "
-                        f"{format_seconds(duration_sec)} after mentioning "
-                        f"{mention_count} users in {message.channel.mention}.",
-                        colour=discord.Color.orange(),
-                    )
+        if verdict:
+            enforcer.submit(verdict)
 
         await bot.process_commands(message)
 
-    @bot.event
+    @event
     async def on_member_join(member: discord.Member):
         if not member.guild:
             return
         STATS["joins_seen"] += 1
         GUILD_STATS[member.guild.id]["joins_seen"] += 1
+        member_index.add(member.guild.id, member.bot)
+        rest_scheduler.revive("member", member.guild.id, member.id)
+        exemptions.refresh_member(member)
+        mark_changed()
 
-        if FEATURES.get("anti_raid", True):
-            now = time.time()
-            dq = guild_joins[member.guild.id]
-            dq.append(now)
-            cutoff = now - RAID_WINDOW_SECONDS
-            while dq and dq[0] < cutoff:
-                dq.popleft()
-
-            if len(dq) >= RAID_JOIN_THRESHOLD:
-                STATS["raids_detected"] += 1
-                GUILD_STATS[member.guild.id]["raids_detected"] += 1
-                changed = await set_raid_lock(
-                    member.guild,
-                    True,
-                    "GLX Protection • suspected join raid",
-                )
-                await log_event(
-                    member.guild,
-                    "Raid Lockdown",
-                    f"Detected {len(dq)} joins in {RAID_WINDOW_SECONDS}s.\n"
-                    f"Raid lockdown enabled on {changed} channels for "
-                    f"{RAID_LOCK_MINUTES}m.",
-                    colour=discord.Color.orange(),
-                )
-
-                async def auto_unlock():
-                    await asyncio.sleep(RAID_LOCK_MINUTES * 60)
-                    unlocked = await set_raid_lock(
-                        member.guild,
-                        False,
-                        "GLX Protection • auto unlock after raid",
-                    )
-                    if unlocked:
-                        await log_event(
-                            member.guild,
-                            "Raid Unlock",
-                            "Raid window passed. Channels unlocked automatically.",
-                            colour=discord.Color.green(),
-                        )
-
-                asyncio.create_task(auto_unlock())
+        settings = guild_settings.get(member.guild.id)
+        if settings.anti_raid:
+            await raid_monitor.on_join(member.guild, settings=settings)
 
         gid = member.guild.id
         ch_id = WELCOME_CHANNELS.get(gid)
-        if ch_id:
+        # A late welcome is worthless, so under load it is dropped rather than queued.
+        if ch_id and not shedder.skip("welcome", member.guild):
             channel = member.guild.get_channel(ch_id)
             if channel:
                 template = WELCOME_MESSAGES.get(gid, DEFAULT_WELCOME_TEMPLATE)
                 text = template.replace("{member}", member.mention).replace("{server}", member.guild.name)
                 try:
-                    await channel.send(text)
+                    await rest_scheduler.call(
+                        PRIORITY_COSMETIC, gid, lambda: channel.send(text), target=("member", gid, member.id),
+                    )
                 except Exception:
                     pass
@@ -0,0 +1,162 @@
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import discord
+
+from .store import state_store
+
+# Guild id the pre-per-guild whitelist rows are kept under; they apply everywhere.
+GLOBAL_GUILD_ID = 0
+
+
+class ExemptionIndex:
+    """Per-guild set of member ids that bypass GLX protections.
+
+    A member is exempt when they own the guild, hold a role with
+    Administrator, hold a whitelisted role, or are whitelisted themselves.
+    The set is built once per guild (lazily, on first lookup) and kept
+    current from gateway events: joins and member role changes patch a
+    single entry, while role permission/owner changes rebuild the guild.
+    Members missing from the guild's cache at build time are checked by
+    role on first sighting and added then.
+    """
+
+    def __init__(self):
+        self._users: Dict[int, Set[int]] = {}    # guild id -> whitelisted user ids
+        self._roles: Dict[int, Set[int]] = {}    # guild id -> whitelisted role ids
+        self._exempt: Dict[int, Set[int]] = {}   # guild id -> exempt member ids
+        self._exempt_roles: Dict[int, Set[int]] = {}   # guild id -> admin + whitelisted role ids
+        self.builds = 0
+
+    # ---- whitelist ---------------------------------------------------------
+
+    def load(self, guild_id: int, kind: str, target_id: int):
+        """Restore a persisted whitelist entry at startup."""
+        table = self._users if kind == "user" else self._roles
+        table.setdefault(guild_id, set()).add(target_id)
+
+    def entries(self, guild_id: int) -> Tuple[Set[int], Set[int]]:
+        """(user ids, role ids) whitelisted in the guild, including global user entries."""
+        users = self._users.get(guild_id, set()) | self._users.get(GLOBAL_GUILD_ID, set())
+        return users, set(self._roles.get(guild_id, ()))
+
+    def whitelist_user(self, guild_id: int, user_id: int):
+        self._users.setdefault(guild_id, set()).add(user_id)
+        state_store.save_whitelist(guild_id, "user", user_id, True)
+        exempt = self._exempt.get(guild_id)
+        if exempt is not None:
+            exempt.add(user_id)
+
+    def unwhitelist_user(self, guild_id: int, user_id: int) -> bool:
+        """Remove a user entry (the guild's, and a global one); False if there was none."""
+        removed = False
+        for gid in (guild_id, GLOBAL_GUILD_ID):
+            users = self._users.get(gid)
+            if users and user_id in users:
+                users.discard(user_id)
+                state_store.save_whitelist(gid, "user", user_id, False)
+                removed = True
+        if removed:
+            self.invalidate(guild_id)
+        return removed
+
+    def whitelist_role(self, guild_id: int, role_id: int):
+        self._roles.setdefault(guild_id, set()).add(role_id)
+        state_store.save_whitelist(guild_id, "role", role_id, True)
+        self.invalidate(guild_id)
+
+    def unwhitelist_role(self, guild_id: int, role_id: int) -> bool:
+        roles = self._roles.get(guild_id)
+        if not roles or role_id not in roles:
+            return False
+        roles.discard(role_id)
+        state_store.save_whitelist(guild_id, "role", role_id, False)
+        self.invalidate(guild_id)
+        return True
+
+    # ---- index -------------------------------------------------------------
+
+    def build(self, guild: discord.Guild) -> Set[int]:
+        """Compute the exempt set for a guild from its cached roles and members."""
+        users, roles = self.entries(guild.id)
+        exempt_roles = roles | {r.id for r in guild.roles if r.permissions.administrator}
+        exempt = set(users)
+        if guild.owner_id:
+            exempt.add(guild.owner_id)
+        if exempt_roles:
+            for m in guild.members:
+                if any(r.id in exempt_roles for r in m.roles):
+                    exempt.add(m.id)
+        self._exempt_roles[guild.id] = exempt_roles
+        self._exempt[guild.id] = exempt
+        self.builds += 1
+        return exempt
+
+    def invalidate(self, guild_id: int):
+        """Drop a guild's exempt set; the next lookup rebuilds it."""
+        self._exempt.pop(guild_id, None)
+        self._exempt_roles.pop(guild_id, None)
+
+    def forget(self, guild_id: int):
+        """Bot left the guild: drop the cached set (whitelist entries are kept)."""
+        self.invalidate(guild_id)
+
+    def refresh_member(self, member: discord.Member):
+        """Re-evaluate one member after they joined or their roles changed."""
+        guild = member.guild
+        exempt = self._exempt.get(guild.id)
+        if exempt is None:
+            return
+        exempt_roles = self._exempt_roles[guild.id]
+        users = self._users
+        if (
+            member.id == guild.owner_id
+            or member.id in users.get(guild.id, ())
+            or member.id in users.get(GLOBAL_GUILD_ID, ())
+            or any(r.id in exempt_roles for r in member.roles)
+        ):
+            exempt.add(member.id)
+        else:
+            exempt.discard(member.id)
+
+    def discard_member(self, guild_id: int, user_id: int):
+        """Member left; whitelisted users stay exempt if they come back."""
+        exempt = self._exempt.get(guild_id)
+        if exempt is None:
+            return
+        if user_id not in self._users.get(guild_id, ()) and user_id not in self._users.get(GLOBAL_GUILD_ID, ()):
+            exempt.discard(user_id)
+
+    def on_role_change(self, guild_id: int, role_ids: Iterable[int], administrator: Optional[bool] = None):
+        """Rebuild when a role that matters gained, lost or held Administrator."""
+        if guild_id not in self._exempt:
+            return
+        exempt_roles = self._exempt_roles.get(guild_id, ())
+        if administrator or any(rid in exempt_roles for rid in role_ids):
+            self.invalidate(guild_id)
+
+    def is_exempt(self, member: discord.Member) -> bool:
+        guild = member.guild
+        exempt = self._exempt.get(guild.id)
+        if exempt is None:
+            exempt = self.build(guild)
+        if member.id in exempt:
+            return True
+        # The set only covers members that were cached when it was built;
+        # check the member's own roles before treating them as not exempt.
+        exempt_roles = self._exempt_roles.get(guild.id, ())
+        if member.id == guild.owner_id or any(r.id in exempt_roles for r in member.roles):
+            exempt.add(member.id)
+            return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "guilds_indexed": len(self._exempt),
+            "exempt_members": sum(len(s) for s in self._exempt.values()),
+            "whitelisted_users": sum(len(s) for s in self._users.values()),
+            "whitelisted_roles": sum(len(s) for s in self._roles.values()),
+            "builds": self.builds,
+        }
+
+
+exemptions = ExemptionIndex()
@@ -0,0 +1,207 @@
+import asyncio
+import secrets
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import JOB_CONCURRENCY, JOB_HISTORY
+from .state import log
+
+# Per-guild error messages kept on a job; the failed count is always exact.
+MAX_JOB_ERRORS = 100
+
+
+class Job:
+    """Progress of one batch of per-guild work (e.g. a fleet-wide AutoMod sync)."""
+
+    __slots__ = (
+        "id",
+        "kind",
+        "total",
+        "done",
+        "failed",
+        "errors",
+        "summary",
+        "created_at",
+        "started_at",
+        "finished_at",
+        "_durations",
+    )
+
+    def __init__(self, kind: str, total: int):
+        self.id = secrets.token_hex(6)
+        self.kind = kind
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.errors: Dict[int, str] = {}
+        self.summary: Dict[str, int] = {}
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._durations: List[float] = []
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.done - self.failed
+
+    def _finish_one(self, guild_id: int, elapsed: float, result: Any = None, error: Optional[str] = None):
+        self._durations.append(elapsed)
+        if error is None:
+            self.done += 1
+            if isinstance(result, dict):
+                for k, v in result.items():
+                    if isinstance(v, int):
+                        self.summary[k] = self.summary.get(k, 0) + v
+        else:
+            self.failed += 1
+            if len(self.errors) < MAX_JOB_ERRORS:
+                self.errors[guild_id] = error
+        self._check_finished()
+
+    def _check_finished(self):
+        if self.remaining <= 0 and self.finished_at is None:
+            self.finished_at = time.time()
+
+    def as_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        durations = self._durations
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "state": "finished" if self.finished_at else ("running" if self.started_at else "queued"),
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "remaining": self.remaining,
+            "failed_guilds": {str(gid): err for gid, err in self.errors.items()},
+            "summary": dict(self.summary),
+            "created_at": self.created_at,
+            "queued_ms": round(((self.started_at or end) - self.created_at) * 1000, 1),
+            "elapsed_ms": round((end - (self.started_at or end)) * 1000, 1),
+            "guild_avg_ms": round(sum(durations) / len(durations) * 1000, 1) if durations else 0.0,
+            "guild_max_ms": round(max(durations) * 1000, 1) if durations else 0.0,
+        }
+
+
+class _Item:
+    __slots__ = ("key", "run", "jobs")
+
+    def __init__(self, key: Tuple[str, int], run: Callable[[int], Awaitable[Any]], job: Job):
+        self.key = key
+        self.run = run
+        self.jobs = [job]
+
+
+class JobScheduler:
+    """FIFO of (kind, guild) work items drained by at most `concurrency` workers.
+
+    Submitting a guild whose item of the same kind is still queued does not
+    queue it again: the new job is attached to the queued item, which then
+    runs with the newest callback and reports to both jobs. Finished jobs are
+    kept (up to `history`) so callers can look up the outcome by id.
+    """
+
+    def __init__(self, concurrency: int, history: int):
+        self.concurrency = max(int(concurrency), 1)
+        self.history = max(int(history), 1)
+        self._queue: deque = deque()
+        self._queued: Dict[Tuple[str, int], _Item] = {}
+        self._running: Dict[Tuple[str, int], _Item] = {}
+        self._workers: set = set()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._closing = False
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, kind: str, guild_ids: Iterable[int], run: Callable[[int], Awaitable[Any]]) -> Job:
+        guild_ids = list(dict.fromkeys(guild_ids))
+        job = Job(kind, len(guild_ids))
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.finished_at is None:
+                break
+            self._jobs.popitem(last=False)
+
+        for gid in guild_ids:
+            key = (kind, gid)
+            item = self._queued.get(key)
+            if item is not None:
+                item.run = run
+                item.jobs.append(job)
+                self.deduplicated += 1
+                continue
+            item = _Item(key, run, job)
+            self._queued[key] = item
+            self._queue.append(item)
+            self.submitted += 1
+        job._check_finished()
+        self._spawn_workers()
+        return job
+
+    def _spawn_workers(self):
+        if self._closing:
+            return
+        loop = asyncio.get_running_loop()
+        while self._queue and len(self._workers) < self.concurrency:
+            task = loop.create_task(self._worker())
+            self._workers.add(task)
+            task.add_done_callback(self._workers.discard)
+
+    async def _worker(self):
+        while self._queue and not self._closing:
+            item = self._queue.popleft()
+            self._queued.pop(item.key, None)
+            self._running[item.key] = item
+            gid = item.key[1]
+            now = time.time()
+            for job in item.jobs:
+                if job.started_at is None:
+                    job.started_at = now
+            start = time.perf_counter()
+            result = error = None
+            try:
+                result = await item.run(gid)
+                self.completed += 1
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                self.failed += 1
+                log.warning("[GLX] %s job failed for guild %s: %s", item.key[0], gid, error)
+            finally:
+                self._running.pop(item.key, None)
+            elapsed = time.perf_counter() - start
+            for job in item.jobs:
+                job._finish_one(gid, elapsed, result, error)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def close(self):
+        """Drop queued work and wait for the items already running."""
+        self._closing = True
+        while self._queue:
+            item = self._queue.popleft()
+            for job in item.jobs:
+                job._finish_one(item.key[1], 0.0, error="cancelled: shutting down")
+        self._queued.clear()
+        if self._workers:
+            await asyncio.gather(*list(self._workers), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "queued": len(self._queue),
+            "running": len(self._running),
+            "workers": len(self._workers),
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "completed": self.completed,
+            "failed": self.failed,
+            "recent_jobs": list(self._jobs)[-5:],
+        }
+
+
+job_scheduler = JobScheduler(concurrency=JOB_CONCURRENCY, history=JOB_HISTORY)
@@ -0,0 +1,190 @@
+import asyncio
+from collections import Counter, deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+from .state import log
+from .rest import rest_scheduler, PRIORITY_LOG
+
+# Discord limits for a single message.
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+class LogSink:
+    """Per-guild buffer that batches log embeds into as few sends as possible.
+
+    Embeds are flushed every `interval` seconds, or straight away once a guild
+    has a full message worth (10) pending. Each send carries up to 10 embeds.
+    When a guild's backlog grows past `max_pending`, the oldest entries are
+    folded into a digest embed (count per title) instead of being dropped.
+    While `hold()` returns True, periodic flushes are skipped and embeds keep
+    accumulating (and digesting) until it clears.
+    """
+
+    def __init__(
+        self,
+        resolve_channel: Callable[[discord.Guild], Awaitable[Optional[discord.abc.Messageable]]],
+        interval: float,
+        max_pending: int,
+        max_sends_per_flush: int = 5,
+        hold: Optional[Callable[[], bool]] = None,
+    ):
+        self._resolve_channel = resolve_channel
+        self.interval = float(interval)
+        self.max_pending = max(int(max_pending), MAX_EMBEDS_PER_MESSAGE)
+        self.max_sends_per_flush = max(int(max_sends_per_flush), 1)
+        self._hold = hold
+        self._pending: Dict[int, deque] = {}
+        self._overflow: Dict[int, Counter] = {}
+        self._guilds: Dict[int, discord.Guild] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.events = 0
+        self.sent_messages = 0
+        self.sent_embeds = 0
+        self.digested = 0
+        self.failed = 0
+        self.held_flushes = 0
+
+    def submit(self, guild: discord.Guild, embed: discord.Embed):
+        gid = guild.id
+        self._guilds[gid] = guild
+        pending = self._pending.get(gid)
+        if pending is None:
+            pending = self._pending[gid] = deque()
+        pending.append(embed)
+        self.events += 1
+
+        if len(pending) > self.max_pending:
+            oldest = pending.popleft()
+            self._overflow.setdefault(gid, Counter())[oldest.title or "Event"] += 1
+            self.digested += 1
+
+        self._ensure_running()
+        if len(pending) >= MAX_EMBEDS_PER_MESSAGE and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _ensure_running(self):
+        if self._closing or (self._task is not None and not self._task.done()):
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closing:
+                return
+            if self._hold is not None and self._hold():
+                self.held_flushes += 1
+                continue
+            try:
+                await self.flush_all()
+            except Exception as e:
+                log.warning("[GLX] Log sink flush failed: %s", e)
+
+    def pending(self, guild_id: Optional[int] = None) -> int:
+        if guild_id is not None:
+            return len(self._pending.get(guild_id, ()))
+        return sum(len(q) for q in self._pending.values())
+
+    async def flush_all(self, limit: Optional[int] = None):
+        for gid in list(self._pending):
+            await self.flush(gid, limit)
+
+    async def flush(self, guild_id: int, limit: Optional[int] = None):
+        limit = self.max_sends_per_flush if limit is None else limit
+        pending = self._pending.get(guild_id)
+        overflow = self._overflow.pop(guild_id, None)
+        guild = self._guilds.get(guild_id)
+        if guild is None or (not pending and not overflow):
+            self._pending.pop(guild_id, None)
+            return
+
+        ch = await self._resolve_channel(guild)
+        if ch is None:
+            # Nowhere to send; keep the newest entries for the next attempt.
+            if overflow:
+                self._overflow[guild_id] = overflow
+            return
+
+        sends = 0
+        if overflow:
+            if pending is None:
+                pending = self._pending[guild_id] = deque()
+            pending.appendleft(self._digest_embed(overflow))
+        while pending and sends < limit:
+            batch = self._take_batch(pending)
+            try:
+                await rest_scheduler.call(
+                    PRIORITY_LOG, guild_id, lambda: ch.send(embeds=batch), target=("channel", ch.id),
+                )
+                self.sent_messages += 1
+                self.sent_embeds += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                log.debug("[GLX] Failed to send %s log embed(s) in %s: %s", len(batch), guild.name, e)
+            sends += 1
+
+        if not pending:
+            self._pending.pop(guild_id, None)
+            self._guilds.pop(guild_id, None)
+
+    @staticmethod
+    def _take_batch(pending: deque) -> List[discord.Embed]:
+        batch = []
+        chars = 0
+        while pending and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            size = len(pending[0])
+            if batch and chars + size > MAX_EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(pending.popleft())
+            chars += size
+        return batch
+
+    @staticmethod
+    def _digest_embed(counts: Counter) -> discord.Embed:
+        total = sum(counts.values())
+        lines = [f"`{n}` × {title}" for title, n in counts.most_common(20)]
+        if len(counts) > 20:
+            lines.append(f"…and {len(counts) - 20} other event type(s).")
+        return discord.Embed(
+            title="GLX • Log Digest",
+            description=(
+                f"{total} older event(s) were summarised to keep up with log volume.\n"
+                + "\n".join(lines)
+            ),
+            colour=discord.Color.dark_grey(),
+            timestamp=datetime.utcnow(),
+        )
+
+    async def close(self):
+        """Stop the background task and flush everything still buffered."""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            try:
+                await self._task
+            except Exception:
+                pass
+            self._task = None
+        await self.flush_all(limit=self.max_pending)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "events": self.events,
+            "pending": self.pending(),
+            "sent_messages": self.sent_messages,
+            "sent_embeds": self.sent_embeds,
+            "digested": self.digested,
+            "failed": self.failed,
+            "held_flushes": self.held_flushes,
+        }
@@ -0,0 +1,50 @@
+from typing import Dict, Tuple
+
+import discord
+
+
+class MemberIndex:
+    """Human/bot counts per guild, built once and kept current from events.
+
+    `build()` does the only full member scan (on ready / guild join); after
+    that joins and removals adjust the counters in O(1).
+    """
+
+    def __init__(self):
+        self._counts: Dict[int, list] = {}   # guild id -> [humans, bots]
+
+    def build(self, guild: discord.Guild):
+        bots = 0
+        members = guild.members or ()
+        for m in members:
+            if m.bot:
+                bots += 1
+        self._counts[guild.id] = [len(members) - bots, bots]
+
+    def forget(self, guild_id: int):
+        self._counts.pop(guild_id, None)
+
+    def add(self, guild_id: int, is_bot: bool):
+        counts = self._counts.get(guild_id)
+        if counts is not None:
+            counts[1 if is_bot else 0] += 1
+
+    def remove(self, guild_id: int, is_bot: bool):
+        counts = self._counts.get(guild_id)
+        if counts is not None:
+            idx = 1 if is_bot else 0
+            counts[idx] = max(counts[idx] - 1, 0)
+
+    def counts(self, guild: discord.Guild) -> Tuple[int, int]:
+        """(humans, bots) for the guild, building the entry on first use."""
+        counts = self._counts.get(guild.id)
+        if counts is None:
+            self.build(guild)
+            counts = self._counts[guild.id]
+        return counts[0], counts[1]
+
+    def bots(self, guild: discord.Guild) -> int:
+        return self.counts(guild)[1]
+
+
+member_index = MemberIndex()
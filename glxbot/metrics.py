@@ -0,0 +1,423 @@
+import asyncio
+import math
+import re
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import aiohttp
+import discord
+
+from .config import METRICS_MAX_SERIES, LOOP_LAG_INTERVAL
+from .state import log
+
+# Bucket upper bounds in seconds.
+HANDLER_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+REST_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+OTHER = "other"
+
+Samples = List[Tuple[Tuple[str, ...], float]]
+
+
+class _Family:
+    """One metric name with a bounded set of label value tuples.
+
+    Once `max_series` label sets exist, new ones are counted under a series
+    whose labels are all "other", so a metric never grows without bound.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], max_series: int):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.max_series = max(int(max_series), 1)
+        self.series: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, values: Tuple) -> Tuple[str, ...]:
+        key = tuple(str(v) for v in values)
+        if key not in self.series and len(self.series) >= self.max_series:
+            return (OTHER,) * len(self.labels)
+        return key
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, *values, n: float = 1):
+        key = self._key(values)
+        self.series[key] = self.series.get(key, 0) + n
+
+    def export(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": self.kind,
+            "help": self.help,
+            "labels": list(self.labels),
+            "samples": [[list(k), v] for k, v in self.series.items()],
+        }
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float], max_series: int):
+        super().__init__(name, help_text, labels, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *values):
+        key = self._key(values)
+        entry = self.series.get(key)
+        if entry is None:
+            # per-bucket counts (the last one is +Inf), sum, count
+            entry = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def export(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": self.kind,
+            "help": self.help,
+            "labels": list(self.labels),
+            "buckets": list(self.buckets),
+            "samples": [[list(k), list(e[0]), e[1], e[2]] for k, e in self.series.items()],
+        }
+
+
+class _Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], collect: Callable[[], Samples]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.collect = collect
+
+    def export(self) -> Dict[str, Any]:
+        try:
+            samples = [[list(k), v] for k, v in self.collect() if v == v]
+        except Exception as e:
+            log.debug("[GLX] Metric %s failed to collect: %s", self.name, e)
+            samples = []
+        return {"name": self.name, "type": self.kind, "help": self.help, "labels": list(self.labels), "samples": samples}
+
+
+class MetricsRegistry:
+    """Counters and histograms updated in place, gauges read at scrape time.
+
+    `export()` returns plain lists and dicts, so a shard worker can publish it
+    to the coordinator; `render()` turns exports into Prometheus text.
+    """
+
+    def __init__(self, max_series: int):
+        self.max_series = max_series
+        self._families: Dict[str, Any] = {}
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        family = self._families[name] = Counter(name, help_text, labels, self.max_series)
+        return family
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]) -> Histogram:
+        family = self._families[name] = Histogram(name, help_text, labels, buckets, self.max_series)
+        return family
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str], collect: Callable[[], Samples]):
+        self._families[name] = _Gauge(name, help_text, labels, collect)
+
+    def export(self) -> List[Dict[str, Any]]:
+        return [family.export() for family in self._families.values()]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list((extra or {}).items()) + list(zip(names, values))
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def render(families: List[Dict[str, Any]], extra: Optional[Dict[str, str]] = None, header: bool = True) -> str:
+    """Prometheus text format for exported families.
+
+    `extra` labels are added to every sample (e.g. the shard worker id).
+    With `header=False` the HELP/TYPE lines are left out, for a family that
+    was already rendered for another worker.
+    """
+    lines = []
+    for family in families:
+        name = family["name"]
+        names = family["labels"]
+        if header:
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+        if family["type"] != "histogram":
+            for values, value in family["samples"]:
+                lines.append(f"{name}{_labels(names, values, extra)} {_number(value)}")
+            continue
+        bounds = [*family["buckets"], math.inf]
+        for values, counts, total, count in family["samples"]:
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                le = _labels((*names, "le"), (*values, _number(bound)), extra)
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, values, extra)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(names, values, extra)} {count}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def render_workers(per_worker: Dict[str, List[Dict[str, Any]]]) -> str:
+    """Render several processes' exports with a `worker` label.
+
+    Samples are grouped by metric name under one HELP/TYPE header, as the
+    text format requires.
+    """
+    by_name: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+    for worker, families in per_worker.items():
+        for family in families:
+            by_name.setdefault(family["name"], []).append((worker, family))
+    out = []
+    for parts in by_name.values():
+        for i, (worker, family) in enumerate(parts):
+            out.append(render([family], {"worker": worker}, header=i == 0))
+    return "".join(out)
+
+
+def counter_families(stats: Dict[str, int], guild_stats: Dict[int, Dict[str, int]], max_guilds: int) -> List[Dict[str, Any]]:
+    """STATS and GUILD_STATS as counter families.
+
+    Only the `max_guilds` busiest guilds (by messages seen) get their own
+    `guild` label; every other guild is summed into guild="other".
+    """
+    ranked = sorted(guild_stats.items(), key=lambda item: item[1].get("messages_seen", 0), reverse=True)
+    samples = []
+    rest: Dict[str, int] = {}
+    for i, (gid, counters) in enumerate(ranked):
+        if i < max_guilds:
+            samples.extend([[str(gid), name], value] for name, value in counters.items())
+        else:
+            for name, value in counters.items():
+                rest[name] = rest.get(name, 0) + value
+    samples.extend([[OTHER, name], value] for name, value in rest.items())
+    return [
+        {
+            "name": "glx_events_total",
+            "type": "counter",
+            "help": "GLX counters across all guilds.",
+            "labels": ["counter"],
+            "samples": [[[name], value] for name, value in stats.items()],
+        },
+        {
+            "name": "glx_guild_events_total",
+            "type": "counter",
+            "help": "GLX counters per guild; guilds past the label limit are summed as guild=\"other\".",
+            "labels": ["guild", "counter"],
+            "samples": samples,
+        },
+    ]
+
+
+registry = MetricsRegistry(max_series=METRICS_MAX_SERIES)
+
+handler_seconds = registry.histogram(
+    "glx_handler_seconds", "Time spent in a gateway event handler.", ("event",), HANDLER_BUCKETS,
+)
+rest_seconds = registry.histogram(
+    "glx_rest_request_seconds", "Discord REST request latency by route (each try, including 429s).",
+    ("method", "route"), REST_BUCKETS,
+)
+rest_responses = registry.counter(
+    "glx_rest_responses_total", "Discord REST responses by route and status.", ("method", "route", "status"),
+)
+rest_rate_limited = registry.counter(
+    "glx_rest_rate_limited_total", "Discord REST 429 responses by route and scope.", ("method", "route", "scope"),
+)
+enforcement_actions = registry.counter(
+    "glx_enforcement_actions_total", "Enforcement actions by outcome.", ("action", "outcome"),
+)
+loop_lag_seconds = registry.histogram(
+    "glx_event_loop_lag_seconds", "How late the event loop woke a sleeping sampler.", (), LAG_BUCKETS,
+)
+
+
+def timed_handler(event: str, coro):
+    """Wrap an event handler so every call lands in glx_handler_seconds."""
+
+    async def handler(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await coro(*args, **kwargs)
+        finally:
+            handler_seconds.observe(time.perf_counter() - start, event)
+
+    handler.__name__ = coro.__name__
+    handler.__qualname__ = coro.__qualname__
+    return handler
+
+
+_SNOWFLAKE = re.compile(r"/\d{15,21}(?=/|$)")
+_EMOJI = re.compile(r"/reactions/[^/]+")
+_TOKEN = re.compile(r"(/(?:webhooks|interactions)/\{id\})/[^/]+")
+
+
+def rest_route(url: str) -> Optional[str]:
+    """`/channels/{id}/messages` style template for a Discord API URL, None for other hosts."""
+    base = discord.http.Route.BASE
+    if not url.startswith(base):
+        return None
+    path = url[len(base):].split("?", 1)[0]
+    path = _SNOWFLAKE.sub("/{id}", path)
+    path = _EMOJI.sub("/reactions/{emoji}", path)
+    return _TOKEN.sub(r"\1/{token}", path)
+
+
+def http_trace() -> aiohttp.TraceConfig:
+    """aiohttp trace hooks that feed the REST metrics; passed to the bot as `http_trace`."""
+
+    async def on_start(session, ctx, params):
+        ctx.start = time.perf_counter()
+
+    async def on_end(session, ctx, params):
+        route = rest_route(str(params.url))
+        if route is None:
+            return
+        method = params.method
+        response = params.response
+        rest_seconds.observe(time.perf_counter() - ctx.start, method, route)
+        rest_responses.inc(method, route, response.status)
+        if response.status == 429:
+            scope = response.headers.get("X-RateLimit-Scope") or (
+                "global" if response.headers.get("X-RateLimit-Global") else "user"
+            )
+            rest_rate_limited.inc(method, route, scope)
+
+    async def on_exception(session, ctx, params):
+        route = rest_route(str(params.url))
+        if route is not None:
+            rest_responses.inc(params.method, route, "error")
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_start)
+    trace.on_request_end.append(on_end)
+    trace.on_request_exception.append(on_exception)
+    return trace
+
+
+class LoopLagSampler:
+    """Sleeps `interval` seconds at a time and records how late it woke up.
+
+    A late wake-up means something held the event loop: every other task
+    (gateway reads, handlers, the dashboard) was delayed by the same amount.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = max(float(interval), 0.01)
+        self.last = 0.0
+        self.max = 0.0
+        self.samples = 0
+        self._listeners: List[Callable[[float], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Callable[[float], None]):
+        """Call `listener(lag_seconds)` after every sample."""
+        self._listeners.append(listener)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - start - self.interval, 0.0)
+            self.last = lag
+            self.max = max(self.max, lag)
+            self.samples += 1
+            loop_lag_seconds.observe(lag)
+            for listener in self._listeners:
+                try:
+                    listener(lag)
+                except Exception as e:
+                    log.warning("[GLX] Loop lag listener failed: %s", e)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "interval_ms": round(self.interval * 1000, 1),
+            "last_ms": round(self.last * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+            "samples": self.samples,
+        }
+
+
+loop_lag = LoopLagSampler(LOOP_LAG_INTERVAL)
+registry.gauge(
+    "glx_event_loop_lag_last_seconds", "Lag measured by the most recent loop sample.", (),
+    lambda: [((), loop_lag.last)],
+)
+
+_bot: Optional[discord.Client] = None
+
+
+def watch_bot(bot: discord.Client):
+    """Report this bot's gateway latency."""
+    global _bot
+    _bot = bot
+
+
+def _gateway_latency() -> Samples:
+    if _bot is None:
+        return []
+    latencies = getattr(_bot, "latencies", None) or [(None, _bot.latency)]
+    return [((str(sid if sid is not None else 0),), lat) for sid, lat in latencies]
+
+
+def _tracker_sizes() -> Samples:
+    from .tracker import spam_tracker
+    from .traffic import traffic
+
+    spam = spam_tracker.stats()
+    traffic_stats = traffic.stats()
+    return [
+        (("spam_tracker", "keys"), spam["keys"]),
+        (("spam_tracker", "bytes"), spam["approx_bytes"]),
+        (("traffic", "keys"), traffic_stats["guilds"]),
+        (("traffic", "bytes"), traffic_stats["approx_bytes"]),
+    ]
+
+
+def _enforcement_queue() -> Samples:
+    from .enforcement import enforcer
+
+    stats = enforcer.stats()
+    return [(("queued",), stats["queue_depth"]), (("in_flight",), stats["in_flight"])]
+
+
+registry.gauge("glx_gateway_latency_seconds", "Heartbeat round trip per shard.", ("shard",), _gateway_latency)
+registry.gauge("glx_tracker_size", "Entries and approximate bytes held by the in-memory trackers.",
+               ("tracker", "unit"), _tracker_sizes)
+registry.gauge("glx_enforcement_verdicts", "Verdicts waiting in or running from the enforcement queue.",
+               ("state",), _enforcement_queue)
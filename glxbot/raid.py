@@ -0,0 +1,168 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+import discord
+
+from .config import (
+    RAID_WINDOW_SECONDS,
+    RAID_JOIN_THRESHOLD,
+    RAID_LOCK_MINUTES,
+    RAID_COOLDOWN_SECONDS,
+)
+from .state import log, STATS, GUILD_STATS, guild_joins
+from .security import set_raid_lock, describe_raid_lock, log_event, format_seconds
+
+IDLE = "idle"
+LOCKED = "locked"
+COOLING = "cooling"
+
+
+class _Incident:
+    __slots__ = ("state", "started", "deadline", "cooling_until", "joins", "locks", "task")
+
+    def __init__(self):
+        self.state = IDLE
+        self.started = 0.0
+        self.deadline = 0.0
+        self.cooling_until = 0.0
+        self.joins = 0
+        self.locks = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class RaidMonitor:
+    """Per-guild anti-raid state machine: idle -> locked -> cooling -> idle.
+
+    Crossing the join threshold while idle locks the guild once and starts a
+    single unlock timer. Joins that keep arriving at raid rate push the unlock
+    deadline back instead of locking again. After the unlock the guild stays
+    in `cooling` for a while; a new burst then re-locks as part of the same
+    incident rather than opening a new one.
+    """
+
+    def __init__(self, window: float, threshold: int, lock_seconds: float, cooldown_seconds: float):
+        self.window = float(window)
+        self.threshold = int(threshold)
+        self.lock_seconds = float(lock_seconds)
+        self.cooldown_seconds = float(cooldown_seconds)
+        self._incidents: Dict[int, _Incident] = {}
+
+    def _incident(self, guild_id: int) -> _Incident:
+        inc = self._incidents.get(guild_id)
+        if inc is None:
+            inc = self._incidents[guild_id] = _Incident()
+        return inc
+
+    async def on_join(self, guild: discord.Guild, now: Optional[float] = None, settings=None):
+        """Feed one join. `settings` (a GuildSettings) overrides the monitor's
+        window, threshold and lock duration for this guild."""
+        now = time.time() if now is None else now
+        if settings is not None:
+            window = settings.raid_window_seconds
+            threshold = settings.raid_join_threshold
+            lock_seconds = settings.raid_lock_minutes * 60
+        else:
+            window, threshold, lock_seconds = self.window, self.threshold, self.lock_seconds
+        dq = guild_joins[guild.id]
+        dq.append(now)
+        cutoff = now - window
+        while dq and dq[0] < cutoff:
+            dq.popleft()
+
+        inc = self._incident(guild.id)
+        if inc.state == COOLING and now >= inc.cooling_until:
+            inc.state = IDLE
+
+        raiding = len(dq) >= threshold
+        if inc.state == LOCKED:
+            inc.joins += 1
+            if raiding:
+                inc.deadline = max(inc.deadline, now + lock_seconds)
+            return
+        if not raiding:
+            return
+
+        if inc.state == IDLE:
+            STATS["raids_detected"] += 1
+            GUILD_STATS[guild.id]["raids_detected"] += 1
+            inc.started = now
+            inc.joins = len(dq)
+            inc.locks = 0
+        else:
+            inc.joins += 1
+        inc.state = LOCKED
+        inc.locks += 1
+        inc.deadline = now + lock_seconds
+
+        await set_raid_lock(guild, True, "GLX Protection • suspected join raid")
+        await log_event(
+            guild,
+            "Raid Lockdown" if inc.locks == 1 else "Raid Lockdown (resumed)",
+            f"Detected {len(dq)} joins in {int(window)}s.\n"
+            f"Raid lockdown applied to {describe_raid_lock(guild.id)}. "
+            f"Unlocks {format_seconds(int(lock_seconds))} after the last burst.",
+            colour=discord.Color.orange(),
+        )
+        if inc.task is None or inc.task.done():
+            inc.task = asyncio.get_running_loop().create_task(self._unlock_when_due(guild, inc))
+
+    async def _unlock_when_due(self, guild: discord.Guild, inc: _Incident):
+        while inc.state == LOCKED:
+            delay = inc.deadline - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            inc.state = COOLING
+            inc.cooling_until = time.time() + self.cooldown_seconds
+            try:
+                await set_raid_lock(guild, False, "GLX Protection • auto unlock after raid")
+            except Exception as e:
+                log.warning("Raid auto unlock failed in %s: %s", guild.name, e)
+            await log_event(
+                guild,
+                "Raid Unlock",
+                f"Raid window passed after {format_seconds(int(time.time() - inc.started))} "
+                f"and {inc.joins} joins. Lockdown lifted automatically.",
+                colour=discord.Color.green(),
+            )
+        inc.task = None
+
+    def clear(self, guild_id: int):
+        """Reset the incident (manual unlock, guild removal)."""
+        inc = self._incidents.pop(guild_id, None)
+        if inc is not None and inc.task is not None:
+            inc.task.cancel()
+        guild_joins.pop(guild_id, None)
+
+    def status(self, guild_id: int, now: Optional[float] = None) -> Dict[str, object]:
+        now = time.time() if now is None else now
+        inc = self._incidents.get(guild_id)
+        if inc is None:
+            return {"state": IDLE, "joins": 0, "locks": 0, "unlocks_in": None, "cooling_for": None}
+        state = inc.state
+        if state == COOLING and now >= inc.cooling_until:
+            state = IDLE
+        return {
+            "state": state,
+            "joins": inc.joins if state != IDLE else 0,
+            "locks": inc.locks if state != IDLE else 0,
+            "unlocks_in": max(int(inc.deadline - now), 0) if state == LOCKED else None,
+            "cooling_for": max(int(inc.cooling_until - now), 0) if state == COOLING else None,
+        }
+
+    def describe(self, guild_id: int) -> str:
+        st = self.status(guild_id)
+        if st["state"] == LOCKED:
+            return f"LOCKED • {st['joins']} joins • unlocks in {format_seconds(st['unlocks_in'])}"
+        if st["state"] == COOLING:
+            return f"COOLING • {format_seconds(st['cooling_for'])} left"
+        return "IDLE"
+
+
+raid_monitor = RaidMonitor(
+    window=RAID_WINDOW_SECONDS,
+    threshold=RAID_JOIN_THRESHOLD,
+    lock_seconds=RAID_LOCK_MINUTES * 60,
+    cooldown_seconds=RAID_COOLDOWN_SECONDS,
+)
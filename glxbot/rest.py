@@ -0,0 +1,324 @@
+import asyncio
+import contextvars
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+import aiohttp
+import discord
+
+from .config import (
+    REST_CONCURRENCY,
+    REST_GUILD_CONCURRENCY,
+    REST_GLOBAL_PER_SECOND,
+    REST_LOW_PRIORITY_SHARE,
+    REST_GONE_MAX,
+)
+from .metrics import registry
+
+# Lower runs first. Enforcement and lockdown calls are never held back for
+# rate-limit headroom; log and cosmetic calls are.
+PRIORITY_ENFORCE = 0    # message delete, timeout, kick, ban
+PRIORITY_LOCKDOWN = 1   # raid lock role/channel edits
+PRIORITY_LOG = 2        # glx-logs sends, log channel creation, AutoMod sync
+PRIORITY_COSMETIC = 3   # welcome messages, poll and suggestion reactions
+PRIORITY_NAMES = ("enforce", "lockdown", "log", "cosmetic")
+
+QUEUE_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+rest_queue_seconds = registry.histogram(
+    "glx_rest_queue_seconds", "Time an outbound REST call waited in the scheduler.", ("priority",), QUEUE_BUCKETS,
+)
+rest_scheduled = registry.counter(
+    "glx_rest_scheduled_total", "Outbound REST calls through the scheduler by outcome.", ("priority", "outcome"),
+)
+
+# (guild id, priority) of the call running in this task, read by the trace hooks.
+_lane: contextvars.ContextVar[Optional[Tuple[int, int]]] = contextvars.ContextVar("glx_rest_lane", default=None)
+
+
+class TargetGone(Exception):
+    """The member, message, channel or guild a queued call was aimed at no longer exists."""
+
+
+class _Waiter:
+    __slots__ = ("priority", "guild_id", "target", "future", "queued_at")
+
+    def __init__(self, priority: int, guild_id: int, target: Optional[Hashable], future: asyncio.Future):
+        self.priority = priority
+        self.guild_id = guild_id
+        self.target = target
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class RestScheduler:
+    """Single gate for the bot's own outbound REST calls, ordered by priority.
+
+    `call()` runs a request factory once a slot is free: at most `concurrency`
+    calls in flight overall and `guild_concurrency` per guild. Waiting calls
+    are granted lowest priority value first, round-robin across guilds within
+    a priority, so a raid's deletes and timeouts overtake its log backlog.
+
+    Bucket state comes from the bot's aiohttp trace hooks (`attach()`). Log
+    and cosmetic calls wait while their guild lane's last bucket is exhausted,
+    during a global 429, and while requests in the last second exceed
+    `low_share` of `global_per_second`, leaving the rest for enforcement.
+    discord.py still handles the 429s themselves.
+
+    Calls can name a `target` (see `mark_gone()`); if it is gone by the time
+    the call would start, `TargetGone` is raised instead of sending it.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        guild_concurrency: int,
+        global_per_second: int,
+        low_share: float,
+        gone_max: int,
+    ):
+        self.concurrency = max(int(concurrency), 1)
+        self.guild_concurrency = max(int(guild_concurrency), 1)
+        self.low_budget = max(int(global_per_second * low_share), 1)
+        self.gone_max = max(int(gone_max), 0)
+        self._queues: List["OrderedDict[int, Deque[_Waiter]]"] = [OrderedDict() for _ in PRIORITY_NAMES]
+        self._depth = [0] * len(PRIORITY_NAMES)
+        self._waits: List[Deque[float]] = [deque(maxlen=1000) for _ in PRIORITY_NAMES]
+        self._guild_in_flight: Counter = Counter()
+        self._buckets: Dict[Tuple[int, int], float] = {}
+        self._recent: Deque[float] = deque()
+        self._global_until = 0.0
+        self._gone: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.in_flight = 0
+        self.low_in_flight = 0
+        self.outcomes: Counter = Counter()
+        self.global_limited = 0
+
+    # Targets
+
+    def mark_gone(self, *target: Hashable):
+        """Remember e.g. ("member", guild_id, user_id), ("message", id), ("channel", id) or ("guild", id)."""
+        if not self.gone_max:
+            return
+        self._gone[target] = None
+        self._gone.move_to_end(target)
+        while len(self._gone) > self.gone_max:
+            self._gone.popitem(last=False)
+
+    def revive(self, *target: Hashable):
+        self._gone.pop(target, None)
+
+    def is_gone(self, guild_id: int, target: Optional[Hashable]) -> bool:
+        return ("guild", guild_id) in self._gone or (target is not None and target in self._gone)
+
+    def forget_guild(self, guild_id: int):
+        for lane in [k for k in self._buckets if k[0] == guild_id]:
+            del self._buckets[lane]
+
+    # Scheduling
+
+    def _count(self, priority: int, outcome: str):
+        self.outcomes[priority, outcome] += 1
+        rest_scheduled.inc(PRIORITY_NAMES[priority], outcome)
+
+    def _global_hold(self, now: float) -> float:
+        """When low-priority calls may start again, or 0.0 if they may start now."""
+        if self._global_until > now:
+            return self._global_until
+        recent = self._recent
+        while recent and recent[0] <= now - 1.0:
+            recent.popleft()
+        if len(recent) + self.low_in_flight >= self.low_budget:
+            return recent[0] + 1.0 if recent else now + 0.1
+        return 0.0
+
+    def _has_slot(self, guild_id: int) -> bool:
+        return self.in_flight < self.concurrency and self._guild_in_flight[guild_id] < self.guild_concurrency
+
+    def _acquire(self, priority: int, guild_id: int):
+        self.in_flight += 1
+        self._guild_in_flight[guild_id] += 1
+        if priority >= PRIORITY_LOG:
+            self.low_in_flight += 1
+
+    def _release(self, priority: int, guild_id: int):
+        self.in_flight -= 1
+        self._guild_in_flight[guild_id] -= 1
+        if not self._guild_in_flight[guild_id]:
+            del self._guild_in_flight[guild_id]
+        if priority >= PRIORITY_LOG:
+            self.low_in_flight -= 1
+        if any(self._depth):
+            self._pump()
+
+    def _may_start_now(self, priority: int, guild_id: int, now: float) -> bool:
+        if any(self._depth[:priority + 1]) or not self._has_slot(guild_id):
+            return False
+        if priority < PRIORITY_LOG:
+            return True
+        return not self._global_hold(now) and self._buckets.get((guild_id, priority), 0.0) <= now
+
+    def _pump(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        wake_at = 0.0
+        for priority, lanes in enumerate(self._queues):
+            if not lanes:
+                continue
+            if priority >= PRIORITY_LOG:
+                held = self._global_hold(now)
+                if held:
+                    wake_at = min(wake_at, held) if wake_at else held
+                    break
+            for guild_id in list(lanes):
+                if self.in_flight >= self.concurrency:
+                    return
+                queue = lanes[guild_id]
+                if priority >= PRIORITY_LOG:
+                    reset_at = self._buckets.get((guild_id, priority), 0.0)
+                    if reset_at > now:
+                        wake_at = min(wake_at, reset_at) if wake_at else reset_at
+                        continue
+                while queue and self._has_slot(guild_id):
+                    waiter = queue.popleft()
+                    self._depth[priority] -= 1
+                    if waiter.future.done():
+                        continue  # caller cancelled
+                    if self.is_gone(guild_id, waiter.target):
+                        waiter.future.set_result(False)
+                        continue
+                    self._acquire(priority, guild_id)
+                    waiter.future.set_result(True)
+                    if priority >= PRIORITY_LOG:
+                        break  # re-check the global budget before granting another
+                if queue:
+                    lanes.move_to_end(guild_id)
+                else:
+                    del lanes[guild_id]
+        if wake_at:
+            self._timer = asyncio.get_running_loop().call_later(max(wake_at - now, 0.01), self._pump)
+
+    async def call(
+        self,
+        priority: int,
+        guild_id: int,
+        factory: Callable[[], Awaitable[Any]],
+        target: Optional[Hashable] = None,
+    ) -> Any:
+        """Await `factory()` once this call's turn comes; raises TargetGone if `target` went away first."""
+        if self.is_gone(guild_id, target):
+            self._count(priority, "gone")
+            raise TargetGone(f"{target or ('guild', guild_id)} is gone")
+
+        now = time.monotonic()
+        if self._may_start_now(priority, guild_id, now):
+            self._acquire(priority, guild_id)
+            waited = 0.0
+        else:
+            waiter = _Waiter(priority, guild_id, target, asyncio.get_running_loop().create_future())
+            lanes = self._queues[priority]
+            if guild_id not in lanes:
+                lanes[guild_id] = deque()
+            lanes[guild_id].append(waiter)
+            self._depth[priority] += 1
+            self._pump()
+            try:
+                granted = await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled() and waiter.future.result():
+                    self._release(priority, guild_id)
+                raise
+            if not granted:
+                self._count(priority, "gone")
+                raise TargetGone(f"{target} is gone")
+            waited = time.monotonic() - waiter.queued_at
+
+        self._waits[priority].append(waited)
+        rest_queue_seconds.observe(waited, PRIORITY_NAMES[priority])
+        token = _lane.set((guild_id, priority))
+        try:
+            result = await factory()
+        except Exception:
+            self._count(priority, "failed")
+            raise
+        finally:
+            _lane.reset(token)
+            self._release(priority, guild_id)
+        self._count(priority, "sent")
+        return result
+
+    # Bucket state
+
+    def attach(self, trace: aiohttp.TraceConfig):
+        """Add the hooks that feed bucket state to the bot's `http_trace`."""
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+
+    async def _on_request_start(self, session, ctx, params):
+        if str(params.url).startswith(discord.http.Route.BASE):
+            self._recent.append(time.monotonic())
+
+    async def _on_request_end(self, session, ctx, params):
+        headers = params.response.headers
+        now = time.monotonic()
+        if params.response.status == 429 and (
+            headers.get("X-RateLimit-Global") or headers.get("X-RateLimit-Scope") == "global"
+        ):
+            self.global_limited += 1
+            try:
+                retry_after = float(headers.get("Retry-After") or 1.0)
+            except ValueError:
+                retry_after = 1.0
+            self._global_until = max(self._global_until, now + retry_after)
+        lane = _lane.get()
+        remaining = headers.get("X-RateLimit-Remaining")
+        if lane is None or remaining is None:
+            return
+        try:
+            exhausted = int(remaining) == 0
+            reset_after = float(headers.get("X-RateLimit-Reset-After") or 0.0)
+        except ValueError:
+            return
+        if exhausted and reset_after > 0:
+            self._buckets[lane] = now + reset_after
+        else:
+            self._buckets.pop(lane, None)
+
+    def queued(self, priority: Optional[int] = None) -> int:
+        return sum(self._depth) if priority is None else self._depth[priority]
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        out: Dict[str, Any] = {
+            "in_flight": self.in_flight,
+            "queued": self.queued(),
+            "sent": sum(n for (_, o), n in self.outcomes.items() if o == "sent"),
+            "failed": sum(n for (_, o), n in self.outcomes.items() if o == "failed"),
+            "dropped_gone": sum(n for (_, o), n in self.outcomes.items() if o == "gone"),
+            "exhausted_buckets": sum(1 for reset_at in self._buckets.values() if reset_at > now),
+            "global_limited": self.global_limited,
+        }
+        for priority, name in enumerate(PRIORITY_NAMES):
+            waits = sorted(self._waits[priority])
+            out[f"queued_{name}"] = self._depth[priority]
+            out[f"{name}_wait_p99_ms"] = (
+                round(waits[min(int(0.99 * len(waits)), len(waits) - 1)] * 1000, 2) if waits else 0.0
+            )
+        return out
+
+
+rest_scheduler = RestScheduler(
+    concurrency=REST_CONCURRENCY,
+    guild_concurrency=REST_GUILD_CONCURRENCY,
+    global_per_second=REST_GLOBAL_PER_SECOND,
+    low_share=REST_LOW_PRIORITY_SHARE,
+    gone_max=REST_GONE_MAX,
+)
+registry.gauge(
+    "glx_rest_queue_depth", "Outbound REST calls waiting in the scheduler.", ("priority",),
+    lambda: [((name,), rest_scheduler.queued(p)) for p, name in enumerate(PRIORITY_NAMES)],
+)
@@ -0,0 +1,128 @@
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+from .config import INVITE_PATTERNS, BLOCKED_KEYWORDS, BLOCKED_LINK_PATTERNS
+
+
+# category -> feature flag that enables it
+CONTENT_RULES = {
+    "invite": "anti_invites",
+    "keyword": "content_filter",
+    "link": "content_filter",
+}
+
+CONTENT_PATTERNS = {
+    "invite": INVITE_PATTERNS,
+    "keyword": BLOCKED_KEYWORDS,
+    "link": BLOCKED_LINK_PATTERNS,
+}
+
+# Below this many patterns a C-level `in` per pattern beats walking the
+# automaton character by character in Python.
+SMALL_PATTERN_SET = 32
+
+
+class ContentScanner:
+    """Aho-Corasick automaton over every enabled content pattern.
+
+    Patterns are matched case-insensitively as plain substrings, the same
+    semantics as the old `p in content.lower()` loop, but all rules are
+    evaluated in a single pass over the message no matter how many
+    patterns are configured.
+    """
+
+    __slots__ = ("_goto", "_fail", "_out", "_small", "pattern_count")
+
+    def __init__(self, rules: Dict[str, Iterable[str]]):
+        unique: Dict[Tuple[str, str], None] = {}
+        for category, patterns in rules.items():
+            for pattern in patterns:
+                pattern = (pattern or "").lower()
+                if pattern:
+                    unique[(category, pattern)] = None
+
+        self.pattern_count = len(unique)
+        self._small = tuple(unique) if len(unique) <= SMALL_PATTERN_SET else None
+
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[Tuple[str, str], ...]] = [()]
+        if self._small is None:
+            for category, pattern in unique:
+                state = 0
+                for ch in pattern:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        out.append(())
+                    state = nxt
+                out[state] = out[state] + ((category, pattern),)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """Return {category: [matched patterns]} for every hit in `text`."""
+        hits: Dict[str, List[str]] = {}
+        if not text or not self.pattern_count:
+            return hits
+        text = text.lower()
+
+        if self._small is not None:
+            for category, pattern in self._small:
+                if pattern in text:
+                    hits.setdefault(category, []).append(pattern)
+            return hits
+
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        for ch in text:
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if out[state]:
+                for category, pattern in out[state]:
+                    found = hits.setdefault(category, [])
+                    if pattern not in found:
+                        found.append(pattern)
+        return hits
+
+
+_SCANNERS: Dict[frozenset, ContentScanner] = {}
+
+
+def get_content_scanner(features: dict) -> ContentScanner:
+    """Scanner compiled for the currently enabled content rules (cached)."""
+    enabled = frozenset(
+        category
+        for category, feature in CONTENT_RULES.items()
+        if features.get(feature, True) and CONTENT_PATTERNS.get(category)
+    )
+    scanner = _SCANNERS.get(enabled)
+    if scanner is None:
+        scanner = ContentScanner({c: CONTENT_PATTERNS[c] for c in enabled})
+        _SCANNERS[enabled] = scanner
+    return scanner
+
+
+def scan_message_content(content: str, features: dict) -> Dict[str, List[str]]:
+    return get_content_scanner(features).scan(content)
@@ -1,15 +1,34 @@
+import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 
 import discord
 
-from .config import LOG_CHANNEL_NAME
+from .config import (
+    LOG_CHANNEL_NAME,
+    LOG_FLUSH_SECONDS,
+    LOG_MAX_PENDING,
+    LOG_CHANNEL_RETRY_SECONDS,
+    LOG_CHANNEL_RETRY_MAX_SECONDS,
+    RAID_LOCK_MODE,
+    RAID_LOCK_CONCURRENCY,
+)
 from .state import (
     log,
     START_TIME,
     STATS,
     GUILD_STATS,
+    LOG_CHANNEL_IDS,
+    LOG_CHANNEL_FAILURES,
+    RAID_LOCK_SAVED,
+    RAID_LOCK_MODES,
+    RAID_LOCK_TIMINGS,
+    mark_changed,
 )
+from .logsink import LogSink
+from .shedding import shedder
+from .rest import rest_scheduler, TargetGone, PRIORITY_ENFORCE, PRIORITY_LOCKDOWN, PRIORITY_LOG
 
 
 def human_delta(delta: timedelta) -> str:
@@ -42,15 +61,47 @@ def format_seconds(sec: int) -> str:
     return f"{m}m {s}s"
 
 
-def is_whitelisted(member: discord.Member, whitelist: set) -> bool:
-    if member.guild_permissions.administrator:
-        return True
-    return member.id in whitelist
+def remember_log_channel(channel: discord.abc.GuildChannel):
+    if isinstance(channel, discord.TextChannel) and channel.name == LOG_CHANNEL_NAME:
+        LOG_CHANNEL_IDS[channel.guild.id] = channel.id
+        LOG_CHANNEL_FAILURES.pop(channel.guild.id, None)
+
+
+def forget_log_channel(channel: discord.abc.GuildChannel):
+    if LOG_CHANNEL_IDS.get(channel.guild.id) == channel.id:
+        del LOG_CHANNEL_IDS[channel.guild.id]
+
+
+def clear_log_channel_failure(guild_id: int):
+    LOG_CHANNEL_FAILURES.pop(guild_id, None)
+
+
+def forget_guild_log_channel(guild_id: int):
+    LOG_CHANNEL_IDS.pop(guild_id, None)
+    LOG_CHANNEL_FAILURES.pop(guild_id, None)
 
 
 async def get_log_channel(guild: discord.Guild) -> Optional[discord.TextChannel]:
+    """Resolve the log channel, creating it if needed.
+
+    The channel id is cached per guild and kept current by the channel
+    create/update/delete events. A failed creation is remembered with an
+    exponential backoff so we don't retry a doomed request on every event.
+    """
+    cached_id = LOG_CHANNEL_IDS.get(guild.id)
+    if cached_id is not None:
+        ch = guild.get_channel(cached_id)
+        if ch is not None:
+            return ch
+        del LOG_CHANNEL_IDS[guild.id]
+
+    failure = LOG_CHANNEL_FAILURES.get(guild.id)
+    if failure is not None and time.monotonic() < failure[0]:
+        return None
+
     existing = discord.utils.get(guild.text_channels, name=LOG_CHANNEL_NAME)
     if existing:
+        LOG_CHANNEL_IDS[guild.id] = existing.id
         return existing
     try:
         overwrites = {
@@ -64,38 +115,65 @@ async def get_log_channel(guild: discord.Guild) -> Optional[discord.TextChannel]
                 send_messages=True,
             ),
         }
-        ch = await guild.create_text_channel(
-            LOG_CHANNEL_NAME,
-            overwrites=overwrites,
-            reason="GLX Protection • create log channel",
+        ch = await rest_scheduler.call(
+            PRIORITY_LOG,
+            guild.id,
+            lambda: guild.create_text_channel(
+                LOG_CHANNEL_NAME,
+                overwrites=overwrites,
+                reason="GLX Protection • create log channel",
+            ),
         )
+        LOG_CHANNEL_IDS[guild.id] = ch.id
+        LOG_CHANNEL_FAILURES.pop(guild.id, None)
         return ch
     except Exception as e:
-        log.warning("Failed to create log channel in %s: %s", guild.name, e)
+        backoff = LOG_CHANNEL_RETRY_SECONDS
+        if failure is not None:
+            backoff = min(failure[1] * 2, LOG_CHANNEL_RETRY_MAX_SECONDS)
+        LOG_CHANNEL_FAILURES[guild.id] = (time.monotonic() + backoff, backoff)
+        log.warning(
+            "Failed to create log channel in %s: %s (next attempt in %ss)",
+            guild.name,
+            e,
+            backoff,
+        )
         return None
 
 
+log_sink = LogSink(
+    get_log_channel,
+    interval=LOG_FLUSH_SECONDS,
+    max_pending=LOG_MAX_PENDING,
+    hold=lambda: shedder.shedding("log"),
+)
+
+
 async def log_event(guild: discord.Guild, title: str, description: str, colour=None):
-    ch = await get_log_channel(guild)
-    if not ch:
-        return
+    """Queue a log embed; it is delivered in batches by `log_sink`."""
     embed = discord.Embed(
         title="GLX • " + title,
         description=description,
         colour=colour or discord.Color.red(),
         timestamp=datetime.utcnow(),
     )
-    try:
-        await ch.send(embed=embed)
-    except Exception:
-        pass
+    if shedder.shedding("log"):
+        shedder.note("log", guild, "deferred")
+    log_sink.submit(guild, embed)
 
 
 async def timeout_member(member: discord.Member, minutes: float, reason: str) -> bool:
-    until = datetime.utcnow() + timedelta(minutes=minutes)
     try:
-        await member.timeout(until=until, reason=reason)
+        # `until` is positional-only in discord.py 2.x, and a datetime would have to be timezone-aware.
+        await rest_scheduler.call(
+            PRIORITY_ENFORCE,
+            member.guild.id,
+            lambda: member.timeout(timedelta(minutes=minutes), reason=reason),
+            target=("member", member.guild.id, member.id),
+        )
         return True
+    except TargetGone:
+        return False
     except AttributeError as e:
         log.warning("Timeout not supported on this library: %s", e)
         return False
@@ -104,28 +182,152 @@ async def timeout_member(member: discord.Member, minutes: float, reason: str) ->
         return False
 
 
-async def set_raid_lock(guild: discord.Guild, enabled: bool, reason: str) -> int:
+_ROLE_LOCK_PERMS = ("send_messages", "send_messages_in_threads")
+_RAID_LOCK_GUARDS: Dict[int, asyncio.Lock] = {}
+
+
+async def _set_role_lock(guild: discord.Guild, enabled: bool, reason: str, force: bool) -> int:
+    role = guild.default_role
+    perms = discord.Permissions(role.permissions.value)
+    if enabled:
+        if not any(getattr(perms, p) for p in _ROLE_LOCK_PERMS):
+            return 0
+        previous = {p: getattr(perms, p) for p in _ROLE_LOCK_PERMS}
+        perms.update(**{p: False for p in _ROLE_LOCK_PERMS})
+    else:
+        saved = RAID_LOCK_SAVED.get(guild.id)
+        if saved is None:
+            # Nothing we locked ourselves; only an explicit unlock re-grants sending.
+            if not force:
+                return 0
+            saved = {p: True for p in _ROLE_LOCK_PERMS}
+        if all(getattr(perms, p) == v for p, v in saved.items()):
+            RAID_LOCK_SAVED.pop(guild.id, None)
+            return 0
+        perms.update(**saved)
+    edited = await rest_scheduler.call(
+        PRIORITY_LOCKDOWN, guild.id, lambda: role.edit(permissions=perms, reason=reason),
+    )
+    if isinstance(edited, discord.Role):
+        # Refresh the cached @everyone now instead of on GUILD_ROLE_UPDATE, so a
+        # lock queued right behind this unlock does not read stale permissions.
+        guild._add_role(edited)
+    # Only remember what we changed once Discord accepted it.
+    if enabled:
+        RAID_LOCK_SAVED.setdefault(guild.id, previous)
+    else:
+        RAID_LOCK_SAVED.pop(guild.id, None)
+    return 1
+
+
+async def _set_channel_lock(guild: discord.Guild, enabled: bool, reason: str) -> int:
+    sem = asyncio.Semaphore(max(RAID_LOCK_CONCURRENCY, 1))
+    role = guild.default_role
+
+    async def apply(channel) -> int:
+        overwrites = channel.overwrites_for(role)
+        if enabled:
+            if overwrites.send_messages is False:
+                return 0
+            overwrites.send_messages = False
+        else:
+            if overwrites.send_messages is None:
+                return 0
+            overwrites.send_messages = None
+        async with sem:
+            try:
+                # discord.py waits out 429s per route bucket; the semaphore keeps
+                # us from queueing hundreds of requests behind the same bucket.
+                await rest_scheduler.call(
+                    PRIORITY_LOCKDOWN,
+                    guild.id,
+                    lambda: channel.set_permissions(role, overwrite=overwrites, reason=reason),
+                    target=("channel", channel.id),
+                )
+            except Exception:
+                return 0
+        return 1
+
+    results = await asyncio.gather(*(apply(c) for c in guild.text_channels))
+    return sum(results)
+
+
+async def set_raid_lock(
+    guild: discord.Guild,
+    enabled: bool,
+    reason: str,
+    mode: Optional[str] = None,
+    force: bool = False,
+) -> int:
+    """Lock or unlock sending for @everyone across the guild.
+
+    "role" mode flips Send Messages on the default role in a single edit and
+    remembers the previous value for the unlock; an unlock with nothing
+    remembered is skipped unless `force` is set. "channels" mode writes a
+    per-channel overwrite on every text channel, concurrently. If the role
+    edit is refused (missing Manage Roles) we fall back to channels mode.
+    An unlock without `mode` undoes the lock with the mode it was applied
+    with. Locks and unlocks of one guild run one at a time, so a relock that
+    arrives during an unlock is applied after it. Returns how many objects
+    were changed.
+    """
+    guard = _RAID_LOCK_GUARDS.get(guild.id)
+    if guard is None:
+        guard = _RAID_LOCK_GUARDS[guild.id] = asyncio.Lock()
+    async with guard:
+        return await _apply_raid_lock(guild, enabled, reason, mode, force)
+
+
+async def _apply_raid_lock(guild: discord.Guild, enabled: bool, reason: str, mode: Optional[str], force: bool) -> int:
+    if mode is None and not enabled:
+        mode = RAID_LOCK_MODES.get(guild.id)
+    mode = (mode or RAID_LOCK_MODE).lower()
+    start = time.perf_counter()
     changed = 0
-    for channel in guild.text_channels:
+    if mode == "role":
         try:
-            overwrites = channel.overwrites_for(guild.default_role)
-            if enabled:
-                if overwrites.send_messages is False:
-                    continue
-                overwrites.send_messages = False
-            else:
-                if overwrites.send_messages is None:
-                    continue
-                overwrites.send_messages = None
-            await channel.set_permissions(
-                guild.default_role,
-                overwrite=overwrites,
-                reason=reason,
-            )
-            changed += 1
-        except Exception:
-            continue
+            changed = await _set_role_lock(guild, enabled, reason, force)
+        except Exception as e:
+            log.warning("Role lockdown failed in %s (%s); falling back to channel overwrites", guild.name, e)
+            mode = "channels"
+    if mode != "role":
+        mode = "channels"
+        changed = await _set_channel_lock(guild, enabled, reason)
+
+    if enabled:
+        RAID_LOCK_MODES[guild.id] = mode
+    else:
+        RAID_LOCK_MODES.pop(guild.id, None)
+
+    elapsed = time.perf_counter() - start
+    RAID_LOCK_TIMINGS[guild.id] = {
+        "mode": mode,
+        "enabled": enabled,
+        "changed": changed,
+        "seconds": round(elapsed, 3),
+    }
+    log.info(
+        "Raid %s in %s via %s: %s change(s) in %.2fs",
+        "lock" if enabled else "unlock",
+        guild.name,
+        mode,
+        changed,
+        elapsed,
+    )
     if enabled and changed:
         STATS["raid_locks"] += 1
         GUILD_STATS[guild.id]["raid_locks"] += 1
+    mark_changed()
     return changed
+
+
+def describe_raid_lock(guild_id: int) -> str:
+    """Human summary of the last lock/unlock, e.g. for log embeds."""
+    info = RAID_LOCK_TIMINGS.get(guild_id)
+    if not info:
+        return "no changes"
+    if info["mode"] == "role":
+        target = "the @everyone role" if info["changed"] else "nothing (already applied)"
+    else:
+        target = f"{info['changed']} channels"
+    return f"{target} in {info['seconds']:.2f}s"
@@ -0,0 +1,175 @@
+from types import MappingProxyType
+from typing import Any, Dict, Optional, Tuple
+
+from .config import (
+    SPAM_MAX_MESSAGES,
+    SPAM_WINDOW_SECONDS,
+    SPAM_TRACKER_CAPACITY,
+    MENTION_THRESHOLD,
+    AUTO_MUTE_SECONDS,
+    RAID_JOIN_THRESHOLD,
+    RAID_WINDOW_SECONDS,
+    RAID_LOCK_MINUTES,
+    WARN_THRESHOLD,
+    WARN_MUTE_MINUTES,
+)
+from .state import FEATURES, mark_changed
+from .scanner import get_content_scanner
+from .store import state_store
+
+FEATURE_FIELDS: Tuple[str, ...] = tuple(FEATURES)
+
+# threshold name -> (global default, lowest allowed, highest allowed)
+THRESHOLD_FIELDS: Dict[str, Tuple[int, int, int]] = {
+    "spam_max_messages": (SPAM_MAX_MESSAGES, 2, SPAM_TRACKER_CAPACITY),
+    "spam_window_seconds": (SPAM_WINDOW_SECONDS, 1, 60),
+    "mention_threshold": (MENTION_THRESHOLD, 2, 50),
+    "auto_mute_seconds": (AUTO_MUTE_SECONDS, 60, 28 * 86400),
+    "raid_join_threshold": (RAID_JOIN_THRESHOLD, 2, 100),
+    "raid_window_seconds": (RAID_WINDOW_SECONDS, 1, 300),
+    "raid_lock_minutes": (RAID_LOCK_MINUTES, 1, 1440),
+    "warn_threshold": (WARN_THRESHOLD, 1, 50),
+    "warn_mute_minutes": (WARN_MUTE_MINUTES, 1, 28 * 1440),
+}
+
+SETTING_FIELDS: Tuple[str, ...] = FEATURE_FIELDS + tuple(THRESHOLD_FIELDS)
+
+_TRUE = ("on", "true", "yes", "1", "enable", "enabled")
+_FALSE = ("off", "false", "no", "0", "disable", "disabled")
+
+
+def coerce_setting(name: str, raw: Any) -> Any:
+    """Validate a setting value from a command or API payload.
+
+    Raises KeyError for unknown names and ValueError for bad values.
+    """
+    if name in FEATURES:
+        if isinstance(raw, bool):
+            return raw
+        text = str(raw).strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        raise ValueError(f"`{name}` takes on/off")
+    if name not in THRESHOLD_FIELDS:
+        raise KeyError(name)
+    _, low, high = THRESHOLD_FIELDS[name]
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"`{name}` takes a whole number") from None
+    if not low <= value <= high:
+        raise ValueError(f"`{name}` must be between {low} and {high}")
+    return value
+
+
+class GuildSettings:
+    """Immutable settings snapshot for one guild (or the global defaults).
+
+    Readers fetch the snapshot once and read plain attributes; writers never
+    mutate it but build a new one with `replace()` and swap it in. `features`
+    is a read-only view of the feature flags, and `content_scanner` is the
+    scanner compiled for the enabled content rules.
+    """
+
+    __slots__ = SETTING_FIELDS + ("features", "content_scanner")
+
+    def __init__(self, values: Dict[str, Any]):
+        for name in SETTING_FIELDS:
+            object.__setattr__(self, name, values[name])
+        features = MappingProxyType({name: values[name] for name in FEATURE_FIELDS})
+        object.__setattr__(self, "features", features)
+        object.__setattr__(self, "content_scanner", get_content_scanner(features))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GuildSettings is immutable; use replace()")
+
+    def replace(self, **changes) -> "GuildSettings":
+        values = self.as_dict()
+        values.update(changes)
+        return GuildSettings(values)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in SETTING_FIELDS}
+
+
+class GuildSettingsIndex:
+    """Per-guild settings snapshots over the global defaults.
+
+    Only overridden fields are stored per guild. The lookup `get()` is a
+    single dict access that falls back to the shared defaults snapshot.
+    """
+
+    def __init__(self):
+        self._overrides: Dict[int, Dict[str, Any]] = {}
+        self._snapshots: Dict[int, GuildSettings] = {}
+        self.defaults = self._build_defaults()
+
+    @staticmethod
+    def _build_defaults() -> GuildSettings:
+        values: Dict[str, Any] = dict(FEATURES)
+        values.update((name, spec[0]) for name, spec in THRESHOLD_FIELDS.items())
+        return GuildSettings(values)
+
+    def get(self, guild_id: int) -> GuildSettings:
+        return self._snapshots.get(guild_id, self.defaults)
+
+    def overrides(self, guild_id: int) -> Dict[str, Any]:
+        return dict(self._overrides.get(guild_id, {}))
+
+    def _publish(self, guild_id: int):
+        overrides = self._overrides.get(guild_id)
+        if overrides:
+            self._snapshots[guild_id] = self.defaults.replace(**overrides)
+        else:
+            self._overrides.pop(guild_id, None)
+            self._snapshots.pop(guild_id, None)
+
+    def load(self, guild_id: int, name: str, value: Any):
+        """Restore a persisted override at startup (call `rebuild()` after)."""
+        if name in SETTING_FIELDS:
+            self._overrides.setdefault(guild_id, {})[name] = bool(value) if name in FEATURES else value
+
+    def rebuild(self):
+        """Recompute the defaults and every guild snapshot."""
+        self.defaults = self._build_defaults()
+        for guild_id in list(self._overrides):
+            self._publish(guild_id)
+
+    def set(self, guild_id: int, name: str, value: Any) -> GuildSettings:
+        value = coerce_setting(name, value)
+        self._overrides.setdefault(guild_id, {})[name] = value
+        self._publish(guild_id)
+        state_store.save_guild_setting(guild_id, name, value)
+        mark_changed()
+        return self.get(guild_id)
+
+    def toggle(self, guild_id: int, name: str) -> bool:
+        """Flip a feature flag for one guild; returns the new value."""
+        return self.set(guild_id, name, not self.get(guild_id).features[name]).features[name]
+
+    def reset(self, guild_id: int, name: Optional[str] = None) -> GuildSettings:
+        """Drop one override (or all of them) so the guild follows the defaults."""
+        overrides = self._overrides.get(guild_id, {})
+        names = [name] if name is not None else list(overrides)
+        for n in names:
+            if overrides.pop(n, None) is not None:
+                state_store.save_guild_setting(guild_id, n, None)
+        self._publish(guild_id)
+        mark_changed()
+        return self.get(guild_id)
+
+    def set_default(self, name: str, value: Any) -> GuildSettings:
+        """Change a global feature default; guilds without an override follow it."""
+        if name not in FEATURES:
+            raise KeyError(name)
+        value = coerce_setting(name, value)
+        FEATURES[name] = value
+        state_store.save_feature(name, value)
+        self.rebuild()
+        mark_changed()
+        return self.defaults
+
+
+guild_settings = GuildSettingsIndex()
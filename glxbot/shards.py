@@ -0,0 +1,683 @@
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .config import COORDINATOR_HOST, COORDINATOR_PORT, SHARD_PUBLISH_SECONDS, JOB_HISTORY
+from .state import log, STATS, GUILD_STATS, mark_changed
+from .traffic import traffic
+from .cases import case_journal
+
+# Requests waiting longer than this for the other side are failed.
+REQUEST_TIMEOUT = 10.0
+# Lines above this size are refused (a snapshot of several thousand guilds fits easily).
+MAX_LINE_BYTES = 64 * 1024 * 1024
+# Cases recorded while the coordinator is unreachable are held up to this many.
+MAX_BUFFERED_CASES = 10000
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+def plan_shards(shard_count: int, workers: int) -> List[List[int]]:
+    """Split shard ids 0..shard_count-1 into `workers` contiguous ranges."""
+    workers = max(1, min(workers, shard_count))
+    base, extra = divmod(shard_count, workers)
+    out, start = [], 0
+    for i in range(workers):
+        size = base + (1 if i < extra else 0)
+        out.append(list(range(start, start + size)))
+        start += size
+    return out
+
+
+def shard_of(guild_id: int, shard_count: int) -> int:
+    """Discord's guild -> shard mapping."""
+    return (guild_id >> 22) % shard_count
+
+
+class LinkPeer:
+    """One end of a newline-delimited JSON connection.
+
+    Either side can send one-way messages (`send`) or requests (`request`)
+    that the other side answers from its handler table. Handlers get the
+    request's `args` as keyword arguments and return a JSON-able result. A
+    LookupError raised by a handler is raised as LookupError on the caller's
+    side; anything else as RuntimeError.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, handlers: Dict[str, Handler]):
+        self.reader = reader
+        self.writer = writer
+        self.handlers = handlers
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self.closed = False
+
+    def send(self, message: Dict[str, Any]):
+        if self.closed:
+            return
+        self.writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+    async def drain(self):
+        if not self.closed:
+            await self.writer.drain()
+
+    async def request(self, op: str, timeout: float = REQUEST_TIMEOUT, **args) -> Any:
+        if self.closed:
+            raise ConnectionError("link is closed")
+        self._next_id += 1
+        rid = self._next_id
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[rid] = fut
+        self.send({"t": "req", "id": rid, "op": op, "args": args})
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            self._pending.pop(rid, None)
+
+    async def _answer(self, message: Dict[str, Any]):
+        rid = message.get("id")
+        handler = self.handlers.get(message.get("op"))
+        try:
+            if handler is None:
+                raise LookupError(f"unknown op {message.get('op')!r}")
+            data = await handler(**(message.get("args") or {}))
+            self.send({"t": "res", "id": rid, "ok": True, "data": data})
+        except Exception as e:
+            self.send({
+                "t": "res",
+                "id": rid,
+                "ok": False,
+                "error": str(e) or type(e).__name__,
+                "missing": isinstance(e, LookupError),
+            })
+
+    async def run(self, on_message: Callable[[Dict[str, Any]], None]):
+        """Read until the connection drops; `on_message` gets every non-request message."""
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                kind = message.get("t")
+                if kind == "req":
+                    asyncio.get_running_loop().create_task(self._answer(message))
+                elif kind == "res":
+                    fut = self._pending.get(message.get("id"))
+                    if fut is not None and not fut.done():
+                        if message.get("ok"):
+                            fut.set_result(message.get("data"))
+                        else:
+                            error = LookupError if message.get("missing") else RuntimeError
+                            fut.set_exception(error(message.get("error") or "request failed"))
+                else:
+                    on_message(message)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for fut in self._pending.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError("link closed"))
+        self._pending.clear()
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class _Published:
+    """What a worker already sent on the current connection, for deltas."""
+
+    __slots__ = ("rows", "stats", "keys")
+
+    def __init__(self):
+        self.rows: Dict[int, list] = {}
+        self.stats: Dict[int, Dict[str, int]] = {}
+        self.keys: set = set()
+
+
+def build_worker_snapshot(bot, sent: _Published) -> Dict[str, Any]:
+    """Everything the coordinator mirrors from one worker, as a delta.
+
+    Guild rows, guild counters and web keys are sent only when they changed
+    since the previous snapshot on this connection (`sent` is updated in
+    place; the first snapshot is complete and marked `full`). Traffic is
+    sent as the per-second counts recorded since then.
+    """
+    from .auth import ACCESS_KEYS
+    from .store import state_store, _encode_key
+    from .members import member_index
+    from .raid import raid_monitor
+    from .settings import guild_settings
+    from .tracker import spam_tracker
+    from .enforcement import enforcer
+    from .security import log_sink
+    from .exemptions import exemptions
+    from .automod_sync import automod_reconciler
+    from .jobs import job_scheduler
+    from .metrics import registry, loop_lag
+    from .shedding import shedder
+    from .rest import rest_scheduler
+
+    full = not sent.rows
+    rows = {}
+    changed_stats = {}
+    seen = set()
+    for g in bot.guilds:
+        seen.add(g.id)
+        row = [
+            g.id,
+            g.name,
+            g.member_count or (len(g.members) if g.members else 0),
+            member_index.bots(g),
+            raid_monitor.status(g.id),
+            dict(guild_settings.get(g.id).features),
+        ]
+        if sent.rows.get(g.id) != row:
+            rows[g.id] = sent.rows[g.id] = row
+        counters = GUILD_STATS.get(g.id)
+        if counters is not None and sent.stats.get(g.id) != counters:
+            changed_stats[g.id] = sent.stats[g.id] = dict(counters)
+    gone = [gid for gid in sent.rows if gid not in seen]
+    for gid in gone:
+        del sent.rows[gid]
+        sent.stats.pop(gid, None)
+
+    new_keys = {code: _encode_key(rec) for code, rec in ACCESS_KEYS.items() if code not in sent.keys}
+    sent.keys.update(new_keys)
+
+    base = state_store.loaded_global
+    latencies = getattr(bot, "latencies", None) or [(None, bot.latency)]
+    return {
+        "t": "snap",
+        "full": full,
+        "ready": bot.is_ready(),
+        "latencies": [[sid, round(lat * 1000, 1) if lat == lat else None] for sid, lat in latencies],
+        "stats_session": {name: value - base.get(name, 0) for name, value in STATS.items()},
+        "guilds": list(rows.values()),
+        "gone": gone,
+        "guild_stats": changed_stats,
+        "traffic": traffic.take_pending(),
+        "queue_depths": enforcer.depths(),
+        "access_keys": new_keys,
+        "features_default": dict(guild_settings.defaults.features),
+        "sections": {
+            "spam_tracker": spam_tracker.stats(),
+            "enforcement": enforcer.stats(),
+            "log_sink": log_sink.stats(),
+            "state_store": state_store.stats(),
+            "exemptions": exemptions.stats(),
+            "automod": automod_reconciler.stats(),
+            "jobs": job_scheduler.stats(),
+            "loop_lag": loop_lag.stats(),
+            "shedding": shedder.stats(),
+            "rest": rest_scheduler.stats(),
+        },
+        # Cumulative, not a delta: the coordinator keeps the latest per worker for /metrics.
+        "metrics": registry.export(),
+    }
+
+
+def worker_ops(bot) -> Dict[str, Handler]:
+    """Dashboard actions, run against the bot in this process.
+
+    The same table serves a dashboard in this process (LocalSource) and the
+    coordinator's requests over the link. Handlers raise LookupError for an
+    unknown guild or job.
+    """
+    from .settings import guild_settings
+    from .automod_sync import schedule_automod_sync
+    from .jobs import job_scheduler
+
+    async def toggle(name: str, value: bool, guild_id: Optional[int] = None):
+        if guild_id is None:
+            guild_settings.set_default(name, value)
+        else:
+            guild_settings.set(guild_id, name, value)
+        return {"guild_id": guild_id, "name": name, "value": value}
+
+    async def sync_automod():
+        job = schedule_automod_sync(bot, [g for g in bot.guilds if guild_settings.get(g.id).automod])
+        return job.as_dict()
+
+    async def job(job_id: str):
+        found = job_scheduler.get(job_id)
+        if found is None:
+            raise LookupError("unknown_job")
+        return found.as_dict()
+
+    async def leave_guild(guild_id: int):
+        guild = bot.get_guild(guild_id)
+        if guild is None:
+            raise LookupError("guild_not_found")
+        await guild.leave()
+        return True
+
+    return {"toggle": toggle, "sync_automod": sync_automod, "job": job, "leave_guild": leave_guild}
+
+
+class ShardLink:
+    """Worker side of the coordinator connection.
+
+    Publishes a snapshot every `interval` seconds, forwards moderation cases
+    to the coordinator's journal and answers the coordinator's requests.
+    Reconnects with backoff if the coordinator goes away.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = float(interval)
+        self.enabled = False
+        self.worker_id = 0
+        self.shard_ids: List[int] = []
+        self.shard_count = 0
+        self.host = COORDINATOR_HOST
+        self.port = COORDINATOR_PORT
+        self.secret = ""
+        self.handlers: Dict[str, Handler] = {}
+        self._peer: Optional[LinkPeer] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+        self._bot = None
+        self._sent = _Published()
+        self._cases: deque = deque(maxlen=MAX_BUFFERED_CASES)
+        self.published = 0
+        self.reconnects = 0
+        self.last_publish_ms = 0.0
+
+    def configure(
+        self,
+        worker_id: int,
+        shard_ids: List[int],
+        shard_count: int,
+        secret: str = "",
+        host: str = None,
+        port: int = None,
+    ):
+        """Make this process a shard worker: publish traffic deltas and forward cases.
+
+        `secret` is the coordinator's per-run secret, sent in the hello.
+        """
+        self.enabled = True
+        self.secret = secret
+        self.worker_id = worker_id
+        self.shard_ids = list(shard_ids)
+        self.shard_count = shard_count
+        if host:
+            self.host = host
+        if port:
+            self.port = port
+        traffic.capture_pending()
+        case_journal.remote = self
+
+    def owns(self, guild_id: int) -> bool:
+        """Whether a guild lives on this worker's shards (global rows use guild 0)."""
+        return guild_id == 0 or shard_of(guild_id, self.shard_count) in self.shard_ids
+
+    def start(self, bot):
+        if not self.enabled or self._closing or (self._task is not None and not self._task.done()):
+            return
+        self._bot = bot
+        self.handlers.update(worker_ops(bot))
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        backoff = 1.0
+        while not self._closing:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port, limit=MAX_LINE_BYTES)
+            except OSError as e:
+                log.warning("[GLX] Worker %s cannot reach coordinator: %s", self.worker_id, e)
+                await self._sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+            backoff = 1.0
+            peer = self._peer = LinkPeer(reader, writer, self.handlers)
+            # A new connection starts from a full snapshot.
+            self._sent = _Published()
+            peer.send({
+                "t": "hello",
+                "secret": self.secret,
+                "worker": self.worker_id,
+                "pid": os.getpid(),
+                "shards": self.shard_ids,
+                "shard_count": self.shard_count,
+            })
+            while self._cases:
+                peer.send({"t": "case", "case": self._cases.popleft()})
+            reading = asyncio.get_running_loop().create_task(peer.run(lambda message: None))
+            try:
+                while not self._closing and not peer.closed:
+                    self.publish()
+                    await peer.drain()
+                    await self._sleep(self.interval)
+            except (ConnectionError, OSError):
+                pass
+            peer.close()
+            await asyncio.gather(reading, return_exceptions=True)
+            self._peer = None
+            if not self._closing:
+                self.reconnects += 1
+                log.warning("[GLX] Worker %s lost the coordinator; reconnecting.", self.worker_id)
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def publish(self):
+        if self._peer is None or self._bot is None:
+            return
+        start = time.perf_counter()
+        snapshot = build_worker_snapshot(self._bot, self._sent)
+        self._peer.send(snapshot)
+        self.published += 1
+        self.last_publish_ms = (time.perf_counter() - start) * 1000
+
+    def send_case(self, case: Dict[str, Any]):
+        if self._peer is not None and not self._peer.closed:
+            self._peer.send({"t": "case", "case": case})
+        else:
+            self._cases.append(case)
+
+    async def request(self, op: str, **args) -> Any:
+        if self._peer is None:
+            raise ConnectionError("coordinator is not connected")
+        return await self._peer.request(op, **args)
+
+    async def close(self):
+        self._closing = True
+        if self._task is not None:
+            if self._peer is not None:
+                # One last snapshot so counters are not lost.
+                try:
+                    self.publish()
+                    await self._peer.drain()
+                except Exception:
+                    pass
+                self._peer.close()
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+shard_link = ShardLink(interval=SHARD_PUBLISH_SECONDS)
+
+
+# Snapshot fields that are deltas, applied once and not kept on the worker.
+_DELTA_FIELDS = ("guilds", "gone", "guild_stats", "traffic", "access_keys")
+
+
+class _Worker:
+    __slots__ = ("id", "pid", "shards", "peer", "connected_at", "last_seen", "snapshot", "guild_ids")
+
+    def __init__(self, worker_id: int, pid: int, shards: List[int], peer: LinkPeer):
+        self.id = worker_id
+        self.pid = pid
+        self.shards = shards
+        self.peer = peer
+        self.connected_at = time.time()
+        self.last_seen = time.time()
+        self.snapshot: Dict[str, Any] = {}
+        self.guild_ids: set = set()
+
+
+def merge_jobs(job_id: str, parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-worker Job.as_dict() results into one job view."""
+    states = {p["state"] for p in parts}
+    out: Dict[str, Any] = {
+        "id": job_id,
+        "kind": parts[0]["kind"] if parts else "",
+        "state": "running" if "running" in states else ("queued" if "queued" in states else "finished"),
+        "failed_guilds": {},
+        "summary": {},
+        "created_at": min((p["created_at"] for p in parts), default=time.time()),
+    }
+    for field in ("total", "done", "failed", "remaining"):
+        out[field] = sum(p[field] for p in parts)
+    for field in ("queued_ms", "elapsed_ms", "guild_max_ms"):
+        out[field] = max((p[field] for p in parts), default=0.0)
+    ran = sum(p["done"] + p["failed"] for p in parts)
+    out["guild_avg_ms"] = round(sum(p["guild_avg_ms"] * (p["done"] + p["failed"]) for p in parts) / ran, 1) if ran else 0.0
+    for p in parts:
+        out["failed_guilds"].update(p["failed_guilds"])
+        for k, v in p["summary"].items():
+            out["summary"][k] = out["summary"].get(k, 0) + v
+    return out
+
+
+class ShardCoordinator:
+    """Collects worker snapshots into one view for the dashboard.
+
+    Runs in the dashboard process. Per-guild counters, traffic and web keys
+    are mirrored into this process's own STATS / GUILD_STATS / traffic /
+    ACCESS_KEYS, so the dashboard code reads them exactly as it does in
+    single-process mode. Moderation cases from all workers are written to
+    this process's case journal, so it stays single-writer.
+    """
+
+    def __init__(self, host: str, port: int, secret: str):
+        self.host = host
+        self.port = port
+        self.secret = secret
+        self.workers: Dict[int, _Worker] = {}
+        self.guild_owner: Dict[int, int] = {}      # guild id -> worker id
+        self.guild_rows: Dict[int, list] = {}      # guild id -> snapshot row
+        self.handlers: Dict[str, Handler] = {"case_history": self._case_history}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._global_base: Dict[str, int] = {}
+        self._retired: Dict[str, int] = {}         # counters of worker runs that ended
+        self._sessions: Dict[Tuple[int, int], Dict[str, int]] = {}   # (worker, pid) -> session counters
+        self.jobs: "OrderedDict[str, List[Tuple[int, str]]]" = OrderedDict()   # cluster job id -> worker job ids
+        self.snapshots = 0
+        self.started_at = time.time()
+
+    async def start(self, global_base: Optional[Dict[str, int]] = None):
+        """Listen for workers. `global_base` is the persisted global counters."""
+        self._global_base = dict(global_base or {})
+        self._apply_global()
+        self._server = await asyncio.start_server(self._serve, self.host, self.port, limit=MAX_LINE_BYTES)
+        log.info("[GLX] Shard coordinator listening on %s:%s", self.host, self.port)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for worker in list(self.workers.values()):
+            worker.peer.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # No requests are answered until the peer has sent a hello with the right secret.
+        peer = LinkPeer(reader, writer, {})
+        state = {"worker": None}
+
+        def on_message(message: Dict[str, Any]):
+            kind = message.get("t")
+            if kind == "hello":
+                if not hmac.compare_digest(str(message.get("secret") or "").encode(), self.secret.encode()):
+                    # Snapshots feed ACCESS_KEYS and the case journal; only our own workers may send them.
+                    log.warning("[GLX] Rejected a coordinator connection with a bad secret.")
+                    peer.close()
+                    return
+                peer.handlers = self.handlers
+                state["worker"] = self._register(message, peer)
+            elif state["worker"] is None:
+                return
+            elif kind == "snap":
+                self._apply_snapshot(state["worker"], message)
+            elif kind == "case":
+                self._record_case(message.get("case") or {})
+
+        try:
+            await peer.run(on_message)
+        except Exception as e:
+            log.warning("[GLX] Coordinator link error: %s", e)
+        finally:
+            worker = state["worker"]
+            if worker is not None and self.workers.get(worker.id) is worker:
+                log.warning("[GLX] Shard worker %s (pid %s) disconnected.", worker.id, worker.pid)
+                del self.workers[worker.id]
+                mark_changed()
+
+    def _register(self, hello: Dict[str, Any], peer: LinkPeer) -> _Worker:
+        worker = _Worker(int(hello["worker"]), int(hello.get("pid") or 0), list(hello.get("shards") or ()), peer)
+        old = self.workers.get(worker.id)
+        if old is not None and old.peer is not peer:
+            old.peer.close()
+        self.workers[worker.id] = worker
+        log.info("[GLX] Shard worker %s (pid %s) connected with shards %s.", worker.id, worker.pid, worker.shards)
+        return worker
+
+    def _apply_snapshot(self, worker: _Worker, snap: Dict[str, Any]):
+        from .auth import ACCESS_KEYS
+        from .store import _decode_key
+
+        worker.last_seen = time.time()
+        # Keep the per-worker figures; the deltas are applied below.
+        worker.snapshot = {k: v for k, v in snap.items() if k not in _DELTA_FIELDS}
+        self.snapshots += 1
+
+        if snap.get("full"):
+            # First snapshot of a connection: drop whatever this worker id owned before.
+            gone = [gid for gid, wid in self.guild_owner.items() if wid == worker.id]
+            worker.guild_ids = set()
+        else:
+            gone = snap.get("gone") or ()
+        for gid in gone:
+            worker.guild_ids.discard(gid)
+            if self.guild_owner.get(gid) == worker.id:
+                del self.guild_owner[gid]
+                self.guild_rows.pop(gid, None)
+        for row in snap.get("guilds") or ():
+            self.guild_owner[row[0]] = worker.id
+            self.guild_rows[row[0]] = row
+            worker.guild_ids.add(row[0])
+
+        for gid, counters in (snap.get("guild_stats") or {}).items():
+            # Plain dict.update: the mirror must not mark rows dirty for a store.
+            dict.update(GUILD_STATS[int(gid)], counters)
+        for gid, sec, n in snap.get("traffic") or ():
+            traffic.record(gid, sec, n)
+        for code, raw in (snap.get("access_keys") or {}).items():
+            if code not in ACCESS_KEYS:
+                ACCESS_KEYS[code] = _decode_key(raw)
+
+        key = (worker.id, worker.pid)
+        if key not in self._sessions:
+            # A worker restart starts a new session; fold in what the old one counted.
+            for (wid, pid), counters in list(self._sessions.items()):
+                if wid == worker.id:
+                    for name, value in counters.items():
+                        self._retired[name] = self._retired.get(name, 0) + value
+                    del self._sessions[(wid, pid)]
+        self._sessions[key] = snap.get("stats_session") or {}
+        self._apply_global()
+        mark_changed()
+
+    def _apply_global(self):
+        totals = dict(self._global_base)
+        for source in (self._retired, *self._sessions.values()):
+            for name, value in source.items():
+                totals[name] = totals.get(name, 0) + value
+        dict.update(STATS, {name: totals.get(name, 0) for name in STATS})
+
+    def _record_case(self, case: Dict[str, Any]):
+        case_journal.record(
+            int(case["guild_id"]),
+            int(case["user_id"]),
+            case.get("action") or "",
+            case.get("reason") or "",
+            int(case.get("moderator_id") or 0),
+            case.get("source") or "manual",
+            case.get("ts"),
+        )
+
+    async def _case_history(self, guild_id: int, user_id: int, limit: int = 10):
+        return {
+            "cases": case_journal.history(guild_id, user_id, limit),
+            "total": case_journal.count(guild_id, user_id),
+        }
+
+    def worker_for(self, guild_id: int) -> Optional[_Worker]:
+        wid = self.guild_owner.get(guild_id)
+        return self.workers.get(wid) if wid is not None else None
+
+    # ---- command channel -----------------------------------------------------
+
+    def _owner(self, guild_id: int) -> _Worker:
+        worker = self.worker_for(guild_id)
+        if worker is None:
+            raise LookupError("guild_not_found")
+        return worker
+
+    async def _broadcast(self, op: str, **args) -> List[Tuple[_Worker, Any]]:
+        workers = list(self.workers.values())
+        if not workers:
+            raise ConnectionError("no shard workers connected")
+        results = await asyncio.gather(*(w.peer.request(op, **args) for w in workers))
+        return list(zip(workers, results))
+
+    async def toggle(self, name: str, value: bool, guild_id: Optional[int] = None):
+        """Set a guild's feature on its worker, or the default on every worker."""
+        if guild_id is None:
+            await self._broadcast("toggle", name=name, value=value)
+            return {"guild_id": None, "name": name, "value": value}
+        return await self._owner(guild_id).peer.request("toggle", name=name, value=value, guild_id=guild_id)
+
+    async def leave_guild(self, guild_id: int):
+        return await self._owner(guild_id).peer.request("leave_guild", guild_id=guild_id)
+
+    async def sync_automod(self) -> Dict[str, Any]:
+        """Start an AutoMod sync on every worker; one job id covers them all."""
+        parts = await self._broadcast("sync_automod")
+        job_id = secrets.token_hex(6)
+        self.jobs[job_id] = [(worker.id, job["id"]) for worker, job in parts]
+        while len(self.jobs) > JOB_HISTORY:
+            self.jobs.popitem(last=False)
+        return merge_jobs(job_id, [job for _, job in parts])
+
+    async def job(self, job_id: str) -> Dict[str, Any]:
+        parts = self.jobs.get(job_id)
+        if parts is None:
+            raise LookupError("unknown_job")
+        requests = []
+        for wid, part_id in parts:
+            worker = self.workers.get(wid)
+            if worker is None:
+                raise ConnectionError(f"shard worker {wid} is not connected")
+            requests.append(worker.peer.request("job", job_id=part_id))
+        return merge_jobs(job_id, await asyncio.gather(*requests))
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        workers = []
+        for worker in sorted(self.workers.values(), key=lambda w: w.id):
+            snap = worker.snapshot
+            workers.append({
+                "worker": worker.id,
+                "pid": worker.pid,
+                "shards": worker.shards,
+                "ready": bool(snap.get("ready")),
+                "guilds": len(worker.guild_ids),
+                "latency_ms": snap.get("latencies") or [],
+                "snapshot_age_s": round(now - worker.last_seen, 1),
+                "sections": snap.get("sections") or {},
+            })
+        return {
+            "workers": workers,
+            "guilds": len(self.guild_rows),
+            "snapshots": self.snapshots,
+        }
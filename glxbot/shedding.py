@@ -0,0 +1,216 @@
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import discord
+
+from .config import (
+    SHED_LAG_MS,
+    SHED_LAG_HIGH_MS,
+    SHED_SUSTAIN_SECONDS,
+    SHED_RECOVER_SECONDS,
+    SHED_MAX_DEFERRED,
+)
+from .state import log
+from .metrics import registry, loop_lag
+
+# Shedding level at which each kind of low-value work stops running. Anything
+# not listed here (detection, enforcement, lockdowns) is never shed.
+SHED_LEVELS = {
+    "welcome": 1,
+    "reaction": 1,
+    "dashboard": 1,
+    "log": 2,
+}
+
+_SUMMARY_LABELS = {
+    ("welcome", "dropped"): "welcome message(s) skipped",
+    ("reaction", "deferred"): "poll/suggestion reaction set(s) delayed",
+    ("reaction", "dropped"): "poll/suggestion reaction set(s) dropped",
+    ("log", "deferred"): "log embed(s) delayed",
+}
+
+shed_decisions = registry.counter(
+    "glx_shed_total", "Low-priority work dropped or deferred while the event loop was behind.",
+    ("kind", "decision"),
+)
+
+
+class LoadShedder:
+    """Holds back low-value work while the event loop is lagging.
+
+    Fed by `loop_lag` samples. Once lag has stayed above `lag_low` (or
+    `lag_high`) for `sustain` seconds the level rises to 1 (or 2) at once; it
+    only steps back down after `recover` seconds below the threshold. Level 1
+    sheds welcome messages, reactions and dashboard rebuilds; level 2 also
+    holds log embeds in the log sink. Deferred work runs once the level is
+    back to 0, and each affected guild gets a summary in its log channel.
+    """
+
+    def __init__(
+        self,
+        lag_low_ms: float,
+        lag_high_ms: float,
+        sustain: float,
+        recover: float,
+        max_deferred: int,
+    ):
+        self.enabled = lag_low_ms > 0
+        self.lag_low = lag_low_ms / 1000
+        self.lag_high = max(lag_high_ms, lag_low_ms) / 1000
+        self.sustain = max(float(sustain), 0.0)
+        self.recover = max(float(recover), 0.0)
+        self.max_deferred = max(int(max_deferred), 0)
+        self.level = 0
+        self._above_since: Dict[int, float] = {}
+        self._calm_since: Dict[int, float] = {}
+        self._deferred: Deque[Tuple[str, Callable[[], Awaitable[Any]]]] = deque()
+        self._drain_task: Optional[asyncio.Task] = None
+        self._guilds: Dict[int, discord.Guild] = {}
+        self._episode: Dict[int, Counter] = {}
+        self._episode_started = 0.0
+        self._episode_peak = 0.0
+        self.episodes = 0
+        self.shed_seconds = 0.0
+        self.decisions: Counter = Counter()
+
+    def observe(self, lag: float, now: Optional[float] = None):
+        """Feed one loop lag sample (seconds) and move the level if needed."""
+        if not self.enabled:
+            return
+        now = time.monotonic() if now is None else now
+        for level, threshold in ((1, self.lag_low), (2, self.lag_high)):
+            if lag >= threshold:
+                # The loop was already stuck when this late wake-up started.
+                self._above_since.setdefault(level, now - lag)
+                self._calm_since.pop(level, None)
+            else:
+                self._above_since.pop(level, None)
+                self._calm_since.setdefault(level, now)
+        if self.level:
+            self._episode_peak = max(self._episode_peak, lag)
+
+        target = max((lvl for lvl, since in self._above_since.items() if now - since >= self.sustain), default=0)
+        level = self.level
+        if target > level:
+            level = target
+        while level > target:
+            calm = self._calm_since.get(level)
+            if calm is None or now - calm < self.recover:
+                break
+            level -= 1
+        if level != self.level:
+            self._set_level(level, lag, now)
+
+    def _set_level(self, level: int, lag: float, now: float):
+        previous, self.level = self.level, level
+        if previous == 0:
+            self.episodes += 1
+            self._episode_started = now
+            self._episode_peak = lag
+            log.warning("[GLX] Event loop lagging (%.0f ms): shedding level %s.", lag * 1000, level)
+        elif level == 0:
+            self.shed_seconds += now - self._episode_started
+            log.info("[GLX] Event loop recovered after %.1fs: shedding off.", now - self._episode_started)
+            self._on_recovered(now - self._episode_started)
+        else:
+            log.info("[GLX] Shedding level %s -> %s (lag %.0f ms).", previous, level, lag * 1000)
+
+    def shedding(self, kind: str) -> bool:
+        """Whether work of this kind is currently being held back."""
+        return self.level >= SHED_LEVELS.get(kind, self.level + 1)
+
+    def note(self, kind: str, guild: Optional[discord.Guild], decision: str, n: int = 1):
+        self.decisions[kind, decision] += n
+        shed_decisions.inc(kind, decision, n=n)
+        if guild is not None:
+            self._guilds[guild.id] = guild
+            self._episode.setdefault(guild.id, Counter())[kind, decision] += n
+
+    def skip(self, kind: str, guild: Optional[discord.Guild] = None) -> bool:
+        """True (and counted as dropped) if work of this kind should not run now."""
+        if not self.shedding(kind):
+            return False
+        self.note(kind, guild, "dropped")
+        return True
+
+    async def run(self, kind: str, guild: Optional[discord.Guild], factory: Callable[[], Awaitable[Any]]):
+        """Await `factory()` now, or queue it to run once shedding stops."""
+        if not self.shedding(kind):
+            return await factory()
+        if len(self._deferred) >= self.max_deferred:
+            self.note(kind, guild, "dropped")
+            return None
+        self._deferred.append((kind, factory))
+        self.note(kind, guild, "deferred")
+        return None
+
+    def _on_recovered(self, duration: float):
+        episode, self._episode = self._episode, {}
+        guilds, self._guilds = self._guilds, {}
+        peak = self._episode_peak
+        if self._deferred or episode:
+            if self._drain_task is None or self._drain_task.done():
+                self._drain_task = asyncio.get_running_loop().create_task(
+                    self._drain(episode, guilds, duration, peak)
+                )
+
+    async def _drain(self, episode: Dict[int, Counter], guilds: Dict[int, discord.Guild], duration: float,
+                     peak: float):
+        from .security import log_event
+
+        for gid, counts in episode.items():
+            guild = guilds.get(gid)
+            if guild is None:
+                continue
+            lines = [f"`{n}` {_SUMMARY_LABELS.get(key, ' '.join(key))}" for key, n in counts.most_common()]
+            await log_event(
+                guild,
+                "Load Shedding",
+                f"The bot fell behind for {duration:.0f}s (peak loop lag {peak * 1000:.0f} ms). "
+                "Detection and enforcement kept running; lower-priority work was held back:\n"
+                + "\n".join(lines),
+                discord.Color.orange(),
+            )
+
+        while self._deferred and self.level == 0:
+            kind, factory = self._deferred.popleft()
+            try:
+                await factory()
+            except Exception as e:
+                log.debug("[GLX] Deferred %s failed: %s", kind, e)
+
+    async def close(self):
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            await asyncio.gather(self._drain_task, return_exceptions=True)
+            self._drain_task = None
+        self._deferred.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        shed_seconds = self.shed_seconds
+        if self.level:
+            shed_seconds += time.monotonic() - self._episode_started
+        return {
+            "enabled": self.enabled,
+            "level": self.level,
+            "episodes": self.episodes,
+            "shed_seconds": round(shed_seconds, 1),
+            "dropped": sum(n for (_, d), n in self.decisions.items() if d == "dropped"),
+            "deferred": sum(n for (_, d), n in self.decisions.items() if d == "deferred"),
+            "deferred_pending": len(self._deferred),
+            "lag_threshold_ms": round(self.lag_low * 1000, 1),
+        }
+
+
+shedder = LoadShedder(
+    lag_low_ms=SHED_LAG_MS,
+    lag_high_ms=SHED_LAG_HIGH_MS,
+    sustain=SHED_SUSTAIN_SECONDS,
+    recover=SHED_RECOVER_SECONDS,
+    max_deferred=SHED_MAX_DEFERRED,
+)
+loop_lag.add_listener(shedder.observe)
+registry.gauge("glx_shed_level", "Current load shedding level (0 = off, 2 = logs held too).", (),
+               lambda: [((), shedder.level)])
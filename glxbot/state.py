@@ -9,6 +9,7 @@ from .config import (
     ANTIINVITES_ENABLED_DEFAULT,
     ANTIMENTIONS_ENABLED_DEFAULT,
     GLX_NUKE_ENABLED_DEFAULT,
+    CONTENT_FILTER_ENABLED_DEFAULT,
 )
 
 logging.basicConfig(
@@ -41,17 +42,51 @@ BASE_STAT_KEYS = [
     "mutes",
     "automod_rules_created",
     "invites_blocked",
+    "content_blocked",
     "mentions_flagged",
     "nukes",
     "suggestions",
     "polls",
 ]
 
-def _empty_stats():
-    return {k: 0 for k in BASE_STAT_KEYS}
+_CHANGE_LISTENERS = []
 
-STATS = _empty_stats()
-GUILD_STATS = defaultdict(_empty_stats)
+
+def on_stats_change(callback):
+    """Register a zero-argument callback run whenever dashboard data changes."""
+    _CHANGE_LISTENERS.append(callback)
+
+
+def mark_changed():
+    for callback in _CHANGE_LISTENERS:
+        callback()
+
+
+DIRTY_STATS = set()          # (guild id, counter) pairs not yet persisted; guild 0 = global
+
+
+class _StatCounters(dict):
+    """Counter dict that marks the written counter dirty for the state store."""
+
+    __slots__ = ("guild_id",)
+
+    def __init__(self, guild_id):
+        super().__init__((k, 0) for k in BASE_STAT_KEYS)
+        self.guild_id = guild_id
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        DIRTY_STATS.add((self.guild_id, key))
+
+
+class _GuildStats(dict):
+    def __missing__(self, guild_id):
+        counters = self[guild_id] = _StatCounters(guild_id)
+        return counters
+
+
+STATS = _StatCounters(0)
+GUILD_STATS = _GuildStats()
 
 FEATURES = {
     "anti_spam": ANTISPAM_ENABLED_DEFAULT,
@@ -60,17 +95,21 @@ FEATURES = {
     "anti_invites": ANTIINVITES_ENABLED_DEFAULT,
     "anti_mentions": ANTIMENTIONS_ENABLED_DEFAULT,
     "nuke": GLX_NUKE_ENABLED_DEFAULT,
+    "content_filter": CONTENT_FILTER_ENABLED_DEFAULT,
 }
 
-user_messages = defaultdict(lambda: deque(maxlen=50))   # spam window per user
 guild_joins = defaultdict(lambda: deque(maxlen=128))    # join timestamps per guild
-traffic_points = deque(maxlen=5000)                     # timestamps of messages for traffic graph
 
 SUGGESTION_CHANNELS = {}
 WELCOME_CHANNELS = {}
 WELCOME_MESSAGES = {}
 DEFAULT_WELCOME_TEMPLATE = "Welcome {member} to {server}!"
 
-WHITELIST = set()
-
 AUTOMOD_CAPACITY_WARNED_GUILDS = set()
+
+LOG_CHANNEL_IDS = {}        # guild id -> glx-logs channel id
+LOG_CHANNEL_FAILURES = {}   # guild id -> (retry_at monotonic, backoff seconds)
+
+RAID_LOCK_SAVED = {}        # guild id -> @everyone send permissions before a role lockdown
+RAID_LOCK_MODES = {}        # guild id -> mode ("role"/"channels") the active lockdown was applied with
+RAID_LOCK_TIMINGS = {}      # guild id -> last lock/unlock {"mode", "enabled", "changed", "seconds"}
@@ -0,0 +1,416 @@
+import asyncio
+import json
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .config import STATE_DB_PATH, STATE_FLUSH_SECONDS
+from .state import (
+    log,
+    STATS,
+    GUILD_STATS,
+    DIRTY_STATS,
+    FEATURES,
+    SUGGESTION_CHANNELS,
+    WELCOME_CHANNELS,
+    WELCOME_MESSAGES,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats (
+    guild_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS warns (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS access_keys (
+    code TEXT PRIMARY KEY,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS whitelist (
+    user_id INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS whitelist_entries (
+    guild_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    target_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, kind, target_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (guild_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS features (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# guild_settings name -> in-memory map it is loaded into
+GUILD_SETTING_MAPS = {
+    "suggestion_channel": SUGGESTION_CHANNELS,
+    "welcome_channel": WELCOME_CHANNELS,
+    "welcome_message": WELCOME_MESSAGES,
+}
+
+
+def _encode_key(rec: Dict[str, Any]) -> str:
+    out = dict(rec)
+    if isinstance(out.get("created_at"), datetime):
+        out["created_at"] = out["created_at"].isoformat()
+    return json.dumps(out)
+
+
+def _decode_key(raw: str) -> Dict[str, Any]:
+    rec = json.loads(raw)
+    if rec.get("created_at"):
+        rec["created_at"] = datetime.fromisoformat(rec["created_at"])
+    return rec
+
+
+class StateStore:
+    """SQLite (WAL) persistence for counters, warns, web keys and guild config.
+
+    The in-memory maps stay the source of truth while the bot runs. Writers
+    only record *what* changed (`save_*`, or a stat counter write, which adds
+    the counter to `DIRTY_STATS`); repeated writes to the same row coalesce in
+    memory. A background task flushes everything pending in one transaction
+    every `interval` seconds on a worker thread, so message handling never
+    waits on disk.
+
+    Global counters (guild 0) are written as increments over what this
+    process last wrote, so several shard workers can share one database
+    without overwriting each other's totals.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = float(interval)
+        self.path: Optional[str] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._warns: Dict[Tuple[int, int], int] = {}
+        self._keys: Dict[str, Optional[str]] = {}
+        self._whitelist: Dict[Tuple[int, str, int], bool] = {}
+        self._settings: Dict[Tuple[int, str], Any] = {}
+        self._features: Dict[str, bool] = {}
+        self._global_written: Dict[str, int] = {}
+        self.loaded_global: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+        self.flushes = 0
+        self.rows_written = 0
+        self.last_flush_ms = 0.0
+        self.failed = 0
+
+    # ---- lifecycle -------------------------------------------------------
+
+    def open(self, path: str, owns: Optional[Callable[[int], bool]] = None) -> Dict[str, float]:
+        """Open (or create) the database and load it into memory.
+
+        `owns(guild_id)` limits the per-guild rows that are loaded (a shard
+        worker only keeps its own guilds); global rows are always loaded.
+        Returns load timings in seconds per table plus row counts.
+        """
+        self.path = path
+        # Shard workers share the file; wait for another writer instead of failing.
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        return self._load(owns)
+
+    def _load(self, owns: Optional[Callable[[int], bool]] = None) -> Dict[str, float]:
+        from .discipline import WARNS
+        from .auth import ACCESS_KEYS
+        from .settings import guild_settings
+        from .exemptions import exemptions, GLOBAL_GUILD_ID
+
+        db = self._db
+        timings: Dict[str, float] = {}
+        start = t = time.perf_counter()
+
+        rows = 0
+        for gid, name, value in db.execute("SELECT guild_id, name, value FROM stats"):
+            if gid and owns is not None and not owns(gid):
+                continue
+            counters = STATS if gid == 0 else GUILD_STATS[gid]
+            dict.__setitem__(counters, name, value)
+            rows += 1
+        self.loaded_global = dict(STATS)
+        self._global_written = dict(STATS)
+        timings["stats_rows"] = rows
+        timings["stats"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        rows = 0
+        current_gid = None
+        gdict = None
+        for gid, uid, count in db.execute("SELECT guild_id, user_id, count FROM warns"):
+            if owns is not None and not owns(gid):
+                continue
+            if gid != current_gid:
+                current_gid = gid
+                gdict = WARNS[gid]
+            gdict[uid] = count
+            rows += 1
+        timings["warns_rows"] = rows
+        timings["warns"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        for code, raw in db.execute("SELECT code, record FROM access_keys"):
+            ACCESS_KEYS[code] = _decode_key(raw)
+        # The old whitelist table was global; keep its users exempt in every guild.
+        legacy = db.execute("SELECT user_id FROM whitelist").fetchall()
+        if legacy:
+            db.execute("BEGIN")
+            db.executemany(
+                "INSERT OR IGNORE INTO whitelist_entries (guild_id, kind, target_id) VALUES (?, 'user', ?)",
+                [(GLOBAL_GUILD_ID, uid) for (uid,) in legacy],
+            )
+            db.execute("DELETE FROM whitelist")
+            db.execute("COMMIT")
+        for gid, kind, target_id in db.execute("SELECT guild_id, kind, target_id FROM whitelist_entries"):
+            if gid and owns is not None and not owns(gid):
+                continue
+            exemptions.load(gid, kind, target_id)
+        rows = 0
+        for gid, name, value in db.execute("SELECT guild_id, name, value FROM guild_settings"):
+            if gid and owns is not None and not owns(gid):
+                continue
+            target = GUILD_SETTING_MAPS.get(name)
+            if target is not None:
+                target[gid] = value
+            else:
+                guild_settings.load(gid, name, value)
+            rows += 1
+        timings["settings_rows"] = rows
+        for name, value in db.execute("SELECT name, value FROM features"):
+            if name in FEATURES:
+                FEATURES[name] = bool(value)
+        guild_settings.rebuild()
+        timings["config"] = time.perf_counter() - t
+
+        DIRTY_STATS.clear()
+        timings["total"] = time.perf_counter() - start
+        return timings
+
+    def start(self):
+        if self._db is None or self._closing or (self._task is not None and not self._task.done()):
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closing:
+                return
+            await self.flush()
+
+    async def close(self):
+        """Stop the flusher, write whatever is pending and close the database."""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ---- write-behind API --------------------------------------------------
+
+    def save_warn(self, guild_id: int, user_id: int, count: int):
+        """Record a user's warn count; 0 removes the row."""
+        self._warns[(guild_id, user_id)] = count
+
+    def save_access_key(self, code: str, rec: Optional[Dict[str, Any]]):
+        """Record a web key under its normalised code; None deletes it."""
+        self._keys[code] = _encode_key(rec) if rec is not None else None
+
+    def save_whitelist(self, guild_id: int, kind: str, target_id: int, present: bool):
+        """Record a whitelisted user or role ("user"/"role") for a guild; False removes it."""
+        self._whitelist[(guild_id, kind, target_id)] = present
+
+    def save_guild_setting(self, guild_id: int, name: str, value: Any):
+        """Record a per-guild setting (GUILD_SETTING_MAPS or a settings override); None deletes it."""
+        self._settings[(guild_id, name)] = value
+
+    def save_feature(self, name: str, value: bool):
+        self._features[name] = bool(value)
+
+    def pending(self) -> int:
+        return (
+            len(DIRTY_STATS) + len(self._warns) + len(self._keys)
+            + len(self._whitelist) + len(self._settings) + len(self._features)
+        )
+
+    # ---- flushing ------------------------------------------------------------
+
+    def _take_batch(self) -> Dict[str, list]:
+        """Swap the pending changes out into row lists (runs on the loop thread)."""
+        stats_rows = []
+        global_rows = []
+        written = self._global_written
+        for gid, name in DIRTY_STATS:
+            if gid == 0:
+                delta = STATS[name] - written.get(name, 0)
+                if delta:
+                    global_rows.append((0, name, delta))
+                    written[name] = STATS[name]
+                continue
+            counters = GUILD_STATS.get(gid)
+            if counters is not None:
+                stats_rows.append((gid, name, counters[name]))
+        DIRTY_STATS.clear()
+
+        batch = {
+            "stats": stats_rows,
+            "global_stats": global_rows,
+            "warns_put": [(g, u, c) for (g, u), c in self._warns.items() if c > 0],
+            "warns_del": [(g, u) for (g, u), c in self._warns.items() if c <= 0],
+            "keys_put": [(k, v) for k, v in self._keys.items() if v is not None],
+            "keys_del": [(k,) for k, v in self._keys.items() if v is None],
+            "wl_put": [entry for entry, present in self._whitelist.items() if present],
+            "wl_del": [entry for entry, present in self._whitelist.items() if not present],
+            "settings_put": [(g, n, v) for (g, n), v in self._settings.items() if v is not None],
+            "settings_del": [(g, n) for (g, n), v in self._settings.items() if v is None],
+            "features": [(n, int(v)) for n, v in self._features.items()],
+        }
+        self._warns = {}
+        self._keys = {}
+        self._whitelist = {}
+        self._settings = {}
+        self._features = {}
+        return batch
+
+    def _write(self, batch: Dict[str, list]) -> int:
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            db.executemany(
+                "INSERT INTO stats (guild_id, name, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (guild_id, name) DO UPDATE SET value = excluded.value",
+                batch["stats"],
+            )
+            db.executemany(
+                "INSERT INTO stats (guild_id, name, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (guild_id, name) DO UPDATE SET value = value + excluded.value",
+                batch["global_stats"],
+            )
+            db.executemany(
+                "INSERT INTO warns (guild_id, user_id, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (guild_id, user_id) DO UPDATE SET count = excluded.count",
+                batch["warns_put"],
+            )
+            db.executemany("DELETE FROM warns WHERE guild_id = ? AND user_id = ?", batch["warns_del"])
+            db.executemany("INSERT OR REPLACE INTO access_keys (code, record) VALUES (?, ?)", batch["keys_put"])
+            db.executemany("DELETE FROM access_keys WHERE code = ?", batch["keys_del"])
+            db.executemany(
+                "INSERT OR IGNORE INTO whitelist_entries (guild_id, kind, target_id) VALUES (?, ?, ?)",
+                batch["wl_put"],
+            )
+            db.executemany(
+                "DELETE FROM whitelist_entries WHERE guild_id = ? AND kind = ? AND target_id = ?",
+                batch["wl_del"],
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO guild_settings (guild_id, name, value) VALUES (?, ?, ?)",
+                batch["settings_put"],
+            )
+            db.executemany("DELETE FROM guild_settings WHERE guild_id = ? AND name = ?", batch["settings_del"])
+            db.executemany("INSERT OR REPLACE INTO features (name, value) VALUES (?, ?)", batch["features"])
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return sum(len(rows) for rows in batch.values())
+
+    def _requeue(self, batch: Dict[str, list]):
+        """Put a failed batch back, without overwriting anything newer."""
+        DIRTY_STATS.update((gid, name) for gid, name, _ in batch["stats"])
+        for gid, name, delta in batch["global_stats"]:
+            self._global_written[name] = self._global_written.get(name, 0) - delta
+            DIRTY_STATS.add((gid, name))
+        for g, u, c in batch["warns_put"]:
+            self._warns.setdefault((g, u), c)
+        for g, u in batch["warns_del"]:
+            self._warns.setdefault((g, u), 0)
+        for k, v in batch["keys_put"]:
+            self._keys.setdefault(k, v)
+        for (k,) in batch["keys_del"]:
+            self._keys.setdefault(k, None)
+        for entry in batch["wl_put"]:
+            self._whitelist.setdefault(entry, True)
+        for entry in batch["wl_del"]:
+            self._whitelist.setdefault(entry, False)
+        for g, n, v in batch["settings_put"]:
+            self._settings.setdefault((g, n), v)
+        for g, n in batch["settings_del"]:
+            self._settings.setdefault((g, n), None)
+        for n, v in batch["features"]:
+            self._features.setdefault(n, bool(v))
+
+    async def flush(self) -> int:
+        if self._db is None or not self.pending():
+            return 0
+        batch = self._take_batch()
+        start = time.perf_counter()
+        try:
+            written = await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            self.failed += 1
+            self._requeue(batch)
+            log.warning("[GLX] State flush failed, will retry: %s", e)
+            return 0
+        self.flushes += 1
+        self.rows_written += written
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        return written
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "path": self.path,
+            "pending": self.pending(),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "failed": self.failed,
+        }
+
+
+state_store = StateStore(interval=STATE_FLUSH_SECONDS)
+
+
+def open_state_store(
+    path: str = STATE_DB_PATH,
+    owns: Optional[Callable[[int], bool]] = None,
+) -> Optional[Dict[str, float]]:
+    """Load persisted state at startup; an empty path keeps state in memory only."""
+    if not path:
+        log.info("[GLX] GLX_STATE_DB is empty; state will not be persisted.")
+        return None
+    timings = state_store.open(path, owns)
+    log.info(
+        "[GLX] Loaded state from %s in %.2fs (%d stat rows, %d warns, %d guild settings)",
+        path,
+        timings["total"],
+        timings["stats_rows"],
+        timings["warns_rows"],
+        timings["settings_rows"],
+    )
+    return timings
@@ -0,0 +1,155 @@
+import asyncio
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .config import (
+    SPAM_WINDOW_SECONDS,
+    SPAM_TRACKER_CAPACITY,
+    SPAM_TRACKER_IDLE_SECONDS,
+    SPAM_TRACKER_MAX_KEYS,
+)
+from .state import log
+
+
+class _Ring:
+    __slots__ = ("ts", "head", "size", "last")
+
+    def __init__(self, capacity: int):
+        self.ts = array("d", bytes(8 * capacity))
+        self.head = 0
+        self.size = 0
+        self.last = 0.0
+
+
+class RateTracker:
+    """Sliding-window hit counter keyed by (guild_id, user_id).
+
+    Each key owns a fixed-size array-backed ring of timestamps, so memory per
+    key is bounded by `capacity`. Keys idle for longer than `idle_ttl` are
+    dropped by `sweep()`, and the number of keys is hard-capped at `max_keys`
+    by evicting the least recently active key.
+    """
+
+    def __init__(self, window: float, capacity: int, idle_ttl: float, max_keys: int):
+        self.window = float(window)
+        self.capacity = max(int(capacity), 1)
+        self.idle_ttl = max(float(idle_ttl), self.window)
+        self.max_keys = max(int(max_keys), 1)
+        self._rings: "OrderedDict[Tuple[int, int], _Ring]" = OrderedDict()
+        self._sweeper: Optional[asyncio.Task] = None
+        self.evicted_idle = 0
+        self.evicted_cap = 0
+        self._ring_bytes = self._measure_ring()
+
+    def _measure_ring(self) -> int:
+        ring = _Ring(self.capacity)
+        key = (0, 0)
+        return (
+            sys.getsizeof(ring)
+            + sys.getsizeof(ring.ts)
+            + sys.getsizeof(key)
+            + 2 * sys.getsizeof(2 ** 62)
+        )
+
+    def hit(
+        self,
+        guild_id: int,
+        user_id: int,
+        now: Optional[float] = None,
+        window: Optional[float] = None,
+    ) -> int:
+        """Record one event and return how many fall inside the window.
+
+        `window` overrides the tracker's default window for this call (per-guild
+        settings); counts are capped at the ring capacity either way.
+        """
+        now = time.time() if now is None else now
+        key = (guild_id, user_id)
+        rings = self._rings
+        ring = rings.get(key)
+        if ring is None:
+            if len(rings) >= self.max_keys:
+                rings.popitem(last=False)
+                self.evicted_cap += 1
+            ring = _Ring(self.capacity)
+            rings[key] = ring
+        else:
+            rings.move_to_end(key)
+
+        ts = ring.ts
+        ts[ring.head] = now
+        ring.head = (ring.head + 1) % self.capacity
+        if ring.size < self.capacity:
+            ring.size += 1
+        ring.last = now
+
+        cutoff = now - (self.window if window is None else window)
+        count = 0
+        idx = ring.head
+        for _ in range(ring.size):
+            idx = (idx - 1) % self.capacity
+            if ts[idx] < cutoff:
+                break
+            count += 1
+        return count
+
+    def reset(self, guild_id: int, user_id: int):
+        self._rings.pop((guild_id, user_id), None)
+
+    def forget_guild(self, guild_id: int):
+        for key in [k for k in self._rings if k[0] == guild_id]:
+            del self._rings[key]
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Evict keys idle for longer than `idle_ttl`. Returns evicted count."""
+        now = time.time() if now is None else now
+        cutoff = now - self.idle_ttl
+        rings = self._rings
+        evicted = 0
+        # OrderedDict is kept in activity order, so idle keys sit at the front.
+        while rings:
+            key, ring = next(iter(rings.items()))
+            if ring.last >= cutoff:
+                break
+            del rings[key]
+            evicted += 1
+        self.evicted_idle += evicted
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        keys = len(self._rings)
+        return {
+            "keys": keys,
+            "max_keys": self.max_keys,
+            "ring_capacity": self.capacity,
+            "approx_bytes": keys * self._ring_bytes + sys.getsizeof(self._rings),
+            "evicted_idle": self.evicted_idle,
+            "evicted_cap": self.evicted_cap,
+        }
+
+    async def _sweep_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = self.sweep()
+                if evicted:
+                    log.debug("[GLX] Rate tracker evicted %s idle key(s).", evicted)
+            except Exception as e:
+                log.warning("[GLX] Rate tracker sweep failed: %s", e)
+
+    def start_sweeper(self, interval: Optional[float] = None):
+        if self._sweeper is not None and not self._sweeper.done():
+            return
+        interval = interval or max(self.idle_ttl / 2, 1.0)
+        self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever(interval))
+
+
+spam_tracker = RateTracker(
+    window=SPAM_WINDOW_SECONDS,
+    capacity=SPAM_TRACKER_CAPACITY,
+    idle_ttl=SPAM_TRACKER_IDLE_SECONDS,
+    max_keys=SPAM_TRACKER_MAX_KEYS,
+)
@@ -0,0 +1,144 @@
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+class _Ring:
+    """Fixed number of time buckets of `resolution` seconds each."""
+
+    __slots__ = ("resolution", "size", "slots", "counts")
+
+    def __init__(self, resolution: int, size: int):
+        self.resolution = resolution
+        self.size = size
+        self.slots = array("q", [-1]) * size
+        self.counts = array("I", [0]) * size
+
+    def add(self, ts: float, n: int = 1):
+        slot = int(ts // self.resolution)
+        idx = slot % self.size
+        stored = self.slots[idx]
+        if stored == slot:
+            self.counts[idx] += n
+        elif stored < slot:
+            self.slots[idx] = slot
+            self.counts[idx] = n
+        # else: older than this ring's horizon, nothing to keep
+
+    def read(self, first_slot: int, last_slot: int) -> List[int]:
+        out = []
+        slots = self.slots
+        counts = self.counts
+        size = self.size
+        for slot in range(first_slot, last_slot + 1):
+            idx = slot % size
+            out.append(counts[idx] if slots[idx] == slot else 0)
+        return out
+
+
+class TrafficCounter:
+    """Message counts at 1s, 1m and 1h resolution, O(1) per recorded event."""
+
+    __slots__ = ("rings",)
+
+    # resolution seconds -> bucket count (5 minutes, 6 hours, 7 days)
+    LAYOUT = ((1, 300), (60, 360), (3600, 168))
+
+    def __init__(self):
+        self.rings = {res: _Ring(res, size) for res, size in self.LAYOUT}
+
+    def add(self, ts: float, n: int = 1):
+        for ring in self.rings.values():
+            ring.add(ts, n)
+
+
+# range key -> (bucket resolution, window seconds, points on the graph, label format)
+TRAFFIC_RANGES: Dict[str, Tuple[int, int, int, str]] = {
+    "5m": (1, 5 * 60, 30, "%H:%M:%S"),
+    "1h": (60, 60 * 60, 60, "%H:%M"),
+    "6h": (60, 6 * 3600, 72, "%H:%M"),
+    "24h": (3600, 24 * 3600, 24, "%d %b %H:00"),
+    "7d": (3600, 7 * 24 * 3600, 56, "%d %b %H:00"),
+}
+DEFAULT_TRAFFIC_RANGE = "5m"
+
+
+class TrafficIndex:
+    """Global plus per-guild traffic counters."""
+
+    def __init__(self):
+        self.total = TrafficCounter()
+        self.guilds: Dict[int, TrafficCounter] = {}
+        # (guild id, second) -> count recorded since the last take_pending(); None = not captured
+        self._pending: Optional[Dict[Tuple[int, int], int]] = None
+
+    def record(self, guild_id: int, ts: Optional[float] = None, n: int = 1):
+        ts = time.time() if ts is None else ts
+        self.total.add(ts, n)
+        counter = self.guilds.get(guild_id)
+        if counter is None:
+            counter = self.guilds[guild_id] = TrafficCounter()
+        counter.add(ts, n)
+        pending = self._pending
+        if pending is not None:
+            key = (guild_id, int(ts))
+            pending[key] = pending.get(key, 0) + n
+
+    def capture_pending(self):
+        """Start keeping per-second deltas for take_pending() (shard workers)."""
+        if self._pending is None:
+            self._pending = {}
+
+    def take_pending(self) -> List[List[int]]:
+        """[guild id, second, count] recorded since the previous call."""
+        if not self._pending:
+            return []
+        out = [[gid, sec, n] for (gid, sec), n in self._pending.items()]
+        self._pending = {}
+        return out
+
+    def forget_guild(self, guild_id: int):
+        self.guilds.pop(guild_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        ring_bytes = sum(r.size * (r.slots.itemsize + r.counts.itemsize) for r in self.total.rings.values())
+        return {
+            "guilds": len(self.guilds),
+            "approx_bytes": (len(self.guilds) + 1) * ring_bytes,
+        }
+
+    def series(
+        self,
+        guild_id: Optional[int] = None,
+        range_key: str = DEFAULT_TRAFFIC_RANGE,
+        now: Optional[float] = None,
+    ) -> Dict[str, object]:
+        """Counts for the graph; cost is proportional to the bucket count only.
+
+        Returns (counts, bucket start timestamps, window start, window end,
+        label format) in a dict.
+        """
+        now = time.time() if now is None else now
+        resolution, window, points, label_fmt = TRAFFIC_RANGES.get(
+            range_key, TRAFFIC_RANGES[DEFAULT_TRAFFIC_RANGE]
+        )
+        counter = self.total if guild_id is None else self.guilds.get(guild_id)
+
+        last_slot = int(now // resolution)
+        n_buckets = window // resolution
+        first_slot = last_slot - n_buckets + 1
+        raw = counter.rings[resolution].read(first_slot, last_slot) if counter else [0] * n_buckets
+
+        per_point = max(n_buckets // points, 1)
+        counts = [sum(raw[i:i + per_point]) for i in range(0, n_buckets, per_point)]
+        starts = [(first_slot + i) * resolution for i in range(0, n_buckets, per_point)]
+        return {
+            "counts": counts,
+            "starts": starts,
+            "start": first_slot * resolution,
+            "end": now,
+            "label_format": label_fmt,
+        }
+
+
+traffic = TrafficIndex()
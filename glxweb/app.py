@@ -1,72 +1,78 @@
-import time
+import asyncio
+import hmac
 from datetime import datetime, timedelta
 
 from aiohttp import web
 
-from glxbot.config import PREFIX
-from glxbot.state import STATS, GUILD_STATS, traffic_points, FEATURES
+from glxbot.config import PREFIX, STATS_CACHE_SECONDS, METRICS_TOKEN, METRICS_MAX_GUILDS
+from glxbot.state import STATS, GUILD_STATS
+from glxbot.settings import FEATURE_FIELDS
 from glxbot.security import uptime_str
 from glxbot.auth import validate_credentials, get_license_info
+from glxbot.traffic import traffic, TRAFFIC_RANGES, DEFAULT_TRAFFIC_RANGE
+from glxbot.cases import case_journal
+from glxbot.metrics import counter_families, render
+from glxweb.live import LiveHub
+from glxweb.cache import SnapshotCache, accepts_gzip, etag_matches
 
 
-def build_traffic_series():
-    """Build a simple traffic graph data over the last 5 minutes (message timestamps)."""
-    now = time.time()
-    window = 5 * 60.0
-    start = now - window
-
-    while traffic_points and traffic_points[0] < start - 60:
-        traffic_points.popleft()
+def build_traffic_series(guild_id=None, range_key=DEFAULT_TRAFFIC_RANGE):
+    """Build traffic graph data from the bucketed counters (global or one guild)."""
+    series = traffic.series(guild_id, range_key)
+    start = series["start"]
+    now = series["end"]
 
     start_utc = datetime.utcfromtimestamp(start)
     end_utc = datetime.utcfromtimestamp(now)
     start_jkt = start_utc + timedelta(hours=7)
     end_jkt = end_utc + timedelta(hours=7)
 
-    if not traffic_points:
-        return {
-            "counts": [],
-            "labels": [],
-            "window_start_utc": start_utc.strftime("%Y-%m-%d %H:%M:%S"),
-            "window_end_utc": end_utc.strftime("%Y-%m-%d %H:%M:%S"),
-            "window_start_jakarta": start_jkt.strftime("%Y-%m-%d %H:%M:%S"),
-            "window_end_jakarta": end_jkt.strftime("%Y-%m-%d %H:%M:%S"),
-        }
-
-    buckets = 30
-    step = window / buckets
-    counts = [0 for _ in range(buckets)]
-    for ts in traffic_points:
-        if ts < start:
-            continue
-        idx = int((ts - start) // step)
-        if 0 <= idx < buckets:
-            counts[idx] += 1
-
-    labels = []
-    for i in range(buckets):
-        t = start + i * step
-        t_jkt = datetime.utcfromtimestamp(t) + timedelta(hours=7)
-        labels.append(t_jkt.strftime("%H:%M"))
-
-    return {
-        "counts": counts,
-        "labels": labels,
+    window = {
+        "range": range_key if range_key in TRAFFIC_RANGES else DEFAULT_TRAFFIC_RANGE,
+        "ranges": list(TRAFFIC_RANGES),
         "window_start_utc": start_utc.strftime("%Y-%m-%d %H:%M:%S"),
         "window_end_utc": end_utc.strftime("%Y-%m-%d %H:%M:%S"),
         "window_start_jakarta": start_jkt.strftime("%Y-%m-%d %H:%M:%S"),
         "window_end_jakarta": end_jkt.strftime("%Y-%m-%d %H:%M:%S"),
     }
 
+    counts = series["counts"]
+    if not any(counts):
+        return {"counts": [], "labels": [], **window}
+
+    label_fmt = series["label_format"]
+    labels = [
+        (datetime.utcfromtimestamp(t) + timedelta(hours=7)).strftime(label_fmt)
+        for t in series["starts"]
+    ]
+    return {"counts": counts, "labels": labels, **window}
+
+
+# Clocks and self-describing counters change on every request.
+_VOLATILE_FIELDS = ("uptime", "time_utc", "time_jakarta", "stats_cache", "live")
+
+
+def stats_fingerprint(data: dict) -> dict:
+    """Snapshot without the fields that change every second, for ETags."""
+    out = {k: v for k, v in data.items() if k not in _VOLATILE_FIELDS}
+    out["traffic"] = {k: v for k, v in data["traffic"].items() if not k.startswith("window_")}
+    return out
 
-def collect_stats(bot, role: str, scope_guild_id=None):
+
+live_hub = None
+stats_cache = SnapshotCache(ttl=STATS_CACHE_SECONDS, fingerprint=stats_fingerprint)
+
+
+def collect_stats(source, role: str, scope_guild_id=None, traffic_range=DEFAULT_TRAFFIC_RANGE):
     """Collect stats for dashboard.
 
+    `source` is a LocalSource (bot in this process) or a ClusterSource
+    (shard workers, via the coordinator).
+
     - role == 'user' -> only scope_guild_id (single server view)
     - role == 'admin' -> global view for ALL servers
     - None / invalid -> generic global stats without server detail
     """
-    guilds = list(bot.guilds)
 
     now_utc = datetime.utcnow()
     now_jkt = now_utc + timedelta(hours=7)
@@ -74,75 +80,81 @@ def collect_stats(bot, role: str, scope_guild_id=None):
     license_info = get_license_info()
 
     if role == "user" and scope_guild_id is not None:
-        target = next((g for g in guilds if g.id == scope_guild_id), None)
+        target = source.guild(scope_guild_id)
         if target:
-            members = target.member_count or (len(target.members) if target.members else 0)
-            bot_count = 0
-            if target.members:
-                for m in target.members:
-                    if m.bot:
-                        bot_count += 1
-            guilds_detail = [{
-                "id": target.id,
-                "name": target.name,
-                "members": members,
-                "bots": bot_count,
-            }]
-            stats = GUILD_STATS[target.id]
+            stats = GUILD_STATS[target["id"]]
             data = {
                 "uptime": uptime_str(),
                 "prefix": PREFIX,
                 "guilds": 1,
-                "members": members,
-                "bots": bot_count,
+                "members": target["members"],
+                "bots": target["bots"],
                 "stats": stats,
-                "features": FEATURES,
-                "traffic": build_traffic_series(),
+                "features": source.features(target["id"]),
+                "traffic": build_traffic_series(target["id"], traffic_range),
                 "license": license_info,
                 "time_utc": now_utc.strftime("%Y-%m-%d %H:%M:%S UTC"),
                 "time_jakarta": now_jkt.strftime("%Y-%m-%d %H:%M:%S Asia/Jakarta (UTC+7)"),
-                "guilds_detail": guilds_detail,
+                "guilds_detail": [target],
+                "enforcement": source.enforcement(target["id"]),
             }
             return data
 
-    total_members = sum(g.member_count or 0 for g in guilds)
-    total_bots = 0
-    guilds_detail = []
-    for g in guilds:
-        bot_count = 0
-        if g.members:
-            for m in g.members:
-                if m.bot:
-                    bot_count += 1
-        total_bots += bot_count
-        members = g.member_count or (len(g.members) if g.members else 0)
-        guilds_detail.append({
-            "id": g.id,
-            "name": g.name,
-            "members": members,
-            "bots": bot_count,
-        })
+    guilds_detail = source.guilds()
+    total_members = sum(g["members"] for g in guilds_detail)
+    total_bots = sum(g["bots"] for g in guilds_detail)
 
     data = {
         "uptime": uptime_str(),
         "prefix": PREFIX,
-        "guilds": len(guilds),
+        "guilds": len(guilds_detail),
         "members": total_members,
         "bots": total_bots,
         "stats": STATS,
-        "features": FEATURES,
-        "traffic": build_traffic_series(),
+        "features": source.default_features(),
+        "traffic": build_traffic_series(None, traffic_range),
         "license": license_info,
         "time_utc": now_utc.strftime("%Y-%m-%d %H:%M:%S UTC"),
         "time_jakarta": now_jkt.strftime("%Y-%m-%d %H:%M:%S Asia/Jakarta (UTC+7)"),
         "guilds_detail": guilds_detail,
     }
+    if role == "admin":
+        data["live"] = live_hub.stats() if live_hub is not None else None
+        data["stats_cache"] = stats_cache.stats()
+        data.update(source.sections())
+        data["cases"] = case_journal.stats()
     return data
 
 
-def create_web_app(bot):
+def create_web_app(source):
+    """Dashboard app over a LocalSource or ClusterSource.
+
+    Actions go through the source; with a ClusterSource they are sent to the
+    bot process(es) over the coordinator's command channel.
+    """
+    global live_hub
     routes = web.RouteTableDef()
 
+    async def run_action(action, *args):
+        """(result, None) or (None, error response) for a source action."""
+        try:
+            return await action(*args), None
+        except LookupError as e:
+            return None, web.json_response({"ok": False, "error": str(e) or "not_found"}, status=404)
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            return None, web.json_response({"ok": False, "error": "bot_unavailable", "detail": str(e)}, status=503)
+        except Exception as e:
+            return None, web.json_response({"ok": False, "error": str(e)}, status=500)
+
+    def build_scope(scope):
+        role, scope_gid, traffic_range = scope
+        data = collect_stats(source, role, scope_gid, traffic_range)
+        data["locked"] = role is None
+        data["role"] = role
+        return data
+
+    live_hub = LiveHub(build_scope)
+
     index_html_path = (__file__.rsplit("/", 1)[0] or ".") + "/templates/index.html"
     with open(index_html_path, "r", encoding="utf-8") as f:
         index_html = f.read()
@@ -156,12 +168,100 @@ def create_web_app(bot):
         key = request.query.get("key") or ""
         pin = request.query.get("pin") or ""
         cred = validate_credentials(key, pin)
-        role = cred.get("role")
-        scope_gid = cred.get("guild_id")
-        data = collect_stats(bot, role, scope_gid)
-        data["locked"] = not cred.get("valid", False)
-        data["role"] = role
-        return web.json_response(data)
+        traffic_range = request.query.get("range") or DEFAULT_TRAFFIC_RANGE
+        if traffic_range not in TRAFFIC_RANGES:
+            traffic_range = DEFAULT_TRAFFIC_RANGE
+        locked = not cred.get("valid", False)
+        scope = (cred.get("role"), cred.get("guild_id"), traffic_range, locked)
+
+        def build():
+            data = collect_stats(source, scope[0], scope[1], traffic_range)
+            data["locked"] = locked
+            data["role"] = scope[0]
+            return data
+
+        entry = stats_cache.get(scope, build)
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": "private, no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request.headers.get("If-None-Match", ""), entry.etag):
+            stats_cache.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        if accepts_gzip(request.headers.get("Accept-Encoding", "")):
+            headers["Content-Encoding"] = "gzip"
+            return web.Response(body=entry.gzipped, content_type="application/json", headers=headers)
+        return web.Response(body=entry.body, content_type="application/json", headers=headers)
+
+    @routes.get("/api/stream")
+    async def api_stream(request):
+        """Server-sent events: one `snapshot`, then `delta` frames as data changes."""
+        key = request.query.get("key") or ""
+        pin = request.query.get("pin") or ""
+        cred = validate_credentials(key, pin)
+        if not cred.get("valid"):
+            return web.json_response({"ok": False, "locked": True, "error": "access_denied"}, status=403)
+        traffic_range = request.query.get("range") or DEFAULT_TRAFFIC_RANGE
+        if traffic_range not in TRAFFIC_RANGES:
+            traffic_range = DEFAULT_TRAFFIC_RANGE
+        scope = (cred.get("role"), cred.get("guild_id"), traffic_range)
+
+        resp = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+        await resp.prepare(request)
+        queue = live_hub.subscribe(scope)
+        try:
+            while True:
+                await resp.write(await queue.get())
+        except ConnectionResetError:
+            pass  # client went away; noticed on the next frame or keep-alive
+        finally:
+            live_hub.unsubscribe(scope, queue)
+        return resp
+
+    @routes.get("/metrics")
+    async def metrics(request):
+        """Prometheus scrape; needs GLX_METRICS_TOKEN as a Bearer token or `?token=`."""
+        if not METRICS_TOKEN:
+            raise web.HTTPNotFound()
+        auth = request.headers.get("Authorization", "")
+        supplied = auth[7:] if auth.startswith("Bearer ") else request.query.get("token", "")
+        if not hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode()):
+            return web.Response(status=401, text="unauthorized", headers={"WWW-Authenticate": "Bearer"})
+        body = source.metrics() + render(counter_families(STATS, GUILD_STATS, METRICS_MAX_GUILDS))
+        return web.Response(
+            body=body.encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    @routes.get("/api/history")
+    async def api_history(request):
+        key = request.query.get("key") or ""
+        pin = request.query.get("pin") or ""
+        cred = validate_credentials(key, pin)
+        if not cred.get("valid"):
+            return web.json_response({"ok": False, "locked": True, "error": "access_denied"}, status=403)
+        try:
+            user_id = int(request.query["user_id"])
+            limit = max(1, min(int(request.query.get("limit") or 25), 100))
+            if cred.get("role") == "admin":
+                guild_id = int(request.query["guild_id"])
+            else:
+                guild_id = cred.get("guild_id")
+        except (KeyError, ValueError):
+            return web.json_response({"ok": False, "error": "bad_query"}, status=400)
+        cases = case_journal.history(guild_id, user_id, limit)
+        return web.json_response({
+            "ok": True,
+            "guild_id": guild_id,
+            "user_id": user_id,
+            "total": case_journal.count(guild_id, user_id),
+            "cases": cases,
+        })
 
     @routes.post("/api/toggle")
     async def api_toggle(request):
@@ -174,17 +274,25 @@ def create_web_app(bot):
             payload = await request.json()
             feat_key = payload.get("key")
             value = bool(payload.get("value"))
+            guild_id = payload.get("guild_id")
+            guild_id = int(guild_id) if guild_id is not None else None
         except Exception:
             return web.json_response({"ok": False, "error": "bad_payload"}, status=400)
-        if feat_key not in FEATURES:
+        if feat_key not in FEATURE_FIELDS:
             return web.json_response({"ok": False, "error": "unknown_feature"}, status=400)
-        FEATURES[feat_key] = value
-        return web.json_response({"ok": True, "feature": feat_key, "value": value})
+        # Dashboard users only ever change their own guild; admins change the
+        # global default unless they name a guild.
+        if cred.get("role") != "admin":
+            guild_id = cred.get("guild_id")
+            if guild_id is None:
+                return web.json_response({"ok": False, "error": "no_guild"}, status=400)
+        _, error = await run_action(source.toggle, feat_key, value, guild_id)
+        if error is not None:
+            return error
+        return web.json_response({"ok": True, "feature": feat_key, "value": value, "guild_id": guild_id})
 
     @routes.post("/api/sync_automod")
     async def api_sync_automod(request):
-        from glxbot.automod_sync import sync_automod
-
         key = request.query.get("key") or ""
         pin = request.query.get("pin") or ""
         cred = validate_credentials(key, pin)
@@ -192,11 +300,26 @@ def create_web_app(bot):
             return web.json_response({"ok": False, "locked": True, "error": "access_denied"}, status=403)
         if cred.get("role") != "admin":
             return web.json_response({"ok": False, "error": "admin_only"}, status=403)
-        if not bot.guilds:
+        if not source.guilds():
             return web.json_response({"ok": False, "error": "no_guilds"}, status=400)
-        for guild in bot.guilds:
-            bot.loop.create_task(sync_automod(bot, guild, FEATURES))
-        return web.json_response({"ok": True})
+        job, error = await run_action(source.sync_automod)
+        if error is not None:
+            return error
+        return web.json_response({"ok": True, "job_id": job["id"], "job": job})
+
+    @routes.get("/api/jobs/{job_id}")
+    async def api_job(request):
+        key = request.query.get("key") or ""
+        pin = request.query.get("pin") or ""
+        cred = validate_credentials(key, pin)
+        if not cred.get("valid"):
+            return web.json_response({"ok": False, "locked": True, "error": "access_denied"}, status=403)
+        if cred.get("role") != "admin":
+            return web.json_response({"ok": False, "error": "admin_only"}, status=403)
+        job, error = await run_action(source.job, request.match_info["job_id"])
+        if error is not None:
+            return error
+        return web.json_response({"ok": True, "job": job})
 
     @routes.post("/api/admin/leave_guild")
     async def api_admin_leave_guild(request):
@@ -212,13 +335,9 @@ def create_web_app(bot):
             gid = int(payload.get("guild_id"))
         except Exception:
             return web.json_response({"ok": False, "error": "bad_payload"}, status=400)
-        guild = next((g for g in bot.guilds if g.id == gid), None)
-        if guild is None:
-            return web.json_response({"ok": False, "error": "guild_not_found"}, status=404)
-        try:
-            await guild.leave()
-        except Exception as e:
-            return web.json_response({"ok": False, "error": str(e)}, status=500)
+        _, error = await run_action(source.leave_guild, gid)
+        if error is not None:
+            return error
         return web.json_response({"ok": True})
 
     app = web.Application()
@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import json
+import time
+from typing import Callable, Dict, Hashable, Optional
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of `etag` against an If-None-Match header value."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = _opaque_tag(etag)
+    return any(_opaque_tag(tag) == wanted for tag in if_none_match.split(","))
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip (explicitly or via `*`) with q > 0."""
+    gzip_q = star_q = None
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "x-gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == "*":
+            star_q = q
+        else:
+            gzip_q = q
+    if gzip_q is None:
+        gzip_q = star_q
+    return bool(gzip_q and gzip_q > 0)
+
+
+class _Entry:
+    __slots__ = ("expires", "etag", "body", "gzipped")
+
+    def __init__(self, expires: float, etag: str, body: bytes, gzipped: bytes):
+        self.expires = expires
+        self.etag = etag
+        self.body = body
+        self.gzipped = gzipped
+
+
+class SnapshotCache:
+    """Short-lived, pre-encoded `/api/stats` responses keyed by scope.
+
+    The first request for a scope (role, guild, traffic range) builds the
+    dict, serialises it and gzips it once; everyone asking for the same scope
+    within `ttl` seconds gets those bytes as-is.
+
+    The ETag is a weak validator over `fingerprint(data)` (the whole body by
+    default), so fields that tick every second, like clocks, can be left out
+    and an otherwise unchanged snapshot still answers `If-None-Match` with 304.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        fingerprint: Optional[Callable[[dict], object]] = None,
+        max_entries: int = 1024,
+        compress_level: int = 5,
+    ):
+        self.ttl = float(ttl)
+        self.fingerprint = fingerprint
+        self.max_entries = int(max_entries)
+        self.compress_level = compress_level
+        self._entries: Dict[Hashable, _Entry] = {}
+        self.hits = 0
+        self.rebuilds = 0
+        self.not_modified = 0
+        self.rebuild_seconds = 0.0
+        self.rebuild_max = 0.0
+
+    def get(self, key: Hashable, build: Callable[[], dict], now: Optional[float] = None) -> _Entry:
+        now = time.monotonic() if now is None else now
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires > now:
+            self.hits += 1
+            return entry
+
+        start = time.perf_counter()
+        data = build()
+        body = json.dumps(data, separators=(",", ":"), default=str).encode()
+        if self.fingerprint is not None:
+            basis = json.dumps(self.fingerprint(data), sort_keys=True, default=str).encode()
+        else:
+            basis = body
+        etag = 'W/"' + hashlib.blake2b(basis, digest_size=12).hexdigest() + '"'
+        entry = _Entry(now + self.ttl, etag, body, gzip.compress(body, self.compress_level))
+        elapsed = time.perf_counter() - start
+        self.rebuilds += 1
+        self.rebuild_seconds += elapsed
+        self.rebuild_max = max(self.rebuild_max, elapsed)
+
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            self.prune(now)
+        self._entries[key] = entry
+        return entry
+
+    def prune(self, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        for key in [k for k, e in self._entries.items() if e.expires <= now]:
+            del self._entries[key]
+        # Still full of live entries (many scopes at once): drop the oldest.
+        while len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def stats(self) -> Dict[str, object]:
+        served = self.hits + self.rebuilds
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+            "not_modified": self.not_modified,
+            "hit_ratio": round(self.hits / served, 3) if served else 0.0,
+            "rebuild_avg_ms": round(self.rebuild_seconds / self.rebuilds * 1000, 2) if self.rebuilds else 0.0,
+            "rebuild_max_ms": round(self.rebuild_max * 1000, 2),
+        }
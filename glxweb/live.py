@@ -0,0 +1,159 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+from glxbot.state import log, on_stats_change
+from glxbot.shedding import shedder
+
+_MISSING = object()
+
+
+def diff_snapshot(old: Any, new: Any) -> Any:
+    """Minimal change set turning `old` into `new`.
+
+    Dicts are diffed key by key (removed keys map to None); anything else is
+    replaced wholesale when it differs. Returns _MISSING when nothing changed.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        out = {}
+        for k, v in new.items():
+            d = diff_snapshot(old.get(k, _MISSING), v)
+            if d is not _MISSING:
+                out[k] = d
+        for k in old.keys() - new.keys():
+            out[k] = None
+        return out if out else _MISSING
+    if old is _MISSING or old != new:
+        return new
+    return _MISSING
+
+
+def _frame(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n".encode()
+
+
+class _Scope:
+    __slots__ = ("key", "subscribers", "snapshot", "snapshot_frame", "dirty", "task")
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.snapshot: Optional[dict] = None
+        self.snapshot_frame: Optional[bytes] = None
+        self.dirty = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class LiveHub:
+    """Shares one dashboard snapshot per scope across every open stream.
+
+    A scope (role, guild, traffic range) has a single publisher task. It
+    sleeps until bot data changes (`glxbot.state.mark_changed`) or the
+    heartbeat elapses, waits `min_interval` to coalesce bursts, rebuilds the
+    snapshot once, and fans the serialised delta out to all subscribers. New
+    subscribers get the full snapshot first; a subscriber that falls behind
+    is resynced with a full snapshot instead of a backlog of deltas. While
+    the loop is shedding load, rebuilds slow down to one per heartbeat.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[Hashable], dict],
+        min_interval: float = 0.5,
+        heartbeat: float = 15.0,
+        max_backlog: int = 8,
+    ):
+        self._build = build
+        self.min_interval = min_interval
+        self.heartbeat = heartbeat
+        self.max_backlog = max_backlog
+        self._scopes: Dict[Hashable, _Scope] = {}
+        self.rebuilds = 0
+        self.frames_sent = 0
+        on_stats_change(self._mark_dirty)
+
+    def _mark_dirty(self):
+        for scope in self._scopes.values():
+            scope.dirty.set()
+
+    def subscriber_count(self) -> int:
+        return sum(len(s.subscribers) for s in self._scopes.values())
+
+    def _publish(self, scope: _Scope, frame: bytes):
+        for queue in list(scope.subscribers):
+            if queue.qsize() >= self.max_backlog:
+                # Slow reader: drop its backlog and resync from the full snapshot.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(scope.snapshot_frame)
+            else:
+                queue.put_nowait(frame)
+        self.frames_sent += len(scope.subscribers)
+
+    def _rebuild(self, scope: _Scope) -> Optional[bytes]:
+        """Refresh the scope snapshot; returns the delta frame, or None if unchanged."""
+        # Round-trip through JSON so the stored snapshot compares like the client sees it.
+        snapshot = json.loads(json.dumps(self._build(scope.key), default=str))
+        self.rebuilds += 1
+        old = scope.snapshot
+        scope.snapshot = snapshot
+        scope.snapshot_frame = _frame("snapshot", snapshot)
+        if old is None:
+            return scope.snapshot_frame
+        delta = diff_snapshot(old, snapshot)
+        if delta is _MISSING:
+            return None
+        return _frame("delta", delta)
+
+    async def _run(self, scope: _Scope):
+        try:
+            while scope.subscribers:
+                try:
+                    await asyncio.wait_for(scope.dirty.wait(), self.heartbeat)
+                    await asyncio.sleep(self.min_interval)
+                    if shedder.shedding("dashboard"):
+                        shedder.note("dashboard", None, "deferred")
+                        await asyncio.sleep(self.heartbeat)
+                except asyncio.TimeoutError:
+                    pass  # quiet period: refresh anyway so uptime and the graph window roll on
+                scope.dirty.clear()
+                if not scope.subscribers:
+                    break
+                try:
+                    frame = self._rebuild(scope)
+                except Exception as e:
+                    log.warning("[GLX] Live dashboard rebuild failed: %s", e)
+                    continue
+                self._publish(scope, frame if frame is not None else b": keep-alive\n\n")
+        finally:
+            if self._scopes.get(scope.key) is scope and not scope.subscribers:
+                del self._scopes[scope.key]
+
+    def subscribe(self, key: Hashable) -> asyncio.Queue:
+        scope = self._scopes.get(key)
+        if scope is None:
+            scope = self._scopes[key] = _Scope(key)
+        if scope.snapshot is None:
+            self._rebuild(scope)
+        queue: asyncio.Queue = asyncio.Queue()
+        queue.put_nowait(scope.snapshot_frame)
+        scope.subscribers.add(queue)
+        if scope.task is None or scope.task.done():
+            scope.task = asyncio.get_running_loop().create_task(self._run(scope))
+        return queue
+
+    def unsubscribe(self, key: Hashable, queue: asyncio.Queue):
+        scope = self._scopes.get(key)
+        if scope is None:
+            return
+        scope.subscribers.discard(queue)
+        if not scope.subscribers:
+            scope.dirty.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "scopes": len(self._scopes),
+            "subscribers": self.subscriber_count(),
+            "rebuilds": self.rebuilds,
+            "frames_sent": self.frames_sent,
+        }
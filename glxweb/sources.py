@@ -0,0 +1,183 @@
+from typing import Any, Dict, List, Optional
+
+from glxbot.settings import guild_settings
+from glxbot.tracker import spam_tracker
+from glxbot.enforcement import enforcer
+from glxbot.raid import raid_monitor
+from glxbot.members import member_index
+from glxbot.store import state_store
+from glxbot.security import log_sink
+from glxbot.exemptions import exemptions
+from glxbot.automod_sync import automod_reconciler
+from glxbot.jobs import job_scheduler
+from glxbot.shards import worker_ops
+from glxbot.metrics import registry, loop_lag, render, render_workers
+from glxbot.shedding import shedder
+from glxbot.rest import rest_scheduler
+
+
+class LocalSource:
+    """Dashboard data read straight from the bot running in this process.
+
+    Both sources expose the same actions (toggle, sync_automod, job,
+    leave_guild); they raise LookupError for an unknown guild or job and
+    ConnectionError when the bot cannot be reached.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.ops = worker_ops(bot)
+
+    def guilds(self) -> List[Dict[str, Any]]:
+        out = []
+        for g in self.bot.guilds:
+            out.append({
+                "id": g.id,
+                "name": g.name,
+                "members": g.member_count or (len(g.members) if g.members else 0),
+                "bots": member_index.bots(g),
+                "raid": raid_monitor.status(g.id),
+            })
+        return out
+
+    def guild(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        g = self.bot.get_guild(guild_id)
+        if g is None:
+            return None
+        return {
+            "id": g.id,
+            "name": g.name,
+            "members": g.member_count or (len(g.members) if g.members else 0),
+            "bots": member_index.bots(g),
+            "raid": raid_monitor.status(g.id),
+        }
+
+    def features(self, guild_id: int) -> Dict[str, bool]:
+        return dict(guild_settings.get(guild_id).features)
+
+    def default_features(self) -> Dict[str, bool]:
+        return dict(guild_settings.defaults.features)
+
+    def enforcement(self, guild_id: Optional[int] = None) -> Dict[str, Any]:
+        return enforcer.stats(guild_id)
+
+    def sections(self) -> Dict[str, Any]:
+        return {
+            "spam_tracker": spam_tracker.stats(),
+            "enforcement": enforcer.stats(),
+            "log_sink": log_sink.stats(),
+            "state_store": state_store.stats(),
+            "exemptions": exemptions.stats(),
+            "automod": automod_reconciler.stats(),
+            "jobs": job_scheduler.stats(),
+            "loop_lag": loop_lag.stats(),
+            "shedding": shedder.stats(),
+            "rest": rest_scheduler.stats(),
+        }
+
+    def metrics(self) -> str:
+        """Prometheus text for this process's handler, REST and loop metrics."""
+        return render(registry.export())
+
+    async def toggle(self, name: str, value: bool, guild_id: Optional[int] = None):
+        return await self.ops["toggle"](name=name, value=value, guild_id=guild_id)
+
+    async def sync_automod(self) -> Dict[str, Any]:
+        return await self.ops["sync_automod"]()
+
+    async def job(self, job_id: str) -> Dict[str, Any]:
+        return await self.ops["job"](job_id=job_id)
+
+    async def leave_guild(self, guild_id: int):
+        return await self.ops["leave_guild"](guild_id=guild_id)
+
+
+def _merge(values: List[Any], key: str) -> Any:
+    """Combine one stats field reported by several workers."""
+    if all(isinstance(v, bool) for v in values) or not all(isinstance(v, (int, float)) for v in values):
+        return values[0]
+    # Latencies, timings and shedding levels are per-worker figures; the worst one is the useful total.
+    if key.endswith("_ms") or "max" in key or key == "level":
+        return max(values)
+    return sum(values)
+
+
+def merge_sections(per_worker: List[Dict[str, Any]]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for sections in per_worker:
+        for name, stats in sections.items():
+            out.setdefault(name, []).append(stats)
+    merged = {}
+    for name, reports in out.items():
+        keys = list(dict.fromkeys(k for r in reports for k in r))
+        merged[name] = {k: _merge([r[k] for r in reports if k in r], k) for k in keys}
+    return merged
+
+
+class ClusterSource:
+    """Dashboard data gathered from bot worker snapshots by a ShardCoordinator.
+
+    Reads never wait on a worker; actions go to the owning worker (or all of
+    them) over the coordinator's link.
+    """
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+
+    @staticmethod
+    def _row(row: list) -> Dict[str, Any]:
+        gid, name, members, bots, raid = row[:5]
+        return {"id": gid, "name": name, "members": members, "bots": bots, "raid": raid}
+
+    def guilds(self) -> List[Dict[str, Any]]:
+        return [self._row(row) for row in self.coordinator.guild_rows.values()]
+
+    def guild(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        row = self.coordinator.guild_rows.get(guild_id)
+        return self._row(row) if row is not None else None
+
+    def features(self, guild_id: int) -> Dict[str, bool]:
+        row = self.coordinator.guild_rows.get(guild_id)
+        return dict(row[5]) if row is not None else self.default_features()
+
+    def default_features(self) -> Dict[str, bool]:
+        for worker in self.coordinator.workers.values():
+            features = worker.snapshot.get("features_default")
+            if features:
+                return dict(features)
+        return dict(guild_settings.defaults.features)
+
+    def enforcement(self, guild_id: Optional[int] = None) -> Dict[str, Any]:
+        if guild_id is None:
+            return self.sections().get("enforcement", {})
+        worker = self.coordinator.worker_for(guild_id)
+        if worker is None:
+            return {}
+        out = dict(worker.snapshot.get("sections", {}).get("enforcement", {}))
+        out["queue_depth"] = (worker.snapshot.get("queue_depths") or {}).get(str(guild_id), 0)
+        return out
+
+    def sections(self) -> Dict[str, Any]:
+        workers = self.coordinator.workers.values()
+        out = merge_sections([w.snapshot.get("sections") or {} for w in workers])
+        out["shards"] = self.coordinator.stats()
+        return out
+
+    def metrics(self) -> str:
+        """Each worker's last published metrics plus this process's own, labelled by worker."""
+        per_worker = {"coordinator": registry.export()}
+        for worker in sorted(self.coordinator.workers.values(), key=lambda w: w.id):
+            per_worker[str(worker.id)] = worker.snapshot.get("metrics") or []
+        return render_workers(per_worker)
+
+    async def toggle(self, name: str, value: bool, guild_id: Optional[int] = None):
+        return await self.coordinator.toggle(name, value, guild_id)
+
+    async def sync_automod(self) -> Dict[str, Any]:
+        return await self.coordinator.sync_automod()
+
+    async def job(self, job_id: str) -> Dict[str, Any]:
+        return await self.coordinator.job(job_id)
+
+    async def leave_guild(self, guild_id: int):
+        return await self.coordinator.leave_guild(guild_id)